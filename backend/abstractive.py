@@ -1,14 +1,29 @@
 import os
+import time
 from typing import List
 
 import torch
-from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+from transformers import AutoModelForSeq2SeqLM, AutoTokenizer, LogitsProcessor, LogitsProcessorList
 
+from fairqueue import inference_slot
+from length_plan import plan_lengths
 from preprocessing import normalize_text_language, sentence_tokenize, word_tokenize
+from profiling import stage, torch_profile
+from runtime_config import ensure_torch_threads
 
 _MODEL = None
 _TOKENIZER = None
 _MODEL_NAME = None
+# Every loaded model keyed by resolved path, so per-language pipelines can
+# alternate without reloading weights.
+_MODELS = {}
+_DRAFT_MODEL = None
+_DRAFT_MODEL_NAME = None
+
+DECODING_MODES = ("beam", "prompt_lookup", "assisted")
+SENTENCE_END_CHARS = (".", "!", "?", "؟")
+
+_SENTENCE_END_IDS = {}
 
 
 def _get_device():
@@ -64,6 +79,7 @@ def _load_model(model_name: str | None = None):
         "ABSTRACTIVE_MODEL", "nafisehNik/mt5-persian-summary"
     )
 
+    ensure_torch_threads(torch)
     device = _get_device()
     dtype = torch.float16 if device == "cuda" else torch.float32
     resolved_model = _resolve_model_path(model_name)
@@ -77,8 +93,12 @@ def _load_model(model_name: str | None = None):
             " to the model folder."
         )
 
-    if _MODEL is not None and _TOKENIZER is not None and _MODEL_NAME == resolved_model:
-        return _MODEL, _TOKENIZER, _MODEL_NAME
+    is_default = model_name == os.getenv("ABSTRACTIVE_MODEL", "nafisehNik/mt5-persian-summary")
+    if resolved_model in _MODELS:
+        model, tokenizer = _MODELS[resolved_model]
+        if is_default:
+            _MODEL, _TOKENIZER, _MODEL_NAME = model, tokenizer, resolved_model
+        return model, tokenizer, resolved_model
 
     tokenizer = AutoTokenizer.from_pretrained(
         resolved_model, local_files_only=local_only
@@ -90,11 +110,117 @@ def _load_model(model_name: str | None = None):
     model.to(device)
     model.eval()
 
-    _MODEL = model
-    _TOKENIZER = tokenizer
-    _MODEL_NAME = resolved_model
+    _MODELS[resolved_model] = (model, tokenizer)
+    if is_default:
+        _MODEL = model
+        _TOKENIZER = tokenizer
+        _MODEL_NAME = resolved_model
+
+    return model, tokenizer, resolved_model
+
+
+def get_tokenizer(model_name=None):
+    if model_name is not None:
+        return _load_model(model_name)[1]
+    if _TOKENIZER is None:
+        _load_model()
+    return _TOKENIZER
+
+
+def tokenizer_fingerprint() -> str:
+    tokenizer = get_tokenizer()
+    return f"{os.path.basename(tokenizer.name_or_path.rstrip('/'))}:{len(tokenizer)}"
 
-    return _MODEL, _TOKENIZER, _MODEL_NAME
+
+def draft_model_configured() -> bool:
+    return bool(os.getenv("ABSTRACTIVE_DRAFT_MODEL"))
+
+
+def _load_draft_model():
+    global _DRAFT_MODEL, _DRAFT_MODEL_NAME
+
+    model_name = os.getenv("ABSTRACTIVE_DRAFT_MODEL")
+    if not model_name:
+        raise ValueError(
+            "Assisted decoding needs a draft model. Set ABSTRACTIVE_DRAFT_MODEL"
+            " to a smaller model that shares the main model's tokenizer."
+        )
+
+    resolved_model = _resolve_model_path(model_name)
+    if _DRAFT_MODEL is not None and _DRAFT_MODEL_NAME == resolved_model:
+        return _DRAFT_MODEL
+
+    device = _get_device()
+    dtype = torch.float16 if device == "cuda" else torch.float32
+    using_local_path = os.path.isdir(resolved_model)
+    local_only = os.getenv("HF_LOCAL_ONLY", "0") == "1" or using_local_path
+    if local_only and not using_local_path:
+        raise FileNotFoundError(
+            "Local draft model not found. Place it under backend/hf-models/"
+            " and set ABSTRACTIVE_DRAFT_MODEL to the folder name."
+        )
+
+    model = AutoModelForSeq2SeqLM.from_pretrained(
+        resolved_model, torch_dtype=dtype, local_files_only=local_only
+    )
+    model.to(device)
+    model.eval()
+
+    _DRAFT_MODEL = model
+    _DRAFT_MODEL_NAME = resolved_model
+    return _DRAFT_MODEL
+
+
+def _decoding_kwargs(decoding, prompt_lookup_num_tokens):
+    if decoding == "beam":
+        return {}
+    if decoding == "prompt_lookup":
+        # Greedy with transformers' prompt lookup. For a seq2seq model it
+        # drafts from the summary generated so far, not from the source, so
+        # it is exact but not a speedup on its own.
+        return {"prompt_lookup_num_tokens": prompt_lookup_num_tokens, "num_beams": 1}
+    if decoding == "assisted":
+        return {"assistant_model": _load_draft_model(), "num_beams": 1}
+    raise ValueError(f"Unknown decoding mode: {decoding}")
+
+
+def _sentence_end_ids(tokenizer):
+    key = (tokenizer.name_or_path, len(tokenizer))
+    if key not in _SENTENCE_END_IDS:
+        tokens = tokenizer.convert_ids_to_tokens(list(range(len(tokenizer))))
+        ids = [i for i, token in enumerate(tokens) if token and token.endswith(SENTENCE_END_CHARS)]
+        if tokenizer.eos_token_id is not None:
+            ids.append(tokenizer.eos_token_id)
+        _SENTENCE_END_IDS[key] = torch.tensor(ids, dtype=torch.long)
+    return _SENTENCE_END_IDS[key]
+
+
+class _LengthBudgetProcessor(LogitsProcessor):
+    # Forces EOS on a hypothesis once it has produced its budget of tokens and
+    # just closed a sentence; max_new_tokens stays as the hard cap for run-on
+    # outputs. A stopping criterion cannot do this under beam search, which
+    # only stops when every row does. budgets holds one entry per input row
+    # (None for no budget) and is expanded over the beams.
+    def __init__(self, budgets, sentence_end_ids, eos_token_id, num_beams=1, start_length=1):
+        limits = [budget if budget else float("inf") for budget in budgets]
+        self.budgets = torch.tensor(limits).repeat_interleave(num_beams)
+        self.sentence_end_ids = sentence_end_ids
+        self.eos_token_id = eos_token_id
+        self.start_length = start_length
+
+    def __call__(self, input_ids, scores):
+        generated = input_ids.shape[-1] - self.start_length
+        reached = generated >= self.budgets.to(input_ids.device)
+        if not reached.any():
+            return scores
+        ended = torch.isin(input_ids[:, -1], self.sentence_end_ids.to(input_ids.device))
+        rows = reached & ended
+        if rows.any():
+            forced = torch.full_like(scores[0], -float("inf"))
+            forced[self.eos_token_id] = 0.0
+            scores = scores.clone()
+            scores[rows] = forced
+        return scores
 
 
 def _summarize_one(
@@ -109,33 +235,71 @@ def _summarize_one(
     repetition_penalty=1.1,
     no_repeat_ngram_size=3,
     prefix="summarize: ",
+    stats=None,
+    decoding="beam",
+    prompt_lookup_num_tokens=10,
+    length_budget=None,
 ):
     prompt = (prefix + text.strip()) if prefix else text.strip()
 
-    enc = tokenizer(
-        prompt, truncation=True, max_length=max_input_length, return_tensors="pt"
-    ).to(_get_device())
+    with stage("tokenize"):
+        enc = tokenizer(
+            prompt, truncation=True, max_length=max_input_length, return_tensors="pt"
+        ).to(_get_device())
+
+    generate_kwargs = {
+        "num_beams": num_beams,
+        "max_new_tokens": max_new_tokens,
+        "min_new_tokens": min_new_tokens,
+        "length_penalty": length_penalty,
+        "repetition_penalty": repetition_penalty,
+        "no_repeat_ngram_size": no_repeat_ngram_size,
+        "early_stopping": True,
+        "use_cache": True,
+    }
+    generate_kwargs.update(_decoding_kwargs(decoding, prompt_lookup_num_tokens))
+    if generate_kwargs["num_beams"] == 1:
+        generate_kwargs.pop("early_stopping")
+        generate_kwargs.pop("length_penalty")
+    if length_budget:
+        generate_kwargs["logits_processor"] = LogitsProcessorList(
+            [
+                _LengthBudgetProcessor(
+                    [length_budget], _sentence_end_ids(tokenizer), tokenizer.eos_token_id, generate_kwargs["num_beams"]
+                )
+            ]
+        )
 
-    with torch.no_grad():
-        out_ids = model.generate(
-            **enc,
-            num_beams=num_beams,
-            max_new_tokens=max_new_tokens,
-            min_new_tokens=min_new_tokens,
-            length_penalty=length_penalty,
-            repetition_penalty=repetition_penalty,
-            no_repeat_ngram_size=no_repeat_ngram_size,
-            early_stopping=True,
-            use_cache=True,
+    slot_cost = generate_kwargs["num_beams"] * (enc["input_ids"].shape[-1] + max_new_tokens)
+    with inference_slot(slot_cost):
+        started = time.perf_counter()
+        with stage("generate"), torch_profile(), torch.no_grad():
+            out_ids = model.generate(**enc, **generate_kwargs)
+
+    if stats is not None:
+        _record_generate_stats(
+            stats,
+            generated_tokens=max(0, out_ids.shape[-1] - 1),
+            num_beams=generate_kwargs["num_beams"],
+            elapsed=time.perf_counter() - started,
         )
 
-    return tokenizer.decode(out_ids[0], skip_special_tokens=True).strip()
+    with stage("detokenize"):
+        return tokenizer.decode(out_ids[0], skip_special_tokens=True).strip()
+
+
+def _record_generate_stats(stats, generated_tokens, num_beams, elapsed):
+    stats["generate_calls"] = stats.get("generate_calls", 0) + 1
+    stats["generated_tokens"] = stats.get("generated_tokens", 0) + int(generated_tokens)
+    stats["beam_tokens"] = stats.get("beam_tokens", 0) + int(generated_tokens) * num_beams
+    stats["generate_sec"] = stats.get("generate_sec", 0.0) + elapsed
 
 
 def chunk_text_by_tokens(
-    tokenizer, text, chunk_size=850, overlap=120, prefix_tokens=10
+    tokenizer, text, chunk_size=850, overlap=120, prefix_tokens=10, ids=None, lengths=None
 ):
-    ids = tokenizer.encode(text, add_special_tokens=False)
+    if ids is None:
+        ids = tokenizer.encode(text, add_special_tokens=False)
 
     effective_chunk = max(50, chunk_size - prefix_tokens)
 
@@ -149,6 +313,8 @@ def chunk_text_by_tokens(
         ).strip()
         if chunk_text:
             chunks.append(chunk_text)
+            if lengths is not None:
+                lengths.append(len(chunk_ids))
         if end >= len(ids):
             break
     return chunks
@@ -170,64 +336,242 @@ def summarize_long_text(
     max_input_length=1024,
     prefix="summarize: ",
     length_ratio=None,
+    max_new_tokens_scale=1.0,
+    stats=None,
+    chunk_decoding="beam",
+    final_decoding="beam",
+    prompt_lookup_num_tokens=10,
+    chunk_cache=None,
+    token_ids=None,
+    model_name=None,
 ):
-    global _MODEL, _TOKENIZER
-    if _MODEL is None or _TOKENIZER is None:
-        _load_model()
+    model, tokenizer, _ = _load_model(model_name)
     prefix_tok = (
-        len(_TOKENIZER.encode(prefix, add_special_tokens=False)) if prefix else 0
-    )
-
-    chunks = chunk_text_by_tokens(
-        _TOKENIZER,
-        text,
-        chunk_size=chunk_size,
-        overlap=overlap,
-        prefix_tokens=prefix_tok,
+        len(tokenizer.encode(prefix, add_special_tokens=False)) if prefix else 0
     )
 
+    # Chunking only depends on the text and chunk geometry, so callers that
+    # summarize the same documents repeatedly (evaluation sweeps) share it.
+    cache_key = (tokenizer.name_or_path, text, chunk_size, overlap, prefix_tok)
+    cached = chunk_cache.get(cache_key) if chunk_cache is not None else None
+    if cached is not None:
+        chunks, chunk_lengths, total_tokens = cached
+    else:
+        chunk_lengths = []
+        with stage("chunking"):
+            chunks = chunk_text_by_tokens(
+                tokenizer,
+                text,
+                chunk_size=chunk_size,
+                overlap=overlap,
+                prefix_tokens=prefix_tok,
+                ids=token_ids,
+                lengths=chunk_lengths,
+            )
+            if token_ids is not None:
+                total_tokens = len(token_ids)
+            elif length_ratio:
+                total_tokens = len(tokenizer.encode(text, add_special_tokens=False))
+            else:
+                total_tokens = None
+        if chunk_cache is not None:
+            chunk_cache[cache_key] = (chunks, chunk_lengths, total_tokens)
+
+    fixed_chunk = {"budget": None, "max_new_tokens": chunk_max_new_tokens, "min_new_tokens": chunk_min_new_tokens}
+    final_plan = {"budget": None, "max_new_tokens": final_max_new_tokens, "min_new_tokens": final_min_new_tokens}
     if length_ratio:
-        total_tokens = len(_TOKENIZER.encode(text, add_special_tokens=False))
-        target_total = int(total_tokens * length_ratio)
-        target_total = max(40, min(600, target_total))
-        chunk_count = max(1, len(chunks))
-        chunk_target = max(20, int(target_total / chunk_count))
-        chunk_max_new_tokens = max(30, min(240, chunk_target))
-        chunk_min_new_tokens = max(10, min(chunk_max_new_tokens, int(chunk_max_new_tokens * 0.6)))
-        final_max_new_tokens = max(50, min(600, target_total))
-        final_min_new_tokens = max(20, min(final_max_new_tokens, int(final_max_new_tokens * 0.6)))
+        if total_tokens is None:
+            total_tokens = len(tokenizer.encode(text, add_special_tokens=False))
+        plan = plan_lengths(chunk_lengths, total_tokens, length_ratio, max_new_tokens_scale)
+        chunk_plans = plan["chunks"]
+        final_plan = plan["final"]
+    else:
+        if max_new_tokens_scale and max_new_tokens_scale < 1.0:
+            fixed_chunk["max_new_tokens"] = max(16, int(chunk_max_new_tokens * max_new_tokens_scale))
+            fixed_chunk["min_new_tokens"] = min(chunk_min_new_tokens, int(fixed_chunk["max_new_tokens"] * 0.6))
+            final_plan["max_new_tokens"] = max(24, int(final_max_new_tokens * max_new_tokens_scale))
+            final_plan["min_new_tokens"] = min(final_min_new_tokens, int(final_plan["max_new_tokens"] * 0.6))
+        chunk_plans = [fixed_chunk] * len(chunks)
+
+    if stats is not None:
+        stats["chunks"] = len(chunks)
+        if length_ratio:
+            stats["planned_tokens"] = stats.get("planned_tokens", 0) + plan["target_total"]
 
     chunk_summaries = []
-    for i, ch in enumerate(chunks, 1):
+    for ch, chunk_plan in zip(chunks, chunk_plans):
         s = _summarize_one(
-            _MODEL,
-            _TOKENIZER,
+            model,
+            tokenizer,
             ch,
             num_beams=chunk_num_beams,
             max_input_length=max_input_length,
-            max_new_tokens=chunk_max_new_tokens,
-            min_new_tokens=chunk_min_new_tokens,
+            max_new_tokens=chunk_plan["max_new_tokens"],
+            min_new_tokens=chunk_plan["min_new_tokens"],
             length_penalty=length_penalty,
             repetition_penalty=repetition_penalty,
             no_repeat_ngram_size=no_repeat_ngram_size,
             prefix=prefix,
+            stats=stats,
+            decoding=chunk_decoding,
+            prompt_lookup_num_tokens=prompt_lookup_num_tokens,
+            length_budget=chunk_plan["budget"],
         )
         chunk_summaries.append(s)
 
     merged = "\n".join(f"- {s}" for s in chunk_summaries if s)
 
     final = _summarize_one(
-        _MODEL,
-        _TOKENIZER,
+        model,
+        tokenizer,
         merged,
         num_beams=final_num_beams,
         max_input_length=max_input_length,
-        max_new_tokens=final_max_new_tokens,
-        min_new_tokens=final_min_new_tokens,
+        max_new_tokens=final_plan["max_new_tokens"],
+        min_new_tokens=final_plan["min_new_tokens"],
         length_penalty=length_penalty,
         repetition_penalty=repetition_penalty,
         no_repeat_ngram_size=no_repeat_ngram_size,
         prefix=prefix,
+        stats=stats,
+        decoding=final_decoding,
+        prompt_lookup_num_tokens=prompt_lookup_num_tokens,
+        length_budget=final_plan["budget"],
     )
 
     return final, chunk_summaries, merged
+
+
+def _generate_batch(
+    model,
+    tokenizer,
+    texts,
+    plans,
+    num_beams=2,
+    max_input_length=1024,
+    length_penalty=1.0,
+    repetition_penalty=1.1,
+    no_repeat_ngram_size=3,
+    prefix="summarize: ",
+    batch_size=8,
+    stats=None,
+):
+    outputs = [""] * len(texts)
+    # Grouping by budget keeps the shared max_new_tokens of a batch close to
+    # what each row would get on its own.
+    order = sorted(range(len(texts)), key=lambda i: plans[i]["budget"] or plans[i]["max_new_tokens"])
+    for start in range(0, len(order), batch_size):
+        batch = order[start : start + batch_size]
+        prompts = [(prefix + texts[i].strip()) if prefix else texts[i].strip() for i in batch]
+        batch_plans = [plans[i] for i in batch]
+
+        with stage("tokenize"):
+            enc = tokenizer(
+                prompts, truncation=True, max_length=max_input_length, padding=True, return_tensors="pt"
+            ).to(_get_device())
+
+        generate_kwargs = {
+            "num_beams": num_beams,
+            "max_new_tokens": max(plan["max_new_tokens"] for plan in batch_plans),
+            "min_new_tokens": min(plan["min_new_tokens"] for plan in batch_plans),
+            "repetition_penalty": repetition_penalty,
+            "no_repeat_ngram_size": no_repeat_ngram_size,
+            "use_cache": True,
+        }
+        if num_beams > 1:
+            generate_kwargs["early_stopping"] = True
+            generate_kwargs["length_penalty"] = length_penalty
+        budgets = [plan["budget"] for plan in batch_plans]
+        if any(budgets):
+            generate_kwargs["logits_processor"] = LogitsProcessorList(
+                [_LengthBudgetProcessor(budgets, _sentence_end_ids(tokenizer), tokenizer.eos_token_id, num_beams)]
+            )
+
+        slot_cost = num_beams * (enc["input_ids"].numel() + generate_kwargs["max_new_tokens"] * len(batch))
+        with inference_slot(slot_cost):
+            started = time.perf_counter()
+            with stage("generate"), torch_profile(), torch.no_grad():
+                out_ids = model.generate(**enc, **generate_kwargs)
+
+        if stats is not None:
+            pad_id = tokenizer.pad_token_id
+            generated = int((out_ids[:, 1:] != pad_id).sum()) if pad_id is not None else out_ids[:, 1:].numel()
+            _record_generate_stats(stats, generated, num_beams, time.perf_counter() - started)
+
+        with stage("detokenize"):
+            decoded = tokenizer.batch_decode(out_ids, skip_special_tokens=True)
+        for i, summary in zip(batch, decoded):
+            outputs[i] = summary.strip()
+    return outputs
+
+
+def summarize_batch(
+    texts: List[str],
+    batch_size=8,
+    chunk_size=850,
+    overlap=120,
+    num_beams=2,
+    length_penalty=1.0,
+    repetition_penalty=1.1,
+    no_repeat_ngram_size=3,
+    max_input_length=1024,
+    prefix="summarize: ",
+    length_ratio=0.3,
+    max_new_tokens_scale=1.0,
+    stats=None,
+    model_name=None,
+):
+    # Same chunk -> merge -> final pipeline as summarize_long_text, but the
+    # chunks of every document (and then every final pass) are generated in
+    # padded batches. Beam decoding only: the speculative modes are per-row.
+    model, tokenizer, _ = _load_model(model_name)
+    prefix_tok = (
+        len(tokenizer.encode(prefix, add_special_tokens=False)) if prefix else 0
+    )
+    settings = {
+        "num_beams": num_beams,
+        "max_input_length": max_input_length,
+        "length_penalty": length_penalty,
+        "repetition_penalty": repetition_penalty,
+        "no_repeat_ngram_size": no_repeat_ngram_size,
+        "prefix": prefix,
+        "batch_size": batch_size,
+        "stats": stats,
+    }
+
+    chunk_owner = []
+    chunk_texts = []
+    chunk_plans = []
+    final_plans = []
+    with stage("chunking"):
+        for doc_index, text in enumerate(texts):
+            ids = tokenizer.encode(text, add_special_tokens=False)
+            lengths = []
+            chunks = chunk_text_by_tokens(
+                tokenizer, text, chunk_size=chunk_size, overlap=overlap, prefix_tokens=prefix_tok, ids=ids, lengths=lengths
+            )
+            plan = plan_lengths(lengths, len(ids), length_ratio, max_new_tokens_scale)
+            chunk_owner.extend([doc_index] * len(chunks))
+            chunk_texts.extend(chunks)
+            chunk_plans.extend(plan["chunks"])
+            final_plans.append(plan["final"])
+
+    chunk_summaries = _generate_batch(model, tokenizer, chunk_texts, chunk_plans, **settings)
+
+    merged = [[] for _ in texts]
+    for doc_index, summary in zip(chunk_owner, chunk_summaries):
+        if summary:
+            merged[doc_index].append(f"- {summary}")
+
+    pending = [i for i, parts in enumerate(merged) if parts]
+    finals = _generate_batch(
+        model,
+        tokenizer,
+        ["\n".join(merged[i]) for i in pending],
+        [final_plans[i] for i in pending],
+        **settings,
+    )
+    results = [""] * len(texts)
+    for doc_index, summary in zip(pending, finals):
+        results[doc_index] = summary
+    return results
@@ -0,0 +1,124 @@
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from threading import Lock
+from typing import Any, Dict, Optional
+
+from length_plan import target_tokens
+
+ADAPTIVE_P95_TARGET_SEC = float(os.getenv("ADAPTIVE_P95_TARGET_SEC", "20"))
+ADAPTIVE_WINDOW = int(os.getenv("ADAPTIVE_WINDOW", "200"))
+
+# Rough chars-per-token for mT5 on Persian text; only used for estimates.
+CHARS_PER_TOKEN = float(os.getenv("ADAPTIVE_CHARS_PER_TOKEN", "3.5"))
+
+# Degradation steps, applied in order until the predicted latency fits the target.
+_MAX_NEW_TOKENS_SCALE = 0.6
+_PREFILTER_RATIO = 0.5
+
+
+def _percentile(values, q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    k = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+    return ordered[k]
+
+
+def estimate_decode_tokens(num_chars: int, length_ratio: float) -> int:
+    input_tokens = num_chars / CHARS_PER_TOKEN
+    target_total = target_tokens(int(input_tokens), length_ratio)
+    # Chunk summaries plus the final reduce pass, which is roughly the same size.
+    return target_total * 2
+
+
+class AdaptiveController:
+    def __init__(self, target_p95_sec: float, window: int = 200):
+        self.target_p95_sec = target_p95_sec
+        self._unit_latencies = deque(maxlen=window)
+        self._request_latencies = deque(maxlen=window)
+        self._inflight = 0
+        self._lock = Lock()
+
+    def record_generation(self, stats: Dict[str, Any]) -> None:
+        beam_tokens = stats.get("beam_tokens", 0)
+        generate_sec = stats.get("generate_sec", 0.0)
+        if beam_tokens <= 0 or generate_sec <= 0:
+            return
+        with self._lock:
+            self._unit_latencies.append(generate_sec / beam_tokens)
+
+    @contextmanager
+    def track(self):
+        with self._lock:
+            self._inflight += 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._inflight -= 1
+                self._request_latencies.append(elapsed)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            unit = list(self._unit_latencies)
+            requests = list(self._request_latencies)
+            inflight = self._inflight
+        return {
+            "p95_sec_per_beam_token": _percentile(unit, 0.95),
+            "p95_request_sec": _percentile(requests, 0.95),
+            "inflight": inflight,
+            "samples": len(unit),
+        }
+
+    def plan(self, num_beams: int, num_chars: int, length_ratio: float) -> Dict[str, Any]:
+        snap = self.snapshot()
+        # Measured while other requests were generating, so the current
+        # contention is already in it; inflight is reported, not applied.
+        unit = snap["p95_sec_per_beam_token"]
+
+        plan = {
+            "level": 0,
+            "num_beams": num_beams,
+            "max_new_tokens_scale": 1.0,
+            "prefilter_ratio": None,
+            "predicted_sec": None,
+            "target_p95_sec": self.target_p95_sec,
+            "inflight": snap["inflight"],
+            "p95_sec_per_beam_token": unit,
+        }
+        if unit is None or self.target_p95_sec <= 0:
+            return plan
+
+        def predict() -> float:
+            chars = num_chars * (plan["prefilter_ratio"] or 1.0)
+            tokens = estimate_decode_tokens(int(chars), length_ratio) * plan["max_new_tokens_scale"]
+            return unit * tokens * plan["num_beams"]
+
+        predicted = predict()
+        steps = (
+            ("num_beams", 1),
+            ("max_new_tokens_scale", _MAX_NEW_TOKENS_SCALE),
+            ("prefilter_ratio", _PREFILTER_RATIO),
+        )
+        for key, value in steps:
+            if predicted <= self.target_p95_sec:
+                break
+            if plan[key] == value:
+                continue
+            plan[key] = value
+            plan["level"] += 1
+            predicted = predict()
+
+        plan["predicted_sec"] = round(predicted, 3)
+        return plan
+
+
+_CONTROLLER = AdaptiveController(ADAPTIVE_P95_TARGET_SEC, window=ADAPTIVE_WINDOW)
+
+
+def get_controller() -> AdaptiveController:
+    return _CONTROLLER
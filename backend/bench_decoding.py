@@ -0,0 +1,101 @@
+import argparse
+import json
+import os
+import time
+from typing import Any, Dict, List
+
+from abstractive import DECODING_MODES, draft_model_configured, summarize_long_text
+from evaluation import _clean_dataset_text, _read_test_rows
+from metrics import get_rouge_engine
+
+
+def _load_samples(dataset_path: str, max_samples: int) -> List[Dict[str, str]]:
+    samples = []
+    for row in _read_test_rows(dataset_path):
+        article = _clean_dataset_text(row.get("article", ""))
+        reference = _clean_dataset_text(row.get("summary", ""))
+        if article and reference:
+            samples.append({"article": article, "reference": reference})
+        if len(samples) >= max_samples:
+            break
+    return samples
+
+
+def run_mode(
+    samples: List[Dict[str, str]],
+    decoding: str,
+    scope: str,
+    num_beams: int,
+    length_ratio: float,
+) -> Dict[str, Any]:
+    engine = get_rouge_engine()
+    stats: Dict[str, Any] = {}
+    totals = {"rouge1_f1": 0.0, "rouge2_f1": 0.0, "rougeL_f1": 0.0}
+    started = time.perf_counter()
+
+    for sample in samples:
+        final_summary, _, _ = summarize_long_text(
+            sample["article"],
+            length_ratio=length_ratio,
+            chunk_num_beams=num_beams,
+            final_num_beams=num_beams,
+            stats=stats,
+            chunk_decoding=decoding if scope == "all" else "beam",
+            final_decoding=decoding,
+        )
+        scores = engine.score(sample["reference"], _clean_dataset_text(final_summary))
+        totals["rouge1_f1"] += scores["rouge1"][2]
+        totals["rouge2_f1"] += scores["rouge2"][2]
+        totals["rougeL_f1"] += scores["rougeL"][2]
+
+    elapsed = time.perf_counter() - started
+    count = max(1, len(samples))
+    generate_sec = stats.get("generate_sec", 0.0)
+    return {
+        "decoding": decoding,
+        "scope": scope,
+        "samples": len(samples),
+        "wall_sec": round(elapsed, 3),
+        "generate_sec": round(generate_sec, 3),
+        "generated_tokens": stats.get("generated_tokens", 0),
+        "tokens_per_sec": round(stats.get("generated_tokens", 0) / generate_sec, 2) if generate_sec else None,
+        **{key: round(value / count, 6) for key, value in totals.items()},
+    }
+
+
+def main() -> None:
+    default_dataset = os.path.join(os.path.dirname(__file__), "dataset", "test.csv")
+    parser = argparse.ArgumentParser(
+        description="Compare decoding modes on tokens/sec and ROUGE over the test set."
+    )
+    parser.add_argument("--dataset", default=os.getenv("TEST_DATASET_PATH", default_dataset))
+    parser.add_argument("--max-samples", type=int, default=30)
+    parser.add_argument("--num-beams", type=int, default=2)
+    parser.add_argument("--length-ratio", type=float, default=0.3)
+    parser.add_argument("--scope", choices=["final", "all"], default="final")
+    parser.add_argument("--modes", nargs="+", choices=DECODING_MODES, default=list(DECODING_MODES))
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    modes = [m for m in args.modes if m != "assisted" or draft_model_configured()]
+    samples = _load_samples(args.dataset, args.max_samples)
+
+    results = [
+        run_mode(samples, mode, args.scope, args.num_beams, args.length_ratio)
+        for mode in modes
+    ]
+
+    baseline = next((r for r in results if r["decoding"] == "beam"), None)
+    for result in results:
+        if baseline and baseline["tokens_per_sec"] and result["tokens_per_sec"]:
+            result["speedup_vs_beam"] = round(result["tokens_per_sec"] / baseline["tokens_per_sec"], 3)
+            result["rougeL_delta_vs_beam"] = round(result["rougeL_f1"] - baseline["rougeL_f1"], 6)
+        print(json.dumps(result, ensure_ascii=False))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
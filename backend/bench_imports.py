@@ -0,0 +1,95 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, List
+
+from runtime_config import SERVING_PROFILES
+
+HEAVY_MODULES = ("torch", "transformers", "pyarrow")
+
+# Runs in a fresh interpreter per measurement so nothing is cached.
+_PROBE = """
+import json, resource, sys, time
+started = time.perf_counter()
+import main
+elapsed = time.perf_counter() - started
+print(json.dumps({
+    "import_sec": elapsed,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "loaded": [name for name in %r if name in sys.modules],
+}))
+"""
+
+
+def _run_probe(profile: str, importtime: bool = False) -> subprocess.CompletedProcess:
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += ["-c", _PROBE % (HEAVY_MODULES,)]
+    env = dict(os.environ, SERVING_PROFILE=profile, PYTHONDONTWRITEBYTECODE="1")
+    return subprocess.run(
+        command,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def _slowest_imports(stderr: str, top: int) -> List[Dict[str, Any]]:
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:") :].split("|")
+        # Indentation is two spaces per nesting level; keep what main itself
+        # imports, deeper imports are already in their parent's cumulative time.
+        level = (len(name) - len(name.lstrip()) - 1) // 2
+        if level == 1:
+            rows.append({"module": name.strip(), "cumulative_ms": round(int(cumulative_us) / 1000, 1)})
+    return sorted(rows, key=lambda row: -row["cumulative_ms"])[:top]
+
+
+def bench_profile(profile: str, repeat: int = 5, top: int = 10) -> Dict[str, Any]:
+    runs = [json.loads(_run_probe(profile).stdout.strip().splitlines()[-1]) for _ in range(repeat)]
+    traced = _run_probe(profile, importtime=True)
+    return {
+        "profile": profile,
+        "import_sec_median": round(statistics.median(run["import_sec"] for run in runs), 3),
+        "import_sec_min": round(min(run["import_sec"] for run in runs), 3),
+        "max_rss_mb": round(statistics.median(run["max_rss_mb"] for run in runs), 1),
+        "heavy_modules_loaded": runs[-1]["loaded"],
+        "slowest_imports": _slowest_imports(traced.stderr, top),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure cold import time and RSS of the API per serving profile.")
+    parser.add_argument("--profiles", nargs="+", choices=SERVING_PROFILES, default=list(SERVING_PROFILES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="Slowest top-level imports to list")
+    parser.add_argument("--output", help="Write the JSON report to this path")
+    args = parser.parse_args()
+
+    report = []
+    for profile in args.profiles:
+        result = bench_profile(profile, repeat=args.repeat, top=args.top)
+        report.append(result)
+        print(
+            f"{profile:<11} import={result['import_sec_median']:.3f}s "
+            f"rss={result['max_rss_mb']:.0f}MB heavy={','.join(result['heavy_modules_loaded']) or '-'}"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    else:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import argparse
+import json
+import os
+import time
+from typing import Any, Dict, List, Set
+
+from evaluation import _clean_dataset_text, _read_test_rows
+from preprocessing import sentence_tokenize
+
+
+def _boundaries(sentences: List[str]) -> Set[int]:
+    # The two segmenters normalize differently (spacing, ZWNJ fixes), so
+    # boundaries are compared as counts of alphanumeric characters seen.
+    boundaries = set()
+    position = 0
+    for sentence in sentences[:-1]:
+        position += sum(1 for ch in sentence if ch.isalnum())
+        boundaries.add(position)
+    return boundaries
+
+
+def _time_segmenter(texts: List[str], segmenter: str, repeat: int):
+    outputs = [sentence_tokenize(text, segmenter=segmenter) for text in texts]
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            sentence_tokenize(text, segmenter=segmenter)
+    return outputs, (time.perf_counter() - started) / repeat
+
+
+def compare(texts: List[str], repeat: int = 3) -> Dict[str, Any]:
+    hazm_out, hazm_sec = _time_segmenter(texts, "hazm", repeat)
+    fast_out, fast_sec = _time_segmenter(texts, "fast", repeat)
+
+    exact = 0
+    same_count = 0
+    tp = fp = fn = 0
+    for hazm_sents, fast_sents in zip(hazm_out, fast_out):
+        reference = _boundaries(hazm_sents)
+        predicted = _boundaries(fast_sents)
+        tp += len(reference & predicted)
+        fp += len(predicted - reference)
+        fn += len(reference - predicted)
+        same_count += len(hazm_sents) == len(fast_sents)
+        exact += reference == predicted
+
+    precision = tp / (tp + fp) if tp + fp else 1.0
+    recall = tp / (tp + fn) if tp + fn else 1.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    count = max(1, len(texts))
+    return {
+        "documents": len(texts),
+        "hazm_sentences": sum(len(s) for s in hazm_out),
+        "fast_sentences": sum(len(s) for s in fast_out),
+        "document_agreement": round(exact / count, 4),
+        "sentence_count_agreement": round(same_count / count, 4),
+        "boundary_precision": round(precision, 4),
+        "boundary_recall": round(recall, 4),
+        "boundary_f1": round(f1, 4),
+        "hazm_sec": round(hazm_sec, 4),
+        "fast_sec": round(fast_sec, 4),
+        "speedup": round(hazm_sec / fast_sec, 2) if fast_sec else None,
+    }
+
+
+def main() -> None:
+    default_dataset = os.path.join(os.path.dirname(__file__), "dataset", "test.csv")
+    parser = argparse.ArgumentParser(
+        description="Compare the fast regex segmenter with hazm on agreement and speed."
+    )
+    parser.add_argument("--dataset", default=os.getenv("TEST_DATASET_PATH", default_dataset))
+    parser.add_argument("--max-samples", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    texts = [_clean_dataset_text(row.get("article", "")) for row in _read_test_rows(args.dataset)[: args.max_samples]]
+    texts = [text for text in texts if text]
+    print(json.dumps(compare(texts, repeat=args.repeat), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
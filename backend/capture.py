@@ -0,0 +1,110 @@
+import glob
+import hashlib
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import threading
+from typing import Any, Dict, List, Mapping, Optional
+
+from guard import count_sentences
+
+# off: nothing is recorded; shape: settings and sizes; hash: plus a SHA-256
+# of the text; full: plus the text itself.
+CAPTURE_MODES = ("off", "shape", "hash", "full")
+CAPTURE_MODE = os.getenv("CAPTURE_MODE", "off")
+if CAPTURE_MODE not in CAPTURE_MODES:
+    raise ValueError(f"CAPTURE_MODE must be one of {', '.join(CAPTURE_MODES)}")
+CAPTURE_PATH = os.getenv("CAPTURE_PATH", os.path.join(os.path.dirname(__file__), "captures", "traffic.jsonl"))
+CAPTURE_MAX_BYTES = int(os.getenv("CAPTURE_MAX_BYTES", str(64 * 1024 * 1024)))
+CAPTURE_BACKUPS = int(os.getenv("CAPTURE_BACKUPS", "5"))
+CAPTURE_SAMPLE_RATE = float(os.getenv("CAPTURE_SAMPLE_RATE", "1.0"))
+CAPTURE_PATHS = ("/api/summarize", "/api/summarize/upload")
+REPLAY_HEADER = "x-replay"
+
+_LOGGER: Optional[logging.Logger] = None
+_LISTENER: Optional[logging.handlers.QueueListener] = None
+_LOCK = threading.Lock()
+
+
+def capture_enabled() -> bool:
+    return CAPTURE_MODE != "off"
+
+
+def should_capture(path: str, headers: Optional[Mapping[str, str]] = None) -> bool:
+    # Replayed traffic is marked so it never ends up in the next capture.
+    if headers is not None and REPLAY_HEADER in headers:
+        return False
+    return capture_enabled() and path in CAPTURE_PATHS and random.random() < CAPTURE_SAMPLE_RATE
+
+
+def request_shape(settings: Dict[str, Any], text: str, sentences: Optional[List[str]] = None, mode: Optional[str] = None) -> Dict[str, Any]:
+    mode = mode or CAPTURE_MODE
+    shape = {key: value for key, value in settings.items() if key != "text"}
+    shape["text_chars"] = len(text)
+    shape["text_sentences"] = len(sentences) if sentences is not None else count_sentences(text)
+    if mode in ("hash", "full"):
+        shape["text_sha256"] = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    if mode == "full":
+        shape["text"] = text
+    return shape
+
+
+def _get_logger() -> logging.Logger:
+    # Lines go through a queue so the event loop never waits on the disk.
+    global _LOGGER, _LISTENER
+    with _LOCK:
+        if _LOGGER is None:
+            os.makedirs(os.path.dirname(CAPTURE_PATH) or ".", exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(
+                CAPTURE_PATH, maxBytes=CAPTURE_MAX_BYTES, backupCount=CAPTURE_BACKUPS, encoding="utf-8"
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            records: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+            _LISTENER = logging.handlers.QueueListener(records, handler)
+            _LISTENER.start()
+            logger = logging.getLogger("summarizer.capture")
+            logger.propagate = False
+            logger.setLevel(logging.INFO)
+            logger.addHandler(logging.handlers.QueueHandler(records))
+            _LOGGER = logger
+        return _LOGGER
+
+
+def write_record(record: Dict[str, Any]) -> None:
+    _get_logger().info(json.dumps(record, ensure_ascii=False))
+
+
+def stop_capture() -> None:
+    global _LISTENER
+    with _LOCK:
+        if _LISTENER is not None:
+            _LISTENER.stop()
+            _LISTENER = None
+
+
+def capture_files(path: str) -> List[str]:
+    # Rotated files are path.N (oldest has the highest N), then path itself.
+    if os.path.isdir(path):
+        path = os.path.join(path, os.path.basename(CAPTURE_PATH))
+    rotated = [name for name in glob.glob(f"{glob.escape(path)}.*") if name.rsplit(".", 1)[-1].isdigit()]
+    rotated.sort(key=lambda name: int(name.rsplit(".", 1)[-1]), reverse=True)
+    return rotated + ([path] if os.path.exists(path) else [])
+
+
+def read_capture(paths: List[str]) -> List[Dict[str, Any]]:
+    records = []
+    for path in paths:
+        for name in capture_files(path):
+            with open(name, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        try:
+                            records.append(json.loads(line))
+                        except json.JSONDecodeError:
+                            continue
+    records.sort(key=lambda record: record.get("ts", 0.0))
+    return records
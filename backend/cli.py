@@ -0,0 +1,356 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from multiprocessing import Pool
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, TextIO, Tuple
+
+from extractive import textrank_summarize
+from pipelines import DEFAULT_LANGUAGE, get_pipeline, resolve_language
+
+logger = logging.getLogger("summarizer.cli")
+
+CLI_WORKERS = int(os.getenv("CLI_WORKERS", str(os.cpu_count() or 1)))
+CLI_BATCH_SIZE = int(os.getenv("CLI_BATCH_SIZE", "8"))
+PROGRESS_INTERVAL_SEC = 5.0
+
+Document = Tuple[str, str]
+
+
+def _iter_jsonl(stream: TextIO, source: str, text_field: str, id_field: str) -> Iterator[Document]:
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            logger.warning("Skipping invalid JSON at %s:%d", source, line_number)
+            continue
+        text = record.get(text_field)
+        if not isinstance(text, str):
+            logger.warning("Skipping %s:%d without a %r field", source, line_number, text_field)
+            continue
+        yield str(record.get(id_field) or f"{source}:{line_number}"), text
+
+
+def _read_file(path: str) -> Optional[str]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+    except (OSError, UnicodeDecodeError) as e:
+        logger.warning("Skipping %s: %s", path, e)
+        return None
+
+
+def iter_documents(
+    inputs: Iterable[str],
+    pattern: str = ".txt",
+    text_field: str = "text",
+    id_field: str = "id",
+    stdin: Optional[TextIO] = None,
+) -> Iterator[Document]:
+    for source in inputs:
+        if source == "-":
+            stream = stdin or sys.stdin
+            yield from _iter_jsonl(stream, "stdin", text_field, id_field)
+        elif os.path.isdir(source):
+            for root, dirs, files in os.walk(source):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.endswith(pattern):
+                        path = os.path.join(root, name)
+                        text = _read_file(path)
+                        if text is not None:
+                            yield path, text
+        elif source.endswith(".jsonl"):
+            with open(source, "r", encoding="utf-8") as f:
+                yield from _iter_jsonl(f, source, text_field, id_field)
+        else:
+            text = _read_file(source)
+            if text is not None:
+                yield source, text
+
+
+def completed_ids(output_path: str) -> Set[str]:
+    # A crash can leave a truncated last line; it is cut off so the
+    # document is redone and the file stays valid JSONL.
+    done: Set[str] = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, "rb+") as f:
+        data = f.read()
+        end = data.rfind(b"\n") + 1
+        if end < len(data):
+            f.truncate(end)
+    for line in data[:end].decode("utf-8").splitlines():
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if "error" not in record:
+            done.add(record["id"])
+    return done
+
+
+def _extractive_job(job: Tuple[str, str, Dict[str, Any]]) -> Dict[str, Any]:
+    doc_id, text, options = job
+    started = time.perf_counter()
+    try:
+        lang = resolve_language(options["lang"], text)
+        result = textrank_summarize(
+            text,
+            summary_ratio=options["ratio"],
+            lang=lang,
+            segmenter=options["segmenter"],
+            num_keywords=options["keywords"],
+        )
+    except Exception as e:
+        return {"id": doc_id, "error": str(e)}
+    record = {
+        "id": doc_id,
+        "method": "extractive",
+        "lang": lang,
+        "summary": result["summary"],
+        "original_length_chars": len(text),
+        "original_length_sentences": result["num_original_sentences"],
+        "summary_length_sentences": result["num_summary_sentences"],
+        "latency_sec": round(time.perf_counter() - started, 4),
+    }
+    if "keywords" in result:
+        record["keywords"] = result["keywords"]
+    return record
+
+
+def _batches(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _abstractive_records(
+    documents: Iterable[Document],
+    method: str,
+    options: Dict[str, Any],
+    batch_size: int,
+    extractive: Iterable[Dict[str, Any]],
+) -> Iterator[Dict[str, Any]]:
+    from abstractive import summarize_batch
+
+    inputs = extractive if method == "hybrid" else (
+        {"id": doc_id, "summary": text, "original_length_chars": len(text)} for doc_id, text in documents
+    )
+    for batch in _batches(inputs, batch_size):
+        started = time.perf_counter()
+        by_lang: Dict[str, List[int]] = {}
+        for position, item in enumerate(batch):
+            if "error" not in item:
+                item["lang"] = item.get("lang") or resolve_language(options["lang"], item["summary"])
+                by_lang.setdefault(item["lang"], []).append(position)
+
+        summaries: Dict[int, str] = {}
+        errors: Dict[int, str] = {}
+        for lang, positions in by_lang.items():
+            settings = get_pipeline(lang).abstractive_settings()
+            try:
+                outputs = summarize_batch(
+                    [batch[p]["summary"] for p in positions],
+                    batch_size=batch_size,
+                    chunk_size=settings["chunk_size"],
+                    overlap=settings["overlap"],
+                    prefix=settings["prefix"],
+                    max_input_length=settings["max_input_length"],
+                    model_name=settings["model_name"],
+                    num_beams=options["num_beams"],
+                    length_ratio=options["abstractive_ratio"],
+                )
+            except Exception as e:
+                errors.update((p, str(e)) for p in positions)
+                continue
+            summaries.update(zip(positions, outputs))
+
+        latency = round((time.perf_counter() - started) / len(batch), 4)
+        for position, item in enumerate(batch):
+            if "error" in item or position in errors:
+                yield {"id": item["id"], "error": item.get("error") or errors[position]}
+                continue
+            # Same fields as extractive records, counted like the API does.
+            pipeline = get_pipeline(item["lang"])
+            if method == "hybrid":
+                original_sentences = item["original_length_sentences"]
+            else:
+                original_sentences = len(pipeline.sentences(item["summary"], segmenter=options["segmenter"]))
+            record = {
+                "id": item["id"],
+                "method": method,
+                "lang": item["lang"],
+                "summary": summaries[position],
+                "original_length_chars": item["original_length_chars"],
+                "original_length_sentences": original_sentences,
+                "summary_length_sentences": len(pipeline.sentences(summaries[position], segmenter=options["segmenter"])),
+                "latency_sec": latency,
+            }
+            if method == "hybrid":
+                record["extractive_summary"] = item["summary"]
+                record["latency_sec"] = round(latency + item["latency_sec"], 4)
+            yield record
+
+
+class _Progress:
+    def __init__(self, stream: TextIO, interval: float = PROGRESS_INTERVAL_SEC):
+        self.stream = stream
+        self.interval = interval
+        self.started = time.perf_counter()
+        self.last_report = self.started
+        self.processed = 0
+        self.errors = 0
+        self.input_chars = 0
+
+    def update(self, record: Dict[str, Any]) -> None:
+        self.processed += 1
+        if "error" in record:
+            self.errors += 1
+        else:
+            self.input_chars += record.get("original_length_chars", 0)
+        now = time.perf_counter()
+        if now - self.last_report >= self.interval:
+            self.last_report = now
+            elapsed = now - self.started
+            print(
+                f"[summarizer] {self.processed} docs, {self.errors} errors, "
+                f"{self.processed / elapsed:.1f} docs/s",
+                file=self.stream,
+                flush=True,
+            )
+
+    def summary(self, skipped: int) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - self.started
+        return {
+            "processed": self.processed,
+            "errors": self.errors,
+            "resumed_skipped": skipped,
+            "elapsed_sec": round(elapsed, 2),
+            "docs_per_sec": round(self.processed / elapsed, 2) if elapsed else 0.0,
+            "chars_per_sec": round(self.input_chars / elapsed, 1) if elapsed else 0.0,
+        }
+
+
+def run(
+    inputs: List[str],
+    output: str = "-",
+    method: str = "extractive",
+    length: int = 30,
+    extractive_length: Optional[int] = None,
+    abstractive_length: Optional[int] = None,
+    lang: str = DEFAULT_LANGUAGE,
+    segmenter: str = "hazm",
+    keywords: int = 0,
+    num_beams: int = 2,
+    workers: int = CLI_WORKERS,
+    batch_size: int = CLI_BATCH_SIZE,
+    resume: bool = False,
+    pattern: str = ".txt",
+    text_field: str = "text",
+    id_field: str = "id",
+    stdin: Optional[TextIO] = None,
+    progress_stream: Optional[TextIO] = None,
+) -> Dict[str, Any]:
+    done = completed_ids(output) if resume and output != "-" else set()
+    skipped = 0
+
+    def _pending() -> Iterator[Document]:
+        nonlocal skipped
+        for doc_id, text in iter_documents(inputs, pattern, text_field, id_field, stdin=stdin):
+            if doc_id in done:
+                skipped += 1
+                continue
+            yield doc_id, text
+
+    options = {
+        "ratio": max(0.05, min(0.9, (extractive_length or length) / 100)),
+        "abstractive_ratio": max(0.1, min(0.9, (abstractive_length or length) / 100)),
+        "lang": lang,
+        "segmenter": segmenter,
+        "keywords": keywords,
+        "num_beams": num_beams,
+    }
+    progress = _Progress(progress_stream or sys.stderr)
+    out = sys.stdout if output == "-" else open(output, "a" if resume else "w", encoding="utf-8")
+    pool = Pool(workers) if workers > 1 and method != "abstractive" else None
+    try:
+        jobs = ((doc_id, text, options) for doc_id, text in _pending())
+        extractive = iter(())
+        if method != "abstractive":
+            extractive = pool.imap(_extractive_job, jobs, chunksize=4) if pool else map(_extractive_job, jobs)
+        records = extractive if method == "extractive" else _abstractive_records(
+            _pending(), method, options, batch_size, extractive
+        )
+        for record in records:
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            progress.update(record)
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+        if out is not sys.stdout:
+            out.close()
+    return progress.summary(skipped)
+
+
+def main() -> None:
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
+    parser = argparse.ArgumentParser(
+        prog="summarizer",
+        description="Summarize files, directories, JSONL or stdin in bulk and write JSONL results.",
+    )
+    parser.add_argument("inputs", nargs="+", help="Files, directories, .jsonl files or - for JSONL on stdin")
+    parser.add_argument("-o", "--output", default="-", help="Output JSONL file (default: stdout)")
+    parser.add_argument("--method", choices=["extractive", "abstractive", "hybrid"], default="extractive")
+    parser.add_argument("--length", type=int, default=30, help="Summary length percentage")
+    parser.add_argument("--extractive-length", type=int)
+    parser.add_argument("--abstractive-length", type=int)
+    parser.add_argument(
+        "--lang", choices=["auto", "fa", "en"], default=DEFAULT_LANGUAGE, help="auto detects each document's script"
+    )
+    parser.add_argument("--segmenter", choices=["hazm", "fast"], default="hazm")
+    parser.add_argument("--keywords", type=int, default=0, help="Keywords per document (extractive/hybrid)")
+    parser.add_argument("--num-beams", type=int, default=2)
+    parser.add_argument("--workers", type=int, default=CLI_WORKERS, help="Processes for the TextRank step")
+    parser.add_argument("--batch-size", type=int, default=CLI_BATCH_SIZE, help="Documents per generate() batch")
+    parser.add_argument("--resume", action="store_true", help="Skip ids already present in --output and append")
+    parser.add_argument("--pattern", default=".txt", help="File suffix matched inside directories")
+    parser.add_argument("--text-field", default="text")
+    parser.add_argument("--id-field", default="id")
+    args = parser.parse_args()
+
+    summary = run(
+        args.inputs,
+        output=args.output,
+        method=args.method,
+        length=args.length,
+        extractive_length=args.extractive_length,
+        abstractive_length=args.abstractive_length,
+        lang=args.lang,
+        segmenter=args.segmenter,
+        keywords=args.keywords,
+        num_beams=args.num_beams,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        resume=args.resume,
+        pattern=args.pattern,
+        text_field=args.text_field,
+        id_field=args.id_field,
+    )
+    print(json.dumps(summary, ensure_ascii=False), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
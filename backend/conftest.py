@@ -0,0 +1,71 @@
+import csv
+import os
+import random
+
+
+# Shared by the evaluation, shard and sweep tests. The Arabic ي/ك, "!", "؟"
+# and the Persian digit go through normalization and both segmenters.
+articles = [
+    "هوش مصنوعی يكی از مهم‌ترین فناوری‌های قرن است. این فناوری در پزشکی و آموزش تحول ایجاد کرده است! "
+    "دولت‌ها قوانین جدید برای نظارت بر هوش مصنوعی تدوین می‌کنند. محققان بر شفافیت الگوریتم‌ها تأکید دارند.",
+    "تیم ملی فوتبال در بازی دیروز پیروز شد. هواداران در خیابان‌ها جشن گرفتند؟ "
+    "مربی تیم از عملکرد بازیکنان جوان تمجید کرد. بازی بعدی هفته آینده است.",
+    "قیمت طلا در بازار امروز ۲ درصد افزایش یافت. کارشناسان علت را نوسان ارز می‌دانند. "
+    "پیش‌بینی می‌شود روند افزایشی ادامه داشته باشد. خریداران منتظر کاهش قیمت هستند.",
+]
+
+
+def write_dataset(directory, rows=None, texts=articles, blank_rows=()):
+    """Writes test.tsv with `rows` rows cycling through texts (one pass by
+    default); each reference is the article's first sentence and the
+    articles of blank_rows are left empty."""
+    path = os.path.join(directory, "test.tsv")
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, delimiter="\t")
+        writer.writerow(["id", "article", "summary"])
+        for i in range(len(texts) if rows is None else rows):
+            article = texts[i % len(texts)]
+            writer.writerow([f"r{i}", "" if i in blank_rows else article, article.split(".")[0]])
+    return path
+
+
+farsi_words = ["هوش", "مصنوعی", "فناوری", "پزشکی", "آموزش", "دولت", "قانون", "محققان", "شفافیت", "الگوریتم"]
+
+
+def train_sentencepiece(directory, vocab_size=36, vocabularies=(farsi_words,), lines=500):
+    """Trains spiece.model on random ten-word lines, alternating between
+    vocabularies, with mT5's special ids (pad 0, eos 1, unk 2)."""
+    import sentencepiece as spm
+
+    random.seed(0)
+    text = [" ".join(random.choices(vocabularies[i % len(vocabularies)], k=10)) + "." for i in range(lines)]
+    with open(os.path.join(directory, "train.txt"), "w", encoding="utf-8") as f:
+        f.write("\n".join(text))
+    spm.SentencePieceTrainer.train(
+        input=os.path.join(directory, "train.txt"),
+        model_prefix=os.path.join(directory, "spiece"),
+        vocab_size=vocab_size,
+        pad_id=0,
+        eos_id=1,
+        unk_id=2,
+        bos_id=-1,
+        minloglevel=2,
+    )
+    return os.path.join(directory, "spiece.model")
+
+
+def tiny_mt5(directory, vocab_size=36, vocabularies=(farsi_words,), lines=500, **config):
+    """A randomly initialized MT5 and a slow T5Tokenizer over
+    train_sentencepiece; config overrides the layer sizes."""
+    import torch
+    from transformers import MT5Config, MT5ForConditionalGeneration, T5Tokenizer
+
+    model_file = train_sentencepiece(directory, vocab_size, vocabularies, lines)
+    tokenizer = T5Tokenizer(model_file, extra_ids=0, legacy=False)
+    torch.manual_seed(0)
+    sizes = dict(d_model=32, d_ff=64, d_kv=8, num_heads=4, num_layers=2)
+    sizes.update(config)
+    model_config = MT5Config(
+        vocab_size=len(tokenizer), decoder_start_token_id=0, pad_token_id=0, eos_token_id=1, **sizes
+    )
+    return MT5ForConditionalGeneration(model_config).eval(), tokenizer
@@ -0,0 +1,232 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger("summarizer.corpus")
+
+CORPUS_FORMAT_VERSION = 1
+_STRING_COLUMNS = ("ids", "articles", "references", "normalized", "sentences")
+
+
+def default_corpus_dir(dataset_path: str) -> str:
+    return os.getenv("EVAL_CORPUS_DIR") or f"{os.path.splitext(dataset_path)[0]}.corpus"
+
+
+def dataset_fingerprint(dataset_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(dataset_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _pack_strings(values: Iterable[str]) -> Tuple[np.ndarray, np.ndarray]:
+    encoded = [value.encode("utf-8") for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(value) for value in encoded])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def _pack_arrays(values: Iterable[List[int]]) -> Tuple[np.ndarray, np.ndarray]:
+    values = list(values)
+    offsets = np.zeros(len(values) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(value) for value in values])
+    flat = np.fromiter((item for value in values for item in value), dtype=np.int32, count=int(offsets[-1]))
+    return flat, offsets
+
+
+def _save(output_dir: str, name: str, data: np.ndarray, offsets: np.ndarray) -> None:
+    np.save(os.path.join(output_dir, f"{name}.npy"), data)
+    np.save(os.path.join(output_dir, f"{name}.offsets.npy"), offsets)
+
+
+def compile_corpus(
+    dataset_path: str,
+    output_dir: Optional[str] = None,
+    segmenter: str = "hazm",
+    model_tokens: bool = True,
+) -> Dict[str, Any]:
+    from evaluation import _clean_dataset_text, _read_test_rows
+    from metrics import tokenize
+    from preprocessing import normalize_text_language, sentence_tokenize
+
+    output_dir = output_dir or default_corpus_dir(dataset_path)
+    os.makedirs(output_dir, exist_ok=True)
+    started = time.perf_counter()
+
+    rows = _read_test_rows(dataset_path)
+    columns: Dict[str, List[str]] = {name: [] for name in _STRING_COLUMNS}
+    doc_sentences: List[int] = []
+    reference_tokens: List[List[str]] = []
+
+    for row in rows:
+        article = _clean_dataset_text(row.get("article", ""))
+        reference = _clean_dataset_text(row.get("summary", ""))
+        # Same normalization/splitting textrank_summarize performs.
+        normalized = (
+            normalize_text_language(article, remove_punct=False, replace_halfspace=False, segmenter=segmenter)
+            if article
+            else ""
+        )
+        sentences = sentence_tokenize(normalized, segmenter=segmenter) if normalized else []
+
+        columns["ids"].append(row.get("id", ""))
+        columns["articles"].append(article)
+        columns["references"].append(reference)
+        columns["normalized"].append(normalized)
+        columns["sentences"].extend(sentences)
+        doc_sentences.append(len(sentences))
+        reference_tokens.append(tokenize(reference))
+
+    for name, values in columns.items():
+        _save(output_dir, name, *_pack_strings(values))
+
+    sentence_index = np.zeros(len(doc_sentences) + 1, dtype=np.int64)
+    sentence_index[1:] = np.cumsum(doc_sentences)
+    np.save(os.path.join(output_dir, "doc_sentences.npy"), sentence_index)
+
+    vocab: Dict[str, int] = {}
+    reference_ids = [[vocab.setdefault(token, len(vocab)) for token in tokens] for tokens in reference_tokens]
+    _save(output_dir, "reference_tokens", *_pack_arrays(reference_ids))
+    with open(os.path.join(output_dir, "vocab.json"), "w", encoding="utf-8") as f:
+        json.dump(list(vocab), f, ensure_ascii=False)
+
+    tokenizer_name = None
+    if model_tokens:
+        from abstractive import get_tokenizer, tokenizer_fingerprint
+
+        tokenizer = get_tokenizer()
+        tokenizer_name = tokenizer_fingerprint()
+        _save(
+            output_dir,
+            "token_ids",
+            *_pack_arrays(tokenizer.encode(article, add_special_tokens=False) for article in columns["articles"]),
+        )
+
+    meta = {
+        "format_version": CORPUS_FORMAT_VERSION,
+        "dataset": os.path.basename(dataset_path),
+        "fingerprint": dataset_fingerprint(dataset_path),
+        "segmenter": segmenter,
+        "tokenizer": tokenizer_name,
+        "rows": len(rows),
+        "sentences": int(sentence_index[-1]),
+        "compile_sec": round(time.perf_counter() - started, 2),
+    }
+    with open(os.path.join(output_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    return meta
+
+
+class _StringColumn:
+    def __init__(self, data: np.ndarray, offsets: np.ndarray):
+        self.data = data
+        self.offsets = offsets
+
+    def __getitem__(self, index: int) -> str:
+        return self.data[self.offsets[index] : self.offsets[index + 1]].tobytes().decode("utf-8")
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+
+class Corpus:
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self._columns = {name: _StringColumn(*self._load(name)) for name in _STRING_COLUMNS}
+        self._doc_sentences = np.load(os.path.join(path, "doc_sentences.npy"), mmap_mode="r")
+        self._reference_tokens, self._reference_offsets = self._load("reference_tokens")
+        with open(os.path.join(path, "vocab.json"), "r", encoding="utf-8") as f:
+            self._vocab = json.load(f)
+        self._token_ids = None
+        if self.meta.get("tokenizer"):
+            self._token_ids, self._token_offsets = self._load("token_ids")
+
+    def _load(self, name: str) -> Tuple[np.ndarray, np.ndarray]:
+        data = np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode="r")
+        offsets = np.load(os.path.join(self.path, f"{name}.offsets.npy"), mmap_mode="r")
+        return data, offsets
+
+    def __len__(self) -> int:
+        return self.meta["rows"]
+
+    def sentences(self, index: int) -> List[str]:
+        start, end = self._doc_sentences[index], self._doc_sentences[index + 1]
+        column = self._columns["sentences"]
+        return [column[i] for i in range(start, end)]
+
+    def reference_tokens(self, index: int) -> List[str]:
+        start, end = self._reference_offsets[index], self._reference_offsets[index + 1]
+        return [self._vocab[token] for token in self._reference_tokens[start:end]]
+
+    def token_ids(self, index: int) -> Optional[List[int]]:
+        if self._token_ids is None:
+            return None
+        start, end = self._token_offsets[index], self._token_offsets[index + 1]
+        return self._token_ids[start:end].tolist()
+
+    def sample(self, index: int, token_ids: bool = False) -> Dict[str, Any]:
+        sentences = self.sentences(index)
+        return {
+            "id": self._columns["ids"][index],
+            "article": self._columns["articles"][index],
+            "reference": self._columns["references"][index],
+            "normalized": self._columns["normalized"][index],
+            "sentences": sentences,
+            "original_sentences": len(sentences),
+            "reference_tokens": self.reference_tokens(index),
+            "token_ids": self.token_ids(index) if token_ids else None,
+        }
+
+
+def load_corpus(dataset_path: str, segmenter: str = "hazm") -> Optional[Corpus]:
+    path = default_corpus_dir(dataset_path)
+    if not os.path.exists(os.path.join(path, "meta.json")):
+        return None
+    corpus = Corpus(path)
+    meta = corpus.meta
+    if (
+        meta.get("format_version") != CORPUS_FORMAT_VERSION
+        or meta.get("segmenter") != segmenter
+        or meta.get("fingerprint") != dataset_fingerprint(dataset_path)
+    ):
+        logger.warning("Compiled corpus at %s is stale; falling back to the CSV", path)
+        return None
+    return corpus
+
+
+def main() -> None:
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
+    default_dataset = os.path.join(os.path.dirname(__file__), "dataset", "test.csv")
+    parser = argparse.ArgumentParser(
+        description="Compile the evaluation CSV into a pre-tokenized, memory-mapped corpus."
+    )
+    parser.add_argument("--dataset", default=os.getenv("TEST_DATASET_PATH", default_dataset))
+    parser.add_argument("--output", help="Output directory (default: <dataset>.corpus)")
+    parser.add_argument("--segmenter", choices=["hazm", "fast"], default="hazm")
+    parser.add_argument(
+        "--skip-model-tokens",
+        action="store_true",
+        help="Do not store mT5 token ids (no model/tokenizer needed)",
+    )
+    args = parser.parse_args()
+
+    meta = compile_corpus(
+        args.dataset,
+        output_dir=args.output,
+        segmenter=args.segmenter,
+        model_tokens=not args.skip_model_tokens,
+    )
+    print(json.dumps(meta, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+import hashlib
+import json
+import os
+import re
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# Hamming distance at or below which two sentence SimHashes count as the same
+# sentence; one substituted word in a 20-word sentence moves about 9 bits,
+# unrelated sentences sit around 32.
+DEDUP_SIMHASH_DISTANCE = int(os.getenv("DEDUP_SIMHASH_DISTANCE", "10"))
+# Shorter sentences only match exactly; a few shared words say little.
+DEDUP_MIN_NEAR_TOKENS = 6
+# Near duplicates are searched among this many most recently kept sentences,
+# which keeps the pass linear on very long inputs.
+DEDUP_WINDOW = int(os.getenv("DEDUP_WINDOW", "4096"))
+
+# A sentence shape seen in this many earlier documents of the same source is boilerplate.
+BOILERPLATE_MIN_DOCS = int(os.getenv("BOILERPLATE_MIN_DOCS", "3"))
+BOILERPLATE_MAX_TOKENS = 40
+BOILERPLATE_MAX_PATTERNS = int(os.getenv("BOILERPLATE_MAX_PATTERNS", "5000"))
+BOILERPLATE_TABLE_PATH = os.getenv("BOILERPLATE_TABLE_PATH", "")
+
+_SIMHASH_BITS = 64
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+_PUNCT_RE = re.compile(r"[^\w\s]+")
+_DIGIT_RE = re.compile(r"\d+")
+_SPACE_RE = re.compile(r"\s+")
+_BOILERPLATE_MARKERS = r"بیشتر بخوانید|ادامه مطلب|ادامه خبر|انتهای پیام|read more|related|advertisement|all rights reserved"
+_BOILERPLATE_LABELS = r"کد خبر|منبع|عکس|تصویر|خبرنگار|source|photo|image"
+# Lines scrapers commonly leave behind regardless of source: a marker on a
+# line of its own, or a marker or credit label followed by a colon and at
+# most three words. Sentences that merely start with these words are text.
+_COMMON_BOILERPLATE_RE = re.compile(
+    rf"^\W*(?:{_BOILERPLATE_MARKERS})\W*$"
+    rf"|^\W*(?:{_BOILERPLATE_MARKERS}|{_BOILERPLATE_LABELS})\s*:\s*\S+(?:\s+\S+){{0,2}}$",
+    re.IGNORECASE,
+)
+
+
+def sentence_key(sentence: str) -> str:
+    key = _PUNCT_RE.sub(" ", sentence.replace("\u200c", " ").lower())
+    return _SPACE_RE.sub(" ", key).strip()
+
+
+def boilerplate_key(key: str) -> str:
+    # Digits are masked so templated lines (dates, article ids, view counts)
+    # collapse to one pattern. Only the per-source table uses this; sentences
+    # that differ in a number are different sentences.
+    return _DIGIT_RE.sub("0", key)
+
+
+def simhash(tokens: List[str]) -> int:
+    # Word unigrams and bigrams, hashed with blake2b so fingerprints are
+    # stable across processes (str hashes are salted).
+    features = sorted(set(tokens) | {f"{a} {b}" for a, b in zip(tokens, tokens[1:])})
+    digests = b"".join(hashlib.blake2b(f.encode("utf-8"), digest_size=8).digest() for f in features)
+    bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8)).reshape(len(features), _SIMHASH_BITS)
+    majority = np.packbits(bits.sum(axis=0) * 2 > len(features))
+    return int.from_bytes(majority.tobytes(), "big")
+
+
+class BoilerplateTable:
+    """Per-source document frequency of sentence shapes; the oldest shapes
+    are evicted once a source holds max_patterns of them. A document seen
+    again (same text re-summarized) is not counted twice."""
+
+    def __init__(self, min_docs: int = BOILERPLATE_MIN_DOCS, max_patterns: int = BOILERPLATE_MAX_PATTERNS):
+        self.min_docs = max(1, min_docs)
+        self.max_patterns = max_patterns
+        self._sources: Dict[str, "OrderedDict[str, int]"] = {}
+        self._documents: Dict[str, int] = {}
+        self._seen_documents: Dict[str, "OrderedDict[str, None]"] = {}
+        self._lock = Lock()
+
+    def is_boilerplate(self, source: str, key: str) -> bool:
+        with self._lock:
+            patterns = self._sources.get(source)
+            return patterns is not None and patterns.get(key, 0) >= self.min_docs
+
+    def observe(self, source: str, keys: Iterable[str]) -> None:
+        keys = sorted(set(keys))
+        digest = hashlib.blake2b("\n".join(keys).encode("utf-8"), digest_size=16).hexdigest()
+        with self._lock:
+            seen = self._seen_documents.setdefault(source, OrderedDict())
+            if digest in seen:
+                seen.move_to_end(digest)
+                return
+            seen[digest] = None
+            if len(seen) > self.max_patterns:
+                seen.popitem(last=False)
+            patterns = self._sources.setdefault(source, OrderedDict())
+            self._documents[source] = self._documents.get(source, 0) + 1
+            for key in keys:
+                patterns[key] = patterns.get(key, 0) + 1
+                patterns.move_to_end(key)
+            while len(patterns) > self.max_patterns:
+                patterns.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                source: {
+                    "documents": self._documents.get(source, 0),
+                    "patterns": len(patterns),
+                    "boilerplate_patterns": sum(1 for count in patterns.values() if count >= self.min_docs),
+                }
+                for source, patterns in self._sources.items()
+            }
+
+    def load(self, path: str) -> None:
+        with open(path, "r", encoding="utf-8") as f:
+            stored = json.load(f)
+        with self._lock:
+            for source, entry in stored.items():
+                self._sources[source] = OrderedDict(entry["patterns"])
+                self._documents[source] = entry["documents"]
+
+    def save(self, path: str) -> None:
+        with self._lock:
+            data = {
+                source: {"documents": self._documents.get(source, 0), "patterns": list(patterns.items())}
+                for source, patterns in self._sources.items()
+            }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+_TABLE: Optional[BoilerplateTable] = None
+_TABLE_LOCK = Lock()
+
+
+def get_table() -> BoilerplateTable:
+    global _TABLE
+    with _TABLE_LOCK:
+        if _TABLE is None:
+            _TABLE = BoilerplateTable()
+            if BOILERPLATE_TABLE_PATH and os.path.exists(BOILERPLATE_TABLE_PATH):
+                _TABLE.load(BOILERPLATE_TABLE_PATH)
+        return _TABLE
+
+
+def save_table() -> None:
+    if _TABLE is not None and BOILERPLATE_TABLE_PATH:
+        _TABLE.save(BOILERPLATE_TABLE_PATH)
+
+
+def reduce_sentences(
+    sentences: List[str],
+    source: Optional[str] = None,
+    count_tokens: Optional[Callable[[str], int]] = None,
+    table: Optional[BoilerplateTable] = None,
+    max_distance: int = DEDUP_SIMHASH_DISTANCE,
+) -> Tuple[List[str], Dict[str, Any]]:
+    count_tokens = count_tokens or (lambda sentence: len(sentence.split()))
+    table = table or get_table()
+    report = {
+        "sentences_in": len(sentences),
+        "exact_duplicates": 0,
+        "near_duplicates": 0,
+        "boilerplate": 0,
+        "tokens_removed": 0,
+    }
+
+    kept: List[str] = []
+    seen_keys = set()
+    fingerprints = np.zeros(len(sentences), dtype=np.uint64)
+    # The numbers of each fingerprinted sentence: near duplicates must agree
+    # on them, a changed figure is news rather than a rewording.
+    fingerprint_numbers: List[List[str]] = []
+    num_fingerprints = 0
+    doc_keys: List[str] = []
+
+    for sentence in sentences:
+        key = sentence_key(sentence)
+        tokens = key.split()
+        if not tokens:
+            continue
+        pattern = boilerplate_key(key)
+        if len(tokens) <= BOILERPLATE_MAX_TOKENS:
+            doc_keys.append(pattern)
+
+        reason = None
+        if key in seen_keys:
+            reason = "exact_duplicates"
+        elif _COMMON_BOILERPLATE_RE.match(sentence.strip()):
+            reason = "boilerplate"
+        elif source and len(tokens) <= BOILERPLATE_MAX_TOKENS and table.is_boilerplate(source, pattern):
+            reason = "boilerplate"
+        elif len(tokens) >= DEDUP_MIN_NEAR_TOKENS:
+            fingerprint = np.uint64(simhash(tokens))
+            numbers = _DIGIT_RE.findall(key)
+            start = max(0, num_fingerprints - DEDUP_WINDOW)
+            diff = (fingerprints[start:num_fingerprints] ^ fingerprint).view(np.uint8)
+            distances = _POPCOUNT[diff].reshape(-1, 8).sum(axis=1)
+            if any(fingerprint_numbers[start + i] == numbers for i in np.flatnonzero(distances <= max_distance)):
+                reason = "near_duplicates"
+            else:
+                fingerprints[num_fingerprints] = fingerprint
+                fingerprint_numbers.append(numbers)
+                num_fingerprints += 1
+        seen_keys.add(key)
+
+        if reason:
+            report[reason] += 1
+            report["tokens_removed"] += count_tokens(sentence)
+        else:
+            kept.append(sentence)
+
+    if source:
+        table.observe(source, doc_keys)
+    report["sentences_out"] = len(kept)
+    return kept, report
@@ -1,14 +1,13 @@
 import csv
 import os
 import random
-import re
 import time
-from typing import Dict, List, Tuple, Optional, Callable
+from typing import Any, Dict, Iterator, List, Tuple, Optional, Callable
 
-from rouge_score import rouge_scorer
-
-from abstractive import summarize_long_text
+from corpus import load_corpus
 from extractive import textrank_summarize
+from metrics import confidence_intervals, export_per_sample, get_rouge_engine, tokenize
+from pipelines import DEFAULT_LANGUAGE, get_pipeline, resolve_language
 from preprocessing import sentence_tokenize
 
 
@@ -30,8 +29,17 @@ def _read_test_rows(path: str) -> List[Dict[str, str]]:
 
 class _UnicodeWordTokenizer:
     def tokenize(self, text: str) -> List[str]:
-        # Match unicode word characters so Persian tokens are preserved.
-        return re.findall(r"\w+", text, flags=re.UNICODE)
+        return tokenize(text)
+
+
+def _tokenizer_fingerprint() -> str:
+    from abstractive import tokenizer_fingerprint
+
+    return tokenizer_fingerprint()
+
+
+def _extractive_ratio(extractive_length: int) -> float:
+    return max(0.05, min(0.9, extractive_length / 100))
 
 
 def _generate_summary(
@@ -44,17 +52,38 @@ def _generate_summary(
     abstractive_length_penalty: float = 1.0,
     abstractive_repetition_penalty: float = 1.1,
     abstractive_no_repeat_ngram_size: int = 3,
+    abstractive_decoding: str = "beam",
+    abstractive_decoding_scope: str = "final",
+    extractive_summary: Optional[str] = None,
+    chunk_cache: Optional[Dict[Any, Any]] = None,
+    sentences: Optional[List[str]] = None,
+    normalized_text: Optional[str] = None,
+    token_ids: Optional[List[int]] = None,
+    lang: str = DEFAULT_LANGUAGE,
+    segmenter: str = "hazm",
 ) -> str:
+    chunk_decoding = abstractive_decoding if abstractive_decoding_scope == "all" else "beam"
+    lang = resolve_language(lang, text)
+    abstractive_settings = get_pipeline(lang).abstractive_settings()
+    if lang != "fa":
+        # Compiled corpora are built with the Persian pipeline.
+        sentences = token_ids = None
+
+    if method in ("extractive", "hybrid") and extractive_summary is None:
+        ratio = _extractive_ratio(extractive_length)
+        if sentences is not None:
+            result = textrank_summarize(normalized_text, summary_ratio=ratio, sentences=sentences)
+        else:
+            result = textrank_summarize(text, summary_ratio=ratio, lang=lang, segmenter=segmenter)
+        extractive_summary = result["summary"]
+
     if method == "extractive":
-        ratio = max(0.05, min(0.9, extractive_length / 100))
-        result = textrank_summarize(text, summary_ratio=ratio)
-        return result["summary"]
+        return extractive_summary
+
+    from abstractive import summarize_long_text
 
     if method == "hybrid":
-        extractive_ratio = max(0.05, min(0.9, extractive_length / 100))
         abstractive_ratio = max(0.1, min(0.9, abstractive_length / 100))
-        extractive_result = textrank_summarize(text, summary_ratio=extractive_ratio)
-        extractive_summary = extractive_result["summary"]
         final_summary, _, _ = summarize_long_text(
             extractive_summary,
             length_ratio=abstractive_ratio,
@@ -63,6 +92,10 @@ def _generate_summary(
             length_penalty=abstractive_length_penalty,
             repetition_penalty=abstractive_repetition_penalty,
             no_repeat_ngram_size=abstractive_no_repeat_ngram_size,
+            chunk_decoding=chunk_decoding,
+            final_decoding=abstractive_decoding,
+            chunk_cache=chunk_cache,
+            **abstractive_settings,
         )
         return final_summary
 
@@ -75,11 +108,138 @@ def _generate_summary(
         length_penalty=abstractive_length_penalty,
         repetition_penalty=abstractive_repetition_penalty,
         no_repeat_ngram_size=abstractive_no_repeat_ngram_size,
+        chunk_decoding=chunk_decoding,
+        final_decoding=abstractive_decoding,
+        chunk_cache=chunk_cache,
+        token_ids=token_ids,
+        **abstractive_settings,
     )
     return final_summary
 
 
-def evaluate_dataset(
+def _select(items: List[Any], max_samples: Optional[int], start_index: int, shuffle: bool, seed: int) -> List[Any]:
+    if shuffle:
+        rng = random.Random(seed)
+        rng.shuffle(items)
+
+    if start_index < 0:
+        start_index = 0
+
+    if max_samples is None or max_samples <= 0:
+        return items[start_index:]
+    return items[start_index : start_index + max_samples]
+
+
+def _eval_samples(
+    dataset_path: str,
+    max_samples: Optional[int],
+    start_index: int,
+    shuffle: bool,
+    seed: int,
+    with_token_ids: bool = False,
+    segmenter: str = "hazm",
+) -> Tuple[int, Iterator[Dict[str, Any]]]:
+    if not os.path.exists(dataset_path):
+        raise FileNotFoundError(f"Dataset not found: {dataset_path}")
+    start_index = max(0, start_index)
+
+    # A corpus compiled with another segmenter is ignored, not reused.
+    corpus = load_corpus(dataset_path, segmenter=segmenter)
+    if corpus is None:
+        rows = _select(_read_test_rows(dataset_path), max_samples, start_index, shuffle, seed)
+
+        def _from_rows() -> Iterator[Dict[str, Any]]:
+            for offset, row in enumerate(rows):
+                yield {
+                    "row": start_index + offset,
+                    "id": row.get("id", ""),
+                    "article": _clean_dataset_text(row.get("article", "")),
+                    "reference": _clean_dataset_text(row.get("summary", "")),
+                }
+
+        return len(rows), _from_rows()
+
+    # Shuffling the index list with the same seed reproduces the CSV order.
+    indices = _select(list(range(len(corpus))), max_samples, start_index, shuffle, seed)
+    if with_token_ids and corpus.meta.get("tokenizer") != _tokenizer_fingerprint():
+        with_token_ids = False
+    engine = get_rouge_engine()
+
+    def _from_corpus() -> Iterator[Dict[str, Any]]:
+        for offset, index in enumerate(indices):
+            sample = corpus.sample(index, token_ids=with_token_ids)
+            engine.add_reference(sample["reference"], sample.pop("reference_tokens"))
+            sample["row"] = start_index + offset
+            yield sample
+
+    return len(indices), _from_corpus()
+
+
+def _sample_record(
+    row_index: int,
+    row_id: str,
+    article: str,
+    reference: str,
+    generated: str,
+    latency: float,
+    original_sentences: Optional[int] = None,
+    segmenter: str = "hazm",
+) -> Dict[str, Any]:
+    scores = get_rouge_engine().score(reference, generated)
+    if original_sentences is None:
+        original_sentences = len(sentence_tokenize(article, segmenter=segmenter))
+    return {
+        "row": row_index,
+        "id": row_id,
+        "rouge1_f1": scores["rouge1"][2],
+        "rouge2_f1": scores["rouge2"][2],
+        "rougeL_f1": scores["rougeL"][2],
+        "rouge1_precision": scores["rouge1"][0],
+        "rouge1_recall": scores["rouge1"][1],
+        "rougeL_precision": scores["rougeL"][0],
+        "rougeL_recall": scores["rougeL"][1],
+        "latency_sec": round(latency, 4),
+        "original_chars": len(article),
+        "reference_chars": len(reference),
+        "generated_chars": len(generated),
+        "original_sentences": original_sentences,
+        "generated_sentences": len(sentence_tokenize(generated, segmenter=segmenter)),
+    }
+
+
+def _aggregate_records(records: List[Dict[str, Any]]) -> Tuple[Dict[str, float], Dict[str, float]]:
+    if not records:
+        raise ValueError("No valid samples found for evaluation")
+
+    count = len(records)
+    totals = {"rouge1_f1": 0.0, "rouge2_f1": 0.0, "rougeL_f1": 0.0}
+    length_totals = {"original_chars": 0, "reference_chars": 0, "generated_chars": 0}
+    for record in records:
+        for key in totals:
+            totals[key] += record[key]
+        for key in length_totals:
+            length_totals[key] += record[key]
+
+    averaged = {key: round(value / count, 6) for key, value in totals.items()}
+
+    avg_original_chars = round(length_totals["original_chars"] / count, 2)
+    avg_reference_chars = round(length_totals["reference_chars"] / count, 2)
+    avg_generated_chars = round(length_totals["generated_chars"] / count, 2)
+
+    if avg_original_chars > 0:
+        compression_ratio = round(avg_generated_chars / avg_original_chars, 4)
+    else:
+        compression_ratio = 0.0
+
+    length_metrics = {
+        "avg_gen_len": avg_generated_chars,
+        "avg_ref_len": avg_reference_chars,
+        "compression_ratio": compression_ratio,
+    }
+    return averaged, length_metrics
+
+
+def evaluate_records(
     dataset_path: str,
     method: str,
     length: int,
@@ -93,51 +253,28 @@ def evaluate_dataset(
     abstractive_length_penalty: float = 1.0,
     abstractive_repetition_penalty: float = 1.1,
     abstractive_no_repeat_ngram_size: int = 3,
+    abstractive_decoding: str = "beam",
+    abstractive_decoding_scope: str = "final",
+    lang: str = DEFAULT_LANGUAGE,
     progress_cb: Optional[Callable[[int, int, int, int], None]] = None,
-) -> Tuple[Dict[str, Dict[str, float]], Dict[str, float], Dict[str, int]]:
-    if not os.path.exists(dataset_path):
-        raise FileNotFoundError(f"Dataset not found: {dataset_path}")
-
-    rows = _read_test_rows(dataset_path)
-    if shuffle:
-        rng = random.Random(seed)
-        rng.shuffle(rows)
-
-    if start_index < 0:
-        start_index = 0
-
-    if max_samples is None or max_samples <= 0:
-        selected = rows[start_index:]
-    else:
-        selected = rows[start_index : start_index + max_samples]
-
-    scorer = rouge_scorer.RougeScorer(
-        ["rouge1", "rouge2", "rougeL"],
-        use_stemmer=False,
-        tokenizer=_UnicodeWordTokenizer(),
+    segmenter: str = "hazm",
+) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    total_selected, samples = _eval_samples(
+        dataset_path,
+        max_samples,
+        start_index,
+        shuffle,
+        seed,
+        with_token_ids=method == "abstractive",
+        segmenter=segmenter,
     )
 
-    totals = {
-        "rouge1_f1": 0.0,
-        "rouge2_f1": 0.0,
-        "rougeL_f1": 0.0,
-    }
-
-    length_totals = {
-        "original_chars": 0,
-        "reference_chars": 0,
-        "generated_chars": 0,
-        "original_sentences": 0,
-        "generated_sentences": 0,
-    }
-
+    records: List[Dict[str, Any]] = []
     counts = {"samples": 0, "skipped": 0}
 
-    total_selected = len(selected)
-
-    for idx, row in enumerate(selected, start=1):
-        article = _clean_dataset_text(row.get("article", ""))
-        reference = _clean_dataset_text(row.get("summary", ""))
+    for idx, sample in enumerate(samples, start=1):
+        article = sample["article"]
+        reference = sample["reference"]
 
         if not article or not reference:
             counts["skipped"] += 1
@@ -145,6 +282,7 @@ def evaluate_dataset(
                 progress_cb(idx, total_selected, counts["samples"], counts["skipped"])
             continue
 
+        started = time.perf_counter()
         generated = _generate_summary(
             article,
             method=method,
@@ -155,8 +293,16 @@ def evaluate_dataset(
             abstractive_length_penalty=abstractive_length_penalty,
             abstractive_repetition_penalty=abstractive_repetition_penalty,
             abstractive_no_repeat_ngram_size=abstractive_no_repeat_ngram_size,
+            abstractive_decoding=abstractive_decoding,
+            abstractive_decoding_scope=abstractive_decoding_scope,
+            sentences=sample.get("sentences"),
+            normalized_text=sample.get("normalized"),
+            token_ids=sample.get("token_ids"),
+            lang=lang,
+            segmenter=segmenter,
         )
         generated = _clean_dataset_text(generated)
+        latency = time.perf_counter() - started
 
         if not generated:
             counts["skipped"] += 1
@@ -164,44 +310,86 @@ def evaluate_dataset(
                 progress_cb(idx, total_selected, counts["samples"], counts["skipped"])
             continue
 
-        scores = scorer.score(reference, generated)
-        totals["rouge1_f1"] += scores["rouge1"].fmeasure
-        totals["rouge2_f1"] += scores["rouge2"].fmeasure
-        totals["rougeL_f1"] += scores["rougeL"].fmeasure
-
-        length_totals["original_chars"] += len(article)
-        length_totals["reference_chars"] += len(reference)
-        length_totals["generated_chars"] += len(generated)
-        length_totals["original_sentences"] += len(sentence_tokenize(article))
-        length_totals["generated_sentences"] += len(sentence_tokenize(generated))
-
+        records.append(
+            _sample_record(
+                sample["row"],
+                sample["id"],
+                article,
+                reference,
+                generated,
+                latency,
+                original_sentences=sample.get("original_sentences"),
+                segmenter=segmenter,
+            )
+        )
         counts["samples"] += 1
 
         if progress_cb:
             progress_cb(idx, total_selected, counts["samples"], counts["skipped"])
 
-    if counts["samples"] == 0:
-        raise ValueError("No valid samples found for evaluation")
+    return records, counts
 
-    averaged = {
-        "rouge1_f1": round(totals["rouge1_f1"] / counts["samples"], 6),
-        "rouge2_f1": round(totals["rouge2_f1"] / counts["samples"], 6),
-        "rougeL_f1": round(totals["rougeL_f1"] / counts["samples"], 6),
-    }
 
-    avg_original_chars = round(length_totals["original_chars"] / counts["samples"], 2)
-    avg_reference_chars = round(length_totals["reference_chars"] / counts["samples"], 2)
-    avg_generated_chars = round(length_totals["generated_chars"] / counts["samples"], 2)
+def evaluate_dataset(
+    dataset_path: str,
+    method: str,
+    length: int,
+    extractive_length: int,
+    abstractive_length: int,
+    max_samples: int,
+    start_index: int,
+    shuffle: bool,
+    seed: int,
+    abstractive_num_beams: int = 2,
+    abstractive_length_penalty: float = 1.0,
+    abstractive_repetition_penalty: float = 1.1,
+    abstractive_no_repeat_ngram_size: int = 3,
+    abstractive_decoding: str = "beam",
+    abstractive_decoding_scope: str = "final",
+    lang: str = DEFAULT_LANGUAGE,
+    progress_cb: Optional[Callable[[int, int, int, int], None]] = None,
+    per_sample_path: Optional[str] = None,
+    report: Optional[Dict[str, Any]] = None,
+    segmenter: str = "hazm",
+) -> Tuple[Dict[str, Dict[str, float]], Dict[str, float], Dict[str, int]]:
+    records, counts = evaluate_records(
+        dataset_path,
+        method=method,
+        length=length,
+        extractive_length=extractive_length,
+        abstractive_length=abstractive_length,
+        max_samples=max_samples,
+        start_index=start_index,
+        shuffle=shuffle,
+        seed=seed,
+        abstractive_num_beams=abstractive_num_beams,
+        abstractive_length_penalty=abstractive_length_penalty,
+        abstractive_repetition_penalty=abstractive_repetition_penalty,
+        abstractive_no_repeat_ngram_size=abstractive_no_repeat_ngram_size,
+        abstractive_decoding=abstractive_decoding,
+        abstractive_decoding_scope=abstractive_decoding_scope,
+        lang=lang,
+        progress_cb=progress_cb,
+        segmenter=segmenter,
+    )
+    return finalize_records(records, counts, seed, per_sample_path, report)
+
 
-    if avg_original_chars > 0:
-        compression_ratio = round(avg_generated_chars / avg_original_chars, 4)
-    else:
-        compression_ratio = 0.0
+def finalize_records(
+    records: List[Dict[str, Any]],
+    counts: Dict[str, int],
+    seed: int,
+    per_sample_path: Optional[str] = None,
+    report: Optional[Dict[str, Any]] = None,
+) -> Tuple[Dict[str, Dict[str, float]], Dict[str, float], Dict[str, int]]:
+    averaged, length_metrics = _aggregate_records(records)
 
-    length_metrics = {
-        "avg_gen_len": avg_generated_chars,
-        "avg_ref_len": avg_reference_chars,
-        "compression_ratio": compression_ratio,
-    }
+    if per_sample_path:
+        export_per_sample(records, per_sample_path)
+
+    if report is not None:
+        report["confidence_intervals"] = confidence_intervals(records, seed=seed)
+        report["samples"] = records
+        report["per_sample_path"] = per_sample_path
 
     return averaged, length_metrics, counts
@@ -2,24 +2,104 @@ from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 import networkx as nx
 import numpy as np
+from scipy import sparse
 from preprocessing import normalize_text_language, sentence_tokenize
+from profiling import stage
 
-def calculate_similarity_matrix(sentences):
+def fit_tfidf(sentences):
+    vectorizer = TfidfVectorizer()
+    tfidf_matrix = vectorizer.fit_transform(sentences)
+    return vectorizer, tfidf_matrix
+
+# Function words that dominate sentence-level TF-IDF weights but are useless
+# as keywords.
+KEYWORD_STOPWORDS = frozenset(
+    "و در به از که این را با است برای آن یک تا هم بر شد می ها های شده کرد کند "
+    "خود نیز اما یا پس اگر باید بود شود دارد کرده بین پیش روی همه ای ان یکی "
+    "the of and to in is a an for on that with as by are was be it this from at or".split()
+)
+
+def calculate_similarity_matrix(sentences, tfidf=None):
     if len(sentences) < 2:
         return np.zeros((len(sentences), len(sentences)))
     
     try:
-        vectorizer = TfidfVectorizer()
-        tfidf_matrix = vectorizer.fit_transform(sentences)
+        vectorizer, tfidf_matrix = fit_tfidf(sentences)
+        if tfidf is not None:
+            tfidf["vectorizer"] = vectorizer
+            tfidf["matrix"] = tfidf_matrix
         similarity_matrix = cosine_similarity(tfidf_matrix, tfidf_matrix)
         return similarity_matrix
     except Exception as e:
         print(f"خطا در محاسبه شباهت: {e}")
         return np.zeros((len(sentences), len(sentences)))
 
+# Rows of the similarity block computed at once by the sparse path.
+SIMILARITY_BLOCK_BYTES = 32 * 1024 * 1024
+
+def calculate_topk_similarity(sentences, k=20, threshold=0.1, tfidf=None):
+    # Keeps each sentence's k most similar neighbours above the threshold;
+    # memory is O(n*k) instead of the dense n x n matrix.
+    try:
+        vectorizer, tfidf_matrix = fit_tfidf(sentences)
+    except ValueError as e:
+        print(f"خطا در محاسبه شباهت: {e}")
+        return sparse.csr_matrix((len(sentences), len(sentences)))
+    if tfidf is not None:
+        tfidf["vectorizer"] = vectorizer
+        tfidf["matrix"] = tfidf_matrix
+    n = tfidf_matrix.shape[0]
+    k = min(k, n - 1)
+    block_rows = max(1, SIMILARITY_BLOCK_BYTES // (8 * n))
+    rows, cols, values = [], [], []
+    # TfidfVectorizer rows are L2-normalized, so the dot product is the cosine.
+    transposed = tfidf_matrix.T.tocsc()
+    for start in range(0, n, block_rows):
+        block = (tfidf_matrix[start : start + block_rows] @ transposed).toarray()
+        local = np.arange(block.shape[0])
+        block[local, start + local] = 0.0
+        top = np.argpartition(-block, k - 1, axis=1)[:, :k]
+        top_values = np.take_along_axis(block, top, axis=1)
+        keep = top_values > threshold
+        rows.append(np.repeat(start + local, k)[keep.ravel()])
+        cols.append(top[keep])
+        values.append(top_values[keep])
+    matrix = sparse.csr_matrix(
+        (np.concatenate(values), (np.concatenate(rows), np.concatenate(cols))), shape=(n, n)
+    )
+    # Undirected like the dense graph: an edge kept by either endpoint counts.
+    return matrix.maximum(matrix.T).tocsr()
+
+def pagerank_sparse(matrix, alpha=0.85, max_iter=100, tol=1.0e-6, personalization=None, nstart=None):
+    # Same iteration as nx.pagerank on a weighted graph, without building
+    # the networkx graph; teleports and dangling sentences spread their rank
+    # uniformly or, when given, by the personalization weights. nstart
+    # warm-starts the iteration from earlier scores.
+    n = matrix.shape[0]
+    out_weight = np.asarray(matrix.sum(axis=1)).ravel()
+    dangling = out_weight == 0
+    inverse = np.divide(1.0, out_weight, out=np.zeros_like(out_weight), where=~dangling)
+    transition = sparse.diags(inverse) @ matrix
+    if personalization is None:
+        teleport = np.full(n, 1.0 / n)
+    else:
+        teleport = np.asarray(personalization, dtype=float) / np.sum(personalization)
+    if nstart is None:
+        x = np.full(n, 1.0 / n)
+    else:
+        x = np.asarray(nstart, dtype=float) / np.sum(nstart)
+    for _ in range(max_iter):
+        last = x
+        x = alpha * (x @ transition + x[dangling].sum() * teleport) + (1 - alpha) * teleport
+        if np.abs(x - last).sum() < n * tol:
+            break
+    return {i: float(score) for i, score in enumerate(x)}
+
 def build_similarity_graph(similarity_matrix, threshold=0.1):
     graph = nx.Graph()
     n = len(similarity_matrix)
+    # Sentences without a similar neighbour still need a PageRank score.
+    graph.add_nodes_from(range(n))
     
     for i in range(n):
         for j in range(i + 1, n):
@@ -28,14 +108,57 @@ def build_similarity_graph(similarity_matrix, threshold=0.1):
     
     return graph
 
-def textrank_summarize(text, summary_ratio=0.3, num_sentences=None, lang="fa"):
-    text = normalize_text_language(text, lang=lang, remove_punct=False, replace_halfspace=False)
-    sentences = sentence_tokenize(text, lang=lang)
+def extract_keywords(vectorizer, tfidf_matrix, scores, top_k=10):
+    # Each sentence's TF-IDF row weighted by its PageRank score.
+    weights = np.array([scores.get(i, 0.0) for i in range(tfidf_matrix.shape[0])])
+    term_scores = np.asarray(tfidf_matrix.T @ weights).ravel()
+    terms = vectorizer.get_feature_names_out()
+    keywords = []
+    for idx in np.argsort(-term_scores):
+        term = terms[idx]
+        if term_scores[idx] <= 0 or len(keywords) >= top_k:
+            break
+        if term in KEYWORD_STOPWORDS or term.isdigit() or len(term) < 2:
+            continue
+        keywords.append({"term": term, "score": round(float(term_scores[idx]), 6)})
+    return keywords
+
+def sentence_spans(text, sentences, indices):
+    wanted = set(indices)
+    spans = []
+    cursor = 0
+    for idx, sentence in enumerate(sentences):
+        start = text.find(sentence, cursor)
+        if start < 0:
+            continue
+        cursor = start + len(sentence)
+        if idx in wanted:
+            spans.append({"index": idx, "start": start, "end": cursor})
+    return spans
+
+def textrank_summarize(
+    text,
+    summary_ratio=0.3,
+    num_sentences=None,
+    lang="fa",
+    segmenter="hazm",
+    sentences=None,
+    num_keywords=0,
+    highlights=False,
+    max_neighbors=None,
+):
+    # Callers with pre-split sentences (compiled corpora) pass the already
+    # normalized text alongside them and skip both steps.
+    if sentences is None:
+        with stage("normalize"):
+            text = normalize_text_language(text, lang=lang, remove_punct=False, replace_halfspace=False, segmenter=segmenter)
+        with stage("sentence_split"):
+            sentences = sentence_tokenize(text, lang=lang, segmenter=segmenter)
     
     num_original = len(sentences)
     
     if num_original == 0:
-        return {
+        result = {
             "summary": "",
             "original_text": text,
             "num_original_sentences": 0,
@@ -44,9 +167,10 @@ def textrank_summarize(text, summary_ratio=0.3, num_sentences=None, lang="fa"):
             "selected_indices": [],
             "scores": {}
         }
+        return annotate_result(result, text, sentences, None, num_keywords, highlights)
     
     if num_original == 1:
-        return {
+        result = {
             "summary": sentences[0],
             "original_text": text,
             "num_original_sentences": 1,
@@ -55,21 +179,52 @@ def textrank_summarize(text, summary_ratio=0.3, num_sentences=None, lang="fa"):
             "selected_indices": [0],
             "scores": {0: 1.0}
         }
+        return annotate_result(result, text, sentences, None, num_keywords, highlights)
     
-    if num_sentences is None:
-        num_summary = max(1, int(num_original * summary_ratio))
-    else:
-        num_summary = min(num_sentences, num_original)
+    num_summary = summary_size(num_original, summary_ratio, num_sentences)
     
-    similarity_matrix = calculate_similarity_matrix(sentences)
+    tfidf = {} if num_keywords else None
+    if max_neighbors:
+        with stage("tfidf_similarity"):
+            similarity = calculate_topk_similarity(sentences, k=max_neighbors, tfidf=tfidf)
+        with stage("pagerank"):
+            scores = pagerank_sparse(similarity)
+        result = build_summary_result(text, sentences, scores, num_summary)
+        return annotate_result(result, text, sentences, tfidf, num_keywords, highlights)
+
+    with stage("tfidf_similarity"):
+        similarity_matrix = calculate_similarity_matrix(sentences, tfidf=tfidf)
     
-    graph = build_similarity_graph(similarity_matrix)
+    with stage("graph"):
+        graph = build_similarity_graph(similarity_matrix)
     
-    try:
-        scores = nx.pagerank(graph, max_iter=100)
-    except:
-        scores = {i: 1.0 / num_original for i in range(num_original)}
+    with stage("pagerank"):
+        try:
+            scores = nx.pagerank(graph, max_iter=100)
+        except:
+            scores = {i: 1.0 / num_original for i in range(num_original)}
     
+    result = build_summary_result(text, sentences, scores, num_summary)
+    return annotate_result(result, text, sentences, tfidf, num_keywords, highlights)
+
+def annotate_result(result, text, sentences, tfidf, num_keywords, highlights):
+    if num_keywords:
+        keywords = []
+        if tfidf:
+            with stage("keywords"):
+                keywords = extract_keywords(tfidf["vectorizer"], tfidf["matrix"], result["scores"], num_keywords)
+        result["keywords"] = keywords
+    if highlights:
+        result["highlights"] = sentence_spans(text, sentences, result["selected_indices"])
+    return result
+
+def summary_size(num_original, summary_ratio=0.3, num_sentences=None):
+    if num_sentences is None:
+        return max(1, int(num_original * summary_ratio))
+    return min(num_sentences, num_original)
+
+def build_summary_result(text, sentences, scores, num_summary):
+    num_original = len(sentences)
     ranked_sentences = sorted(scores.items(), key=lambda x: x[1], reverse=True)
     
     selected_indices = sorted([idx for idx, score in ranked_sentences[:num_summary]])
@@ -86,3 +241,11 @@ def textrank_summarize(text, summary_ratio=0.3, num_sentences=None, lang="fa"):
         "selected_indices": selected_indices,
         "scores": scores
     }
+
+def summarize_from_file(file_path, summary_ratio=0.3, num_sentences=None, encoding="utf-8", **kwargs):
+    try:
+        with open(file_path, "r", encoding=encoding) as f:
+            text = f.read()
+    except (OSError, UnicodeDecodeError) as e:
+        return {"error": f"Cannot read {file_path}: {e}"}
+    return textrank_summarize(text, summary_ratio=summary_ratio, num_sentences=num_sentences, **kwargs)
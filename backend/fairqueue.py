@@ -0,0 +1,248 @@
+import heapq
+import itertools
+import json
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+from runtime_config import get_runtime_config
+
+logger = logging.getLogger("summarizer.fairqueue")
+
+# {"tenants": {"name": {"keys": [...], "weight": 4, "rate": 20000, "burst": 200000, "admin": false}}}
+TENANTS_PATH = os.getenv("TENANTS_PATH", "")
+# With keys configured, requests without X-API-Key are rejected instead of
+# being served as the anonymous tenant.
+TENANTS_REQUIRE_KEY = os.getenv("TENANTS_REQUIRE_KEY", "0") == "1"
+ANONYMOUS_TENANT = "anonymous"
+# Rates and bursts are in cost units (beam-tokens) per second; 0 disables the limit.
+TENANT_DEFAULT_WEIGHT = float(os.getenv("TENANT_DEFAULT_WEIGHT", "1"))
+TENANT_DEFAULT_RATE = float(os.getenv("TENANT_DEFAULT_RATE", "0"))
+TENANT_DEFAULT_BURST = float(os.getenv("TENANT_DEFAULT_BURST", "0"))
+# TextRank work is priced per input token at this fraction of one beam-token.
+EXTRACTIVE_COST_PER_TOKEN = float(os.getenv("EXTRACTIVE_COST_PER_TOKEN", "0.01"))
+# Every worker process enforces its own buckets; the configured rate is split
+# between the workers serve.py starts.
+WEB_WORKERS = max(1, int(os.getenv("WEB_WORKERS", "1")))
+
+_CURRENT_TENANT: ContextVar[Optional["Tenant"]] = ContextVar("tenant", default=None)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = max(burst, rate)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def take(self, cost: float) -> float:
+        """Takes cost from the bucket and returns 0, or returns the seconds
+        until it could be taken. A cost above the burst is admitted once the
+        bucket is full and leaves it in debt."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        needed = min(cost, self.burst)
+        if self.tokens >= needed:
+            self.tokens -= cost
+            return 0.0
+        return (needed - self.tokens) / self.rate
+
+
+class Tenant:
+    def __init__(self, name: str, weight: float, rate: float, burst: float, admin: bool = False):
+        self.name = name
+        self.weight = max(weight, 1e-6)
+        self.admin = admin
+        self.bucket = TokenBucket(rate / WEB_WORKERS, burst / WEB_WORKERS) if rate > 0 else None
+        self._lock = threading.Lock()
+        self.usage: Dict[str, Any] = {
+            "requests": 0,
+            "rejected": 0,
+            "cost": 0.0,
+            "generate_calls": 0,
+            "beam_tokens": 0.0,
+            "queue_wait_sec": 0.0,
+            "max_queue_wait_sec": 0.0,
+        }
+
+    def admit(self, cost: float) -> float:
+        with self._lock:
+            wait = self.bucket.take(cost) if self.bucket is not None else 0.0
+            if wait > 0:
+                self.usage["rejected"] += 1
+            else:
+                self.usage["requests"] += 1
+                self.usage["cost"] += cost
+            return wait
+
+    def record_generate(self, cost: float, queue_wait: float) -> None:
+        with self._lock:
+            self.usage["generate_calls"] += 1
+            self.usage["beam_tokens"] += cost
+            self.usage["queue_wait_sec"] += queue_wait
+            self.usage["max_queue_wait_sec"] = max(self.usage["max_queue_wait_sec"], queue_wait)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            usage = dict(self.usage)
+            tokens = self.bucket.tokens if self.bucket is not None else None
+        usage["cost"] = round(usage["cost"], 1)
+        usage["beam_tokens"] = round(usage["beam_tokens"], 1)
+        usage["queue_wait_sec"] = round(usage["queue_wait_sec"], 3)
+        usage["max_queue_wait_sec"] = round(usage["max_queue_wait_sec"], 3)
+        return {
+            "weight": self.weight,
+            "rate": self.bucket.rate if self.bucket is not None else None,
+            "bucket_tokens": round(tokens, 1) if tokens is not None else None,
+            "usage": usage,
+        }
+
+
+class TenantRegistry:
+    def __init__(self, config: Optional[Dict[str, Any]] = None, require_key: bool = TENANTS_REQUIRE_KEY):
+        self.require_key = require_key
+        self.tenants: Dict[str, Tenant] = {}
+        self._keys: Dict[str, Tenant] = {}
+        for name, entry in ((config or {}).get("tenants") or {}).items():
+            tenant = Tenant(
+                name,
+                float(entry.get("weight", TENANT_DEFAULT_WEIGHT)),
+                float(entry.get("rate", TENANT_DEFAULT_RATE)),
+                float(entry.get("burst", TENANT_DEFAULT_BURST)),
+                admin=bool(entry.get("admin", False)),
+            )
+            self.tenants[name] = tenant
+            for key in entry.get("keys", []):
+                self._keys[key] = tenant
+        if ANONYMOUS_TENANT not in self.tenants:
+            self.tenants[ANONYMOUS_TENANT] = Tenant(
+                ANONYMOUS_TENANT, TENANT_DEFAULT_WEIGHT, TENANT_DEFAULT_RATE, TENANT_DEFAULT_BURST
+            )
+
+    @property
+    def configured(self) -> bool:
+        return bool(self._keys)
+
+    def resolve(self, api_key: Optional[str]) -> Optional[Tenant]:
+        """The tenant for a key; None for an unknown key once keys are
+        configured, and for a missing one if keys are required. Without
+        configured keys every request is anonymous."""
+        if not self._keys:
+            return self.tenants[ANONYMOUS_TENANT]
+        if not api_key:
+            return None if self.require_key else self.tenants[ANONYMOUS_TENANT]
+        return self._keys.get(api_key)
+
+    def usage(self, names: Optional[List[str]] = None) -> Dict[str, Any]:
+        return {name: tenant.snapshot() for name, tenant in self.tenants.items() if names is None or name in names}
+
+
+class FairScheduler:
+    """Start-time fair queueing over a fixed number of inference slots: each
+    generate() call gets a start tag max(virtual time, the tenant's last
+    finish tag) and finishes cost / weight later; free slots go to the
+    smallest start tag. A tenant with a deep backlog only delays others by
+    the calls already running. With slots=None nothing waits and the
+    scheduler only counts the calls in flight."""
+
+    def __init__(self, slots: Optional[int]):
+        self.slots = max(1, slots) if slots else None
+        self._busy = 0
+        self._virtual = 0.0
+        self._finish: Dict[str, float] = {}
+        self._heap: List[Any] = []
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+
+    def _dispatch(self) -> None:
+        while self._heap and (self.slots is None or self._busy < self.slots):
+            start, _, granted = heapq.heappop(self._heap)
+            self._virtual = start
+            self._busy += 1
+            granted.set()
+
+    @contextmanager
+    def slot(self, tenant: str, weight: float, cost: float) -> Iterator[float]:
+        started = time.perf_counter()
+        granted = threading.Event()
+        with self._lock:
+            start = max(self._virtual, self._finish.get(tenant, 0.0))
+            self._finish[tenant] = start + cost / weight
+            heapq.heappush(self._heap, (start, next(self._sequence), granted))
+            self._dispatch()
+        granted.wait()
+        try:
+            yield time.perf_counter() - started
+        finally:
+            with self._lock:
+                self._busy -= 1
+                self._dispatch()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"slots": self.slots, "busy": self._busy, "queued": len(self._heap)}
+
+
+def _load_registry() -> TenantRegistry:
+    if TENANTS_PATH and os.path.exists(TENANTS_PATH):
+        with open(TENANTS_PATH, "r", encoding="utf-8") as f:
+            return TenantRegistry(json.load(f))
+    return TenantRegistry()
+
+
+_REGISTRY: Optional[TenantRegistry] = None
+_SCHEDULER: Optional[FairScheduler] = None
+_INIT_LOCK = threading.Lock()
+
+
+def get_registry() -> TenantRegistry:
+    global _REGISTRY
+    with _INIT_LOCK:
+        if _REGISTRY is None:
+            _REGISTRY = _load_registry()
+        return _REGISTRY
+
+
+def get_scheduler() -> FairScheduler:
+    global _SCHEDULER
+    with _INIT_LOCK:
+        if _SCHEDULER is None:
+            # Fair queueing needs a bounded number of concurrent generate()
+            # calls; it is only enforced once INFERENCE_SLOTS is configured,
+            # otherwise generate() runs with the threadpool's concurrency.
+            _SCHEDULER = FairScheduler(get_runtime_config()["inference_slots"])
+        return _SCHEDULER
+
+
+def request_cost(method: str, estimate: Dict[str, Any], num_beams: int) -> float:
+    cost = estimate.get("generate_tokens", 0) * max(1, num_beams)
+    if method != "abstractive":
+        cost += estimate.get("tokens", 0) * EXTRACTIVE_COST_PER_TOKEN
+    return max(1.0, float(cost))
+
+
+def retry_after_header(wait: float) -> str:
+    return str(max(1, math.ceil(wait)))
+
+
+@contextmanager
+def tenant_context(tenant: Optional[Tenant]) -> Iterator[None]:
+    token = _CURRENT_TENANT.set(tenant)
+    try:
+        yield
+    finally:
+        _CURRENT_TENANT.reset(token)
+
+
+@contextmanager
+def inference_slot(cost: float) -> Iterator[None]:
+    tenant = _CURRENT_TENANT.get() or get_registry().tenants[ANONYMOUS_TENANT]
+    with get_scheduler().slot(tenant.name, tenant.weight, cost) as queue_wait:
+        tenant.record_generate(cost, queue_wait)
+        yield
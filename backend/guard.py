@@ -0,0 +1,225 @@
+import math
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from adaptive import CHARS_PER_TOKEN, get_controller
+
+GUARD_MEMORY_BUDGET_MB = float(os.getenv("GUARD_MEMORY_BUDGET_MB", "1024"))
+# Dense TextRank is used while it fits the memory budget and this time.
+GUARD_DENSE_MAX_SEC = float(os.getenv("GUARD_DENSE_MAX_SEC", "10"))
+GUARD_MAX_SEC = float(os.getenv("GUARD_MAX_SEC", "300"))
+# Abstractive inputs predicted to need more chunks are pre-filtered with TextRank.
+GUARD_MAX_CHUNKS = int(os.getenv("GUARD_MAX_CHUNKS", "24"))
+GUARD_TOPK_NEIGHBORS = int(os.getenv("GUARD_TOPK_NEIGHBORS", "20"))
+# Extractive inputs above this many sentences, or too big for the sparse
+# graph, are ranked window by window (streaming.py); uploads switch to it
+# while they are being read.
+GUARD_STREAM_SENTENCES = int(os.getenv("GUARD_STREAM_SENTENCES", "60000"))
+GUARD_MAX_BODY_BYTES = int(os.getenv("GUARD_MAX_BODY_BYTES", str(32 * 1024 * 1024)))
+GUARD_SAMPLE_INTERVAL_SEC = float(os.getenv("GUARD_SAMPLE_INTERVAL_SEC", "0.05"))
+
+# Cost model fitted on this code base (hazm preprocessing, TextRank with a
+# networkx graph) on a fully connected worst case; see README.
+TEXT_BYTES_PER_CHAR = 160
+DENSE_BYTES_PER_PAIR = 160
+DENSE_SEC_PER_PAIR = 2.1e-6
+SPARSE_BASE_MB = 80
+SPARSE_BYTES_PER_SENTENCE = 3500
+SPARSE_SEC_PER_PAIR = 5.6e-8
+STREAM_BASE_MB = 40
+STREAM_SEC_PER_SENTENCE = 6e-5
+GENERATE_WORKING_MB = 256
+CHUNK_SUMMARY_TOKENS = 120
+# Used until the adaptive controller has measured real generate() calls.
+DEFAULT_SEC_PER_BEAM_TOKEN = 0.03
+
+_SENTENCE_END_RE = re.compile(r"[.!?؟\n]+")
+
+
+def count_sentences(text: str) -> int:
+    # Cheap upper bound used before the text is actually split.
+    return max(1, len(_SENTENCE_END_RE.findall(text))) if text.strip() else 0
+
+
+def _textrank_cost(num_sentences: int) -> Dict[str, Dict[str, float]]:
+    pairs = num_sentences * num_sentences
+    return {
+        "dense": {
+            "memory_mb": pairs * DENSE_BYTES_PER_PAIR / 1e6,
+            "seconds": pairs * DENSE_SEC_PER_PAIR,
+        },
+        "sparse": {
+            "memory_mb": SPARSE_BASE_MB + num_sentences * SPARSE_BYTES_PER_SENTENCE / 1e6,
+            "seconds": pairs * SPARSE_SEC_PER_PAIR,
+        },
+        "stream": {
+            "memory_mb": STREAM_BASE_MB,
+            "seconds": num_sentences * STREAM_SEC_PER_SENTENCE,
+        },
+    }
+
+
+def _chunks(tokens: float, chunk_size: int, overlap: int) -> int:
+    if tokens <= 0:
+        return 0
+    step = max(1, chunk_size - overlap)
+    return max(1, math.ceil(max(0.0, tokens - overlap) / step))
+
+
+def plan_request(
+    method: str,
+    num_chars: int,
+    num_sentences: int,
+    extractive_ratio: float,
+    chunk_size: int = 850,
+    overlap: int = 120,
+    num_beams: int = 2,
+    presplit: bool = False,
+    streamed: bool = False,
+) -> Dict[str, Any]:
+    tokens = num_chars / CHARS_PER_TOKEN
+    text_mb = 0.0 if presplit else num_chars * TEXT_BYTES_PER_CHAR / 1e6
+    plan: Dict[str, Any] = {
+        "action": "accept",
+        "graph": None,
+        "max_neighbors": None,
+        "prefilter_ratio": None,
+        "extractive_ratio": None,
+        "reason": None,
+        "limit": None,
+    }
+
+    abstractive_tokens = 0.0
+    needs_textrank = method in ("extractive", "hybrid")
+    if method == "abstractive":
+        abstractive_tokens = tokens
+        chunks = _chunks(tokens, chunk_size, overlap)
+        if chunks > GUARD_MAX_CHUNKS:
+            plan["prefilter_ratio"] = round(GUARD_MAX_CHUNKS / chunks, 4)
+            abstractive_tokens = tokens * plan["prefilter_ratio"]
+            needs_textrank = True
+    elif method == "hybrid":
+        abstractive_tokens = tokens * extractive_ratio
+        chunks = _chunks(abstractive_tokens, chunk_size, overlap)
+        if chunks > GUARD_MAX_CHUNKS:
+            plan["extractive_ratio"] = round(max(0.01, extractive_ratio * GUARD_MAX_CHUNKS / chunks), 4)
+            abstractive_tokens = tokens * plan["extractive_ratio"]
+
+    memory_mb = text_mb
+    seconds = 0.0
+    if needs_textrank and num_sentences > 1:
+        cost = _textrank_cost(num_sentences)
+        dense, sparse = cost["dense"], cost["sparse"]
+        if streamed:
+            # An upload that already went to the streaming ranker while read.
+            plan["graph"] = "stream"
+        elif text_mb + dense["memory_mb"] <= GUARD_MEMORY_BUDGET_MB and dense["seconds"] <= GUARD_DENSE_MAX_SEC:
+            plan["graph"] = "dense"
+        elif method == "extractive" and (
+            num_sentences > GUARD_STREAM_SENTENCES
+            or text_mb + sparse["memory_mb"] > GUARD_MEMORY_BUDGET_MB
+            or sparse["seconds"] > GUARD_MAX_SEC
+        ):
+            # Hybrid and pre-filtered abstractive requests need an extract of
+            # a given ratio; the streamed summary is capped in size.
+            plan["graph"] = "stream"
+        else:
+            plan["graph"] = "sparse"
+            plan["max_neighbors"] = GUARD_TOPK_NEIGHBORS
+        memory_mb += cost[plan["graph"]]["memory_mb"]
+        seconds += cost[plan["graph"]]["seconds"]
+
+    final_chunks = _chunks(abstractive_tokens, chunk_size, overlap)
+    if final_chunks:
+        snapshot = get_controller().snapshot()
+        unit = snapshot["p95_sec_per_beam_token"] or DEFAULT_SEC_PER_BEAM_TOKEN
+        # One generate per chunk plus the final pass over the merged summaries.
+        seconds += (final_chunks + 1) * CHUNK_SUMMARY_TOKENS * num_beams * unit
+        memory_mb = max(memory_mb, text_mb + GENERATE_WORKING_MB)
+
+    plan["estimate"] = {
+        "chars": num_chars,
+        "sentences": num_sentences,
+        "tokens": int(tokens),
+        "chunks": final_chunks,
+        # Tokens through generate(): chunk inputs plus every summary produced.
+        "generate_tokens": int(abstractive_tokens + (final_chunks + 1) * CHUNK_SUMMARY_TOKENS) if final_chunks else 0,
+        "memory_mb": round(memory_mb, 1),
+        "seconds": round(seconds, 2),
+    }
+    if memory_mb > GUARD_MEMORY_BUDGET_MB:
+        plan["action"] = "reject"
+        plan["reason"] = "memory"
+        plan["limit"] = GUARD_MEMORY_BUDGET_MB
+    elif seconds > GUARD_MAX_SEC:
+        plan["action"] = "reject"
+        plan["reason"] = "time"
+        plan["limit"] = GUARD_MAX_SEC
+    return plan
+
+
+def _rss_mb() -> Optional[float]:
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError):
+        return None
+
+
+class _RssSampler:
+    """One background thread samples RSS while any request is tracked and
+    raises each tracked request's peak; RSS is per process, so concurrent
+    requests see each other's allocations."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._records: Dict[int, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self) -> None:
+        while True:
+            rss = _rss_mb()
+            with self._lock:
+                if not self._records or rss is None:
+                    self._thread = None
+                    return
+                for record in self._records.values():
+                    record["peak_rss_mb"] = max(record["peak_rss_mb"], rss)
+            time.sleep(self.interval)
+
+    def add(self, record: Dict[str, Any]) -> None:
+        with self._lock:
+            self._records[id(record)] = record
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+                self._thread.start()
+
+    def remove(self, record: Dict[str, Any]) -> None:
+        with self._lock:
+            self._records.pop(id(record), None)
+
+
+_SAMPLER = _RssSampler(GUARD_SAMPLE_INTERVAL_SEC)
+
+
+@contextmanager
+def track_memory() -> Iterator[Dict[str, Any]]:
+    start = _rss_mb()
+    record: Dict[str, Any] = {"start_rss_mb": start, "peak_rss_mb": start, "peak_delta_mb": None}
+    if start is None:
+        yield record
+        return
+    _SAMPLER.add(record)
+    try:
+        yield record
+    finally:
+        _SAMPLER.remove(record)
+        end = _rss_mb() or start
+        record["peak_rss_mb"] = round(max(record["peak_rss_mb"], end), 1)
+        record["start_rss_mb"] = round(start, 1)
+        record["peak_delta_mb"] = round(record["peak_rss_mb"] - start, 1)
@@ -0,0 +1,251 @@
+import os
+import time
+from collections import OrderedDict
+from difflib import SequenceMatcher
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from extractive import (
+    annotate_result,
+    build_summary_result,
+    fit_tfidf,
+    pagerank_sparse,
+    summary_size,
+    textrank_summarize,
+)
+from preprocessing import normalize_text_language, sentence_tokenize
+
+INCREMENTAL_MAX_SESSIONS = int(os.getenv("INCREMENTAL_MAX_SESSIONS", "256"))
+INCREMENTAL_SESSION_TTL_SEC = int(os.getenv("INCREMENTAL_SESSION_TTL_SEC", "3600"))
+# Above this share of changed sentences the frozen TF-IDF vocabulary/idf
+# drifts too far from a fresh fit, so the session is rebuilt from scratch.
+INCREMENTAL_REFIT_RATIO = float(os.getenv("INCREMENTAL_REFIT_RATIO", "0.3"))
+SIMILARITY_THRESHOLD = 0.1
+
+
+class TextRankSession:
+    def __init__(self, lang: str = "fa", segmenter: str = "hazm"):
+        self.lang = lang
+        self.segmenter = segmenter
+        self.lock = Lock()
+        self.updated_at = time.time()
+        self._reset()
+
+    def _reset(self) -> None:
+        self.sentences: List[str] = []
+        self.ids: List[int] = []
+        self.vectorizer = None
+        # TF-IDF rows and the thresholded similarity matrix, both in sentence
+        # order, kept as CSR so an edit only touches the rows it changes.
+        self.tfidf = None
+        self.similarity = None
+        self.scores: Dict[int, float] = {}
+        self.rows_computed = 0
+        self._next_id = 0
+
+    def _new_ids(self, count: int) -> List[int]:
+        ids = list(range(self._next_id, self._next_id + count))
+        self._next_id += count
+        return ids
+
+    def _similarity_rows(self, rows, tfidf, offset: int = 0):
+        # Cosine similarity of `rows` against every sentence of `tfidf` (TF-IDF
+        # rows are L2-normalized); row i is sentence offset + i, whose
+        # self-similarity is dropped.
+        self.rows_computed += rows.shape[0]
+        similarity = (rows @ tfidf.T).tocoo()
+        keep = (similarity.data > SIMILARITY_THRESHOLD) & (similarity.col != similarity.row + offset)
+        return sparse.csr_matrix(
+            (similarity.data[keep], (similarity.row[keep], similarity.col[keep])), shape=similarity.shape
+        )
+
+    def _rebuild(self, sentences: List[str]) -> None:
+        self._reset()
+        self.sentences = sentences
+        self.ids = self._new_ids(len(sentences))
+        if len(sentences) < 2:
+            return
+
+        try:
+            self.vectorizer, tfidf_matrix = fit_tfidf(sentences)
+        except ValueError:
+            self.vectorizer = None
+            return
+
+        self.tfidf = tfidf_matrix.tocsr()
+        self.similarity = self._similarity_rows(self.tfidf, self.tfidf)
+
+    def _apply_edit(self, sentences: List[str], opcodes) -> Dict[str, int]:
+        new_ids: List[int] = []
+        added_ids: List[int] = []
+        added_sentences: List[str] = []
+        removed_ids: List[int] = []
+        kept_positions: List[int] = []
+        # Per new position: ("kept", index into kept_positions) or
+        # ("added", index into added_ids).
+        sources = []
+        self.rows_computed = 0
+
+        for tag, i1, i2, j1, j2 in opcodes:
+            if tag == "equal":
+                new_ids.extend(self.ids[i1:i2])
+                sources.extend(("kept", len(kept_positions) + k) for k in range(i2 - i1))
+                kept_positions.extend(range(i1, i2))
+                continue
+            removed_ids.extend(self.ids[i1:i2])
+            fresh = self._new_ids(j2 - j1)
+            new_ids.extend(fresh)
+            sources.extend(("added", len(added_ids) + k) for k in range(j2 - j1))
+            added_ids.extend(fresh)
+            added_sentences.extend(sentences[j1:j2])
+
+        for sid in removed_ids:
+            self.scores.pop(sid, None)
+
+        kept = np.array(kept_positions, dtype=np.intp)
+        tfidf = self.tfidf[kept]
+        similarity = self.similarity[kept][:, kept]
+        if added_ids:
+            # Only the rows/columns of inserted sentences are computed; they
+            # go after the kept sentences and are moved into place below.
+            m = len(kept_positions)
+            added_matrix = self.vectorizer.transform(added_sentences)
+            tfidf = sparse.vstack([tfidf, added_matrix], format="csr")
+            rows = self._similarity_rows(added_matrix, tfidf, offset=m)
+            similarity = sparse.bmat(
+                [[similarity, rows[:, :m].T], [rows[:, :m], rows[:, m:]]], format="csr"
+            )
+            order = np.array([pos if kind == "kept" else m + pos for kind, pos in sources], dtype=np.intp)
+            tfidf = tfidf[order]
+            similarity = similarity[order][:, order]
+
+        self.tfidf = tfidf
+        self.similarity = similarity
+        self.sentences = sentences
+        self.ids = new_ids
+        return {"added": len(added_ids), "removed": len(removed_ids)}
+
+    def _pagerank(self) -> Dict[int, float]:
+        if self.similarity is None:
+            return {}
+        nstart = None
+        if self.scores:
+            fallback = 1.0 / len(self.ids)
+            nstart = [self.scores.get(sid, fallback) for sid in self.ids]
+        scores = pagerank_sparse(self.similarity, nstart=nstart)
+        return {sid: scores[pos] for pos, sid in enumerate(self.ids)}
+
+    def summarize(
+        self,
+        text: str,
+        summary_ratio: float = 0.3,
+        num_sentences: Optional[int] = None,
+        num_keywords: int = 0,
+        highlights: bool = False,
+    ) -> Dict[str, Any]:
+        text = normalize_text_language(
+            text, lang=self.lang, remove_punct=False, replace_halfspace=False, segmenter=self.segmenter
+        )
+        sentences = sentence_tokenize(text, lang=self.lang, segmenter=self.segmenter)
+        self.updated_at = time.time()
+
+        if len(sentences) < 2:
+            self._rebuild(sentences)
+            result = textrank_summarize(
+                text,
+                summary_ratio=summary_ratio,
+                num_sentences=num_sentences,
+                lang=self.lang,
+                segmenter=self.segmenter,
+                num_keywords=num_keywords,
+                highlights=highlights,
+            )
+            result["incremental"] = {"refit": True, "reused": 0, "added": len(sentences), "removed": 0}
+            return result
+
+        matcher = SequenceMatcher(None, self.sentences, sentences, autojunk=False)
+        opcodes = matcher.get_opcodes()
+        reused = sum(i2 - i1 for tag, i1, i2, _, _ in opcodes if tag == "equal")
+        changed = max(len(self.sentences), len(sentences)) - reused
+        refit = (
+            self.vectorizer is None
+            or not self.sentences
+            or changed / max(1, len(sentences)) > INCREMENTAL_REFIT_RATIO
+        )
+
+        if refit:
+            previous_count = len(self.sentences)
+            self._rebuild(sentences)
+            edit = {"added": len(sentences), "removed": previous_count}
+            reused = 0
+        else:
+            edit = self._apply_edit(sentences, opcodes)
+
+        num_original = len(sentences)
+        self.scores = self._pagerank()
+
+        positions = {sid: pos for pos, sid in enumerate(self.ids)}
+        scores = {positions[sid]: score for sid, score in self.scores.items()}
+        num_summary = summary_size(num_original, summary_ratio, num_sentences)
+
+        result = build_summary_result(text, sentences, scores, num_summary)
+        result["incremental"] = {"refit": refit, "reused": reused, **edit}
+        tfidf = None
+        if num_keywords and self.vectorizer is not None:
+            tfidf = {"vectorizer": self.vectorizer, "matrix": self.tfidf}
+        return annotate_result(result, text, sentences, tfidf, num_keywords, highlights)
+
+
+# Keyed by (owner, document_id) so one tenant cannot reach another's
+# document by guessing its id.
+_SESSIONS: "OrderedDict[Tuple[Optional[str], str], TextRankSession]" = OrderedDict()
+_SESSIONS_LOCK = Lock()
+
+
+def _get_session(document_id: str, lang: str, segmenter: str, owner: Optional[str] = None) -> TextRankSession:
+    cutoff = time.time() - INCREMENTAL_SESSION_TTL_SEC
+    key = (owner, document_id)
+    with _SESSIONS_LOCK:
+        session = _SESSIONS.get(key)
+        if (
+            session is None
+            or session.lang != lang
+            or session.segmenter != segmenter
+            or session.updated_at < cutoff
+        ):
+            session = TextRankSession(lang=lang, segmenter=segmenter)
+            _SESSIONS[key] = session
+        _SESSIONS.move_to_end(key)
+        while len(_SESSIONS) > INCREMENTAL_MAX_SESSIONS:
+            _SESSIONS.popitem(last=False)
+    return session
+
+
+def summarize_incremental(
+    document_id: str,
+    text: str,
+    summary_ratio: float = 0.3,
+    num_sentences: Optional[int] = None,
+    lang: str = "fa",
+    segmenter: str = "hazm",
+    num_keywords: int = 0,
+    highlights: bool = False,
+    owner: Optional[str] = None,
+) -> Dict[str, Any]:
+    session = _get_session(document_id, lang, segmenter, owner)
+    with session.lock:
+        return session.summarize(
+            text,
+            summary_ratio=summary_ratio,
+            num_sentences=num_sentences,
+            num_keywords=num_keywords,
+            highlights=highlights,
+        )
+
+
+def drop_session(document_id: str, owner: Optional[str] = None) -> bool:
+    with _SESSIONS_LOCK:
+        return _SESSIONS.pop((owner, document_id), None) is not None
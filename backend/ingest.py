@@ -0,0 +1,192 @@
+import codecs
+import html
+import os
+import re
+from typing import Any, List, Optional
+
+from pipelines import DEFAULT_LANGUAGE, DETECT_SAMPLE_CHARS, detect_language, get_pipeline
+
+INGEST_MAX_BYTES = int(os.getenv("INGEST_MAX_BYTES", str(20 * 1024 * 1024)))
+# A paragraph break normally ends a segment; without one, text is cut at the
+# last sentence end once this much is pending.
+INGEST_SEGMENT_CHARS = int(os.getenv("INGEST_SEGMENT_CHARS", "65536"))
+
+MARKUP_FORMATS = ("text", "html", "markdown")
+
+_HTML_DROP_RE = re.compile(r"<(script|style|head|noscript)\b.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+_HTML_BLOCK_RE = re.compile(
+    r"<\s*(?:br|/?p|/?div|/?li|/?ul|/?ol|/?h[1-6]|/?tr|/?table|/?section|/?article|/?blockquote)\b[^>]*>",
+    re.IGNORECASE,
+)
+_HTML_TAG_RE = re.compile(r"<[^>]*>")
+_HTML_COMMENT_RE = re.compile(r"<!--.*?-->", re.DOTALL)
+_HTML_SAFE_CUT_RE = re.compile(r"</(?:p|div|li|h[1-6]|tr|blockquote|section|article)\s*>|<br\s*/?>", re.IGNORECASE)
+_HTML_OPEN_DROP_RE = re.compile(r"<(script|style|head|noscript)\b", re.IGNORECASE)
+
+_MD_FENCE_RE = re.compile(r"^[ \t]*(```|~~~).*$", re.MULTILINE)
+_MD_IMAGE_RE = re.compile(r"!\[([^\]]*)\]\([^)]*\)")
+_MD_LINK_RE = re.compile(r"\[([^\]]+)\]\([^)]*\)")
+_MD_PREFIX_RE = re.compile(r"^[ \t]{0,3}(?:#{1,6}\s+|>\s?|[-*+]\s+|\d+[.)]\s+)", re.MULTILINE)
+_MD_EMPHASIS_RE = re.compile(r"(\*\*|__|\*|_|`)(?=\S)(.+?)(?<=\S)\1")
+_MD_RULE_RE = re.compile(r"^[ \t]*([-*_])([ \t]*\1){2,}[ \t]*$", re.MULTILINE)
+
+_SENTENCE_END_CHARS = ".!?؟\n"
+
+
+class PayloadTooLarge(ValueError):
+    pass
+
+
+def markup_from_name(filename: Optional[str], content_type: Optional[str] = None) -> str:
+    name = (filename or "").lower()
+    content_type = (content_type or "").lower()
+    if name.endswith((".html", ".htm")) or "html" in content_type:
+        return "html"
+    if name.endswith((".md", ".markdown")) or "markdown" in content_type:
+        return "markdown"
+    return "text"
+
+
+def strip_markup(text: str, markup: str) -> str:
+    if markup == "html":
+        text = _HTML_COMMENT_RE.sub(" ", text)
+        text = _HTML_DROP_RE.sub(" ", text)
+        text = _HTML_BLOCK_RE.sub("\n\n", text)
+        text = _HTML_TAG_RE.sub(" ", text)
+        return html.unescape(text)
+    if markup == "markdown":
+        text = _MD_FENCE_RE.sub("", text)
+        text = _MD_RULE_RE.sub("", text)
+        text = _MD_IMAGE_RE.sub(r"\1", text)
+        text = _MD_LINK_RE.sub(r"\1", text)
+        text = _MD_PREFIX_RE.sub("", text)
+        return _MD_EMPHASIS_RE.sub(r"\2", text)
+    return text
+
+
+class StreamingIngestor:
+    """Decodes, strips, normalizes and sentence-splits a document segment by
+    segment as bytes arrive; only the undecided tail is kept as raw text."""
+
+    def __init__(
+        self,
+        lang: str = DEFAULT_LANGUAGE,
+        segmenter: str = "hazm",
+        markup: str = "text",
+        max_bytes: int = INGEST_MAX_BYTES,
+    ):
+        if markup not in MARKUP_FORMATS:
+            raise ValueError(f"Unsupported format: {markup}")
+        self.lang = None if lang in (None, "auto") else lang
+        self.segmenter = segmenter
+        self.markup = markup
+        self.max_bytes = max_bytes
+        self.bytes_received = 0
+        self.sentences: List[str] = []
+        self.segments = 0
+        self.num_sentences = 0
+        self.num_chars = 0
+        self.sink: Any = None
+        self.streamed = False
+        self._stream_after = 0
+        self._stream_max_bytes = 0
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._pending = ""
+        self._normalized: List[str] = []
+        self._held: List[str] = []
+
+    def stream_to(self, sink: Any, after_sentences: int, max_bytes: int) -> None:
+        """Once the document has more than after_sentences sentences or
+        outgrows max_bytes of this ingestor, its sentences go to sink.add()
+        instead of being kept, and max_bytes becomes the limit."""
+        self.sink = sink
+        self._stream_after = after_sentences
+        self._stream_max_bytes = max_bytes
+
+    def _start_streaming(self) -> None:
+        self.streamed = True
+        self.max_bytes = self._stream_max_bytes
+        self.sink.add(self.sentences)
+        self.sentences = []
+        self._normalized = []
+
+    def feed(self, chunk: bytes) -> None:
+        self.bytes_received += len(chunk)
+        if self.max_bytes and self.bytes_received > self.max_bytes:
+            if self.sink is None or self.streamed:
+                raise PayloadTooLarge(f"Document exceeds {self.max_bytes} bytes")
+            self._start_streaming()
+            if self.max_bytes and self.bytes_received > self.max_bytes:
+                raise PayloadTooLarge(f"Document exceeds {self.max_bytes} bytes")
+        if self.bytes_received == len(chunk) and chunk.startswith(codecs.BOM_UTF8):
+            chunk = chunk[len(codecs.BOM_UTF8) :]
+        self._pending += self._decoder.decode(chunk)
+        cut = self._cut_point(self._pending)
+        if cut:
+            segment, self._pending = self._pending[:cut], self._pending[cut:]
+            self._process(segment)
+
+    def finish(self) -> None:
+        self._pending += self._decoder.decode(b"", final=True)
+        segment, self._pending = self._pending, ""
+        self._process(segment, final=True)
+
+    @property
+    def text(self) -> str:
+        # Empty once the sentences are streamed; num_chars still counts them.
+        return " ".join(self._normalized)
+
+    def _cut_point(self, buffer: str) -> int:
+        limit = len(buffer)
+        if self.markup == "html":
+            # Never cut inside a tag or a dropped (script/style) block.
+            open_tag = buffer.rfind("<")
+            if open_tag > buffer.rfind(">"):
+                limit = open_tag
+            for match in _HTML_OPEN_DROP_RE.finditer(buffer, 0, limit):
+                if not re.search(rf"</{match.group(1)}\s*>", buffer[match.end() :], re.IGNORECASE):
+                    limit = match.start()
+                    break
+            cut = 0
+            for match in _HTML_SAFE_CUT_RE.finditer(buffer, 0, limit):
+                cut = match.end()
+            if cut and (limit - cut < INGEST_SEGMENT_CHARS or cut >= INGEST_SEGMENT_CHARS):
+                return cut
+            return buffer.rfind(">", 0, limit) + 1 if limit >= INGEST_SEGMENT_CHARS else 0
+        if self.markup == "markdown" and buffer.count("```", 0, limit) % 2:
+            limit = buffer.rfind("```", 0, limit)
+
+        paragraph = buffer.rfind("\n\n", 0, limit)
+        if paragraph >= 0:
+            return paragraph + 2
+        if limit >= INGEST_SEGMENT_CHARS:
+            end = max(buffer.rfind(ch, 0, limit) for ch in _SENTENCE_END_CHARS)
+            return end + 1 if end >= 0 else limit
+        return 0
+
+    def _process(self, segment: str, final: bool = False) -> None:
+        segment = strip_markup(segment, self.markup).strip()
+        if segment:
+            self._held.append(segment)
+        if self.lang is None:
+            # Language is detected once from the first DETECT_SAMPLE_CHARS
+            # characters; segments wait until that much has arrived.
+            if not final and sum(len(part) for part in self._held) < DETECT_SAMPLE_CHARS:
+                return
+            self.lang = detect_language(" ".join(self._held))
+        pipeline = get_pipeline(self.lang)
+        for part in self._held:
+            normalized = pipeline.normalize(part, segmenter=self.segmenter).strip()
+            if normalized:
+                sentences = pipeline.sentences(normalized, segmenter=self.segmenter)
+                self.num_chars += len(normalized) + (1 if self.segments else 0)
+                self.num_sentences += len(sentences)
+                self.segments += 1
+                if self.streamed:
+                    self.sink.add(sentences)
+                else:
+                    self._normalized.append(normalized)
+                    self.sentences.extend(sentences)
+        self._held = []
+        if self.sink is not None and not self.streamed and self.num_sentences > self._stream_after:
+            self._start_streaming()
@@ -0,0 +1,48 @@
+import math
+import os
+from typing import Any, Dict, List
+
+LENGTH_TARGET_MIN = 40
+LENGTH_TARGET_MAX = 600
+MIN_CHUNK_BUDGET = 16
+# Hard cap above the budget: the length-budget processor ends each hypothesis
+# at the first sentence boundary past the budget, this only bounds the overshoot.
+LENGTH_BUDGET_SLACK = float(os.getenv("LENGTH_BUDGET_SLACK", "0.25"))
+LENGTH_MIN_SHARE = float(os.getenv("LENGTH_MIN_SHARE", "0.5"))
+
+
+def _budget(tokens: int) -> Dict[str, int]:
+    return {
+        "budget": tokens,
+        "max_new_tokens": max(tokens, math.ceil(tokens * (1 + LENGTH_BUDGET_SLACK))),
+        "min_new_tokens": max(1, int(tokens * LENGTH_MIN_SHARE)),
+    }
+
+
+def target_tokens(total_tokens: int, length_ratio: float, max_new_tokens_scale: float = 1.0) -> int:
+    target = max(LENGTH_TARGET_MIN, min(LENGTH_TARGET_MAX, int(total_tokens * length_ratio)))
+    if max_new_tokens_scale and max_new_tokens_scale < 1.0:
+        target = max(24, int(target * max_new_tokens_scale))
+    return target
+
+
+def plan_lengths(
+    chunk_token_counts: List[int],
+    total_tokens: int,
+    length_ratio: float,
+    max_new_tokens_scale: float = 1.0,
+) -> Dict[str, Any]:
+    target_total = target_tokens(total_tokens, length_ratio, max_new_tokens_scale)
+    weight = sum(chunk_token_counts) or 1
+
+    chunks = []
+    for count in chunk_token_counts:
+        share = round(target_total * count / weight)
+        # A chunk summary is never planned longer than the chunk itself.
+        chunks.append(_budget(max(MIN_CHUNK_BUDGET, min(count, share))))
+
+    return {
+        "target_total": target_total,
+        "chunks": chunks,
+        "final": _budget(target_total),
+    }
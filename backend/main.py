@@ -1,6 +1,9 @@
+import asyncio
+import json
 import logging
 import os
 import time
+from contextlib import asynccontextmanager
 from threading import Lock
 from uuid import uuid4
 
@@ -13,23 +16,52 @@ if load_dotenv:
     _env_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".env"))
     load_dotenv(_env_path)
 
+from runtime_config import SERVING_PROFILE, apply_blas_limits, export_blas_env
+
+# Thread limits have to be in the environment before numpy/scipy/torch load.
+export_blas_env()
+
+import msgpack
 from fastapi import FastAPI, Request, BackgroundTasks
-from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ValidationError
 from typing import Optional, Literal, List, Dict, Any, Callable
-from preprocessing import sentence_tokenize
+from pipelines import DEFAULT_LANGUAGE, get_pipeline, resolve_language
 from extractive import textrank_summarize
-from abstractive import summarize_long_text
-from evaluation import evaluate_dataset
+from adaptive import get_controller as get_adaptive_controller
+from incremental import summarize_incremental, drop_session
+from dedup import reduce_sentences, save_table as save_boilerplate_table
+from capture import request_shape, should_capture, stop_capture, write_record
+from fairqueue import get_registry, get_scheduler, request_cost, retry_after_header, tenant_context
+from guard import GUARD_MAX_BODY_BYTES, GUARD_STREAM_SENTENCES, count_sentences, plan_request, track_memory
+from ingest import INGEST_MAX_BYTES, MARKUP_FORMATS, PayloadTooLarge, StreamingIngestor, markup_from_name
+from streaming import STREAM_MAX_BYTES, StreamingTextRank, stream_textrank_summarize
+from profiling import current_profile, finish_profile, get_profile, stage, start_profile
+from shared_state import SharedStore
 
 logger = logging.getLogger("summarizer.api")
 logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
 
 EVAL_JOB_TTL_SEC = int(os.getenv("EVAL_JOB_TTL_SEC", "3600"))
+EVAL_JOB_SWEEP_SEC = float(os.getenv("EVAL_JOB_SWEEP_SEC", "60"))
+# Per-sample progress is written to the job store at most this often.
+EVAL_PROGRESS_INTERVAL_SEC = float(os.getenv("EVAL_PROGRESS_INTERVAL_SEC", "0.5"))
+EVAL_EVENTS_KEEPALIVE_SEC = float(os.getenv("EVAL_EVENTS_KEEPALIVE_SEC", "15"))
+# A job run by another serve.py worker cannot wake this one's SSE streams,
+# so they re-read the shared store this often.
+EVAL_EVENTS_POLL_SEC = float(os.getenv("EVAL_EVENTS_POLL_SEC", "1"))
+EVAL_EXPORT_DIR = os.getenv("EVAL_EXPORT_DIR", os.path.join(os.path.dirname(__file__), "eval_exports"))
+EVAL_EXPORT_FORMAT = os.getenv("EVAL_EXPORT_FORMAT", "csv")
 _EVAL_JOBS: Dict[str, Dict[str, Any]] = {}
 _EVAL_JOBS_LOCK = Lock()
-
+# Jobs run in the worker that accepted them; the copy here lets the others
+# answer status and event requests.
+_EVAL_STORE = SharedStore("eval_jobs")
+# SSE subscribers per job, woken from worker threads through the event loop.
+_EVAL_SUBSCRIBERS: Dict[str, List[asyncio.Event]] = {}
+_EVENT_LOOP: Optional[asyncio.AbstractEventLoop] = None
 
 def _get_allowed_origins() -> List[str]:
     raw = os.getenv("ALLOW_ORIGINS", "*")
@@ -38,10 +70,29 @@ def _get_allowed_origins() -> List[str]:
     return [item.strip() for item in raw.split(",") if item.strip()]
 
 
+async def _sweep_eval_jobs() -> None:
+    while True:
+        await asyncio.sleep(EVAL_JOB_SWEEP_SEC)
+        _cleanup_eval_jobs()
+
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    global _EVENT_LOOP
+    apply_blas_limits()
+    _EVENT_LOOP = asyncio.get_running_loop()
+    sweeper = asyncio.create_task(_sweep_eval_jobs())
+    yield
+    sweeper.cancel()
+    save_boilerplate_table()
+    stop_capture()
+
+
 app = FastAPI(
     title="Persian Text Summarization API",
     description="API برای خلاصه‌سازی متون فارسی",
     version=os.getenv("API_VERSION", "1.1.0"),
+    lifespan=_lifespan,
 )
 
 app.add_middleware(
@@ -58,6 +109,40 @@ async def request_context(request: Request, call_next):
     request_id = request.headers.get("x-request-id") or str(uuid4())
     request.state.request_id = request_id
     start_time = time.time()
+    # Oversized JSON bodies are refused before they are read and parsed.
+    declared = request.headers.get("content-length", "")
+    if (
+        request.method == "POST"
+        and request.url.path == "/api/summarize"
+        and GUARD_MAX_BODY_BYTES
+        and declared.isdigit()
+        and int(declared) > GUARD_MAX_BODY_BYTES
+    ):
+        return JSONResponse(
+            status_code=413,
+            content={
+                "ok": False,
+                "error": f"حجم درخواست بیش از حد مجاز ({GUARD_MAX_BODY_BYTES} بایت) است؛ برای اسناد حجیم از /api/summarize/upload استفاده کنید",
+                "request_id": request_id,
+            },
+            headers={"X-Request-Id": request_id},
+        )
+    api_key = request.headers.get("x-api-key")
+    tenant = get_registry().resolve(api_key)
+    if tenant is None and request.url.path.startswith("/api/"):
+        return JSONResponse(
+            status_code=401,
+            content={
+                "ok": False,
+                "error": "کلید API نامعتبر است" if api_key else "کلید API (هدر X-API-Key) لازم است",
+                "request_id": request_id,
+            },
+            headers={"X-Request-Id": request_id},
+        )
+    request.state.tenant = tenant
+    # Sampled requests get their shape filled in by the handler.
+    capture = {} if request.method == "POST" and should_capture(request.url.path, request.headers) else None
+    request.state.capture = capture
     try:
         response = await call_next(request)
     except Exception:
@@ -73,6 +158,22 @@ async def request_context(request: Request, call_next):
     process_time = time.time() - start_time
     response.headers["X-Request-Id"] = request_id
     response.headers["X-Process-Time"] = f"{process_time:.3f}"
+    memory = getattr(request.state, "memory", None)
+    if memory and memory["peak_delta_mb"] is not None:
+        response.headers["X-Memory-Peak-MB"] = f"{memory['peak_rss_mb']:.1f}"
+        response.headers["X-Memory-Delta-MB"] = f"{memory['peak_delta_mb']:.1f}"
+    if capture is not None:
+        write_record(
+            {
+                "ts": round(start_time, 3),
+                "path": request.url.path,
+                "status": response.status_code,
+                "latency_sec": round(process_time, 4),
+                "tenant": tenant.name if tenant else None,
+                "peak_delta_mb": memory["peak_delta_mb"] if memory else None,
+                "request": capture or None,
+            }
+        )
     return response
 
 
@@ -113,6 +214,54 @@ class SummarizeRequest(BaseModel):
         ge=0,
         le=6,
     )
+    abstractive_decoding: Literal["beam", "prompt_lookup", "assisted"] = Field(
+        "beam",
+        description="روش رمزگشایی: beam یا prompt_lookup (حریصانه با prompt lookup؛ روش افزایش سرعت نیست) یا assisted (مدل کمکی)",
+    )
+    abstractive_decoding_scope: Literal["final", "all"] = Field(
+        "final",
+        description="اعمال روش رمزگشایی سریع فقط روی مرحله نهایی یا روی همه چانک‌ها",
+    )
+    adaptive: bool = Field(
+        False,
+        description="تنظیم خودکار پارامترهای تولید بر اساس بار سرور و هدف تأخیر p95",
+    )
+    document_id: Optional[str] = Field(
+        None,
+        description="شناسه سند برای خلاصه‌سازی افزایشی نسخه‌های ویرایش‌شده (فقط مرحله extractive)",
+        max_length=200,
+    )
+    lang: Literal["auto", "fa", "en"] = Field(
+        DEFAULT_LANGUAGE,
+        description="زبان متن: fa (پیش‌فرض)، en یا auto (تشخیص خودکار از روی خط)",
+    )
+    segmenter: Literal["hazm", "fast"] = Field(
+        "hazm",
+        description="جداساز جمله: hazm (نرمال‌سازی کامل) یا fast (regex سریع برای متون تمیز)",
+    )
+    keywords: int = Field(
+        0,
+        ge=0,
+        le=50,
+        description="تعداد کلیدواژه‌های استخراج‌شده از ماتریس TF-IDF و امتیازهای TextRank (0 = غیرفعال)",
+    )
+    highlights: bool = Field(
+        False,
+        description="بازه‌های کاراکتری جملات انتخاب‌شده در متن نرمال‌شده (برای برجسته‌سازی)",
+    )
+    dedup: bool = Field(
+        False,
+        description="حذف جملات تکراری، تقریباً تکراری (SimHash) و متن‌های ثابت (boilerplate) پیش از چانک‌بندی مولد",
+    )
+    source: Optional[str] = Field(
+        None,
+        description="شناسه منبع متن (مثلاً دامنه سایت خبری) برای یادگیری الگوهای boilerplate همان منبع",
+        max_length=200,
+    )
+    detail: Literal["summary", "metrics", "full"] = Field(
+        "full",
+        description="میزان جزئیات پاسخ: summary (فقط خلاصه)، metrics (بدون متن‌های میانی و امتیازها) یا full",
+    )
 
 
 class SummarizeResponse(BaseModel):
@@ -125,7 +274,7 @@ class SummarizeResponse(BaseModel):
     summary_length_sentences: Optional[int] = None
     processing_time_sec: float
     request_id: str
-    extra: dict = None
+    extra: Optional[dict] = None
 
 
 class EvaluateRequest(BaseModel):
@@ -164,10 +313,35 @@ class EvaluateRequest(BaseModel):
         ge=0,
         le=6,
     )
+    abstractive_decoding: Literal["beam", "prompt_lookup", "assisted"] = Field(
+        "beam",
+        description="روش رمزگشایی: beam یا prompt_lookup (حریصانه با prompt lookup؛ روش افزایش سرعت نیست) یا assisted (مدل کمکی)",
+    )
+    abstractive_decoding_scope: Literal["final", "all"] = Field(
+        "final",
+        description="اعمال روش رمزگشایی سریع فقط روی مرحله نهایی یا روی همه چانک‌ها",
+    )
     max_samples: int = Field(30, description="حداکثر تعداد نمونه برای ارزیابی", ge=1, le=1000)
     start_index: int = Field(0, description="شروع از ردیف مشخص", ge=0)
     shuffle: bool = Field(False, description="shuffle ردیف‌ها قبل از ارزیابی")
     seed: int = Field(42, description="seed برای shuffle")
+    lang: Literal["auto", "fa", "en"] = Field(DEFAULT_LANGUAGE, description="زبان دیتاست یا auto")
+    segmenter: Literal["hazm", "fast"] = Field(
+        "hazm",
+        description="جداساز جمله؛ پیکره کامپایل‌شده فقط با همان جداساز استفاده می‌شود",
+    )
+    export_per_sample: bool = Field(
+        False,
+        description="ذخیره امتیاز، زمان و طول هر نمونه در فایل CSV/Parquet",
+    )
+
+
+class EvaluateSweepRequest(EvaluateRequest):
+    grid: Dict[str, List[Any]] = Field(
+        ...,
+        description="مقادیر هر پارامتر برای جستجوی شبکه‌ای، مثلاً {\"abstractive_num_beams\": [1, 2, 4]}",
+    )
+    max_workers: Optional[int] = Field(None, description="تعداد پیکربندی‌های هم‌زمان", ge=1, le=16)
 
 
 class EvaluateResponse(BaseModel):
@@ -177,6 +351,8 @@ class EvaluateResponse(BaseModel):
     avg_gen_len: float
     avg_ref_len: float
     compression_ratio: float
+    confidence_intervals: Optional[Dict[str, Dict[str, float]]] = None
+    per_sample_file: Optional[str] = None
 
 
 class EvaluateAsyncResponse(BaseModel):
@@ -199,6 +375,7 @@ class EvaluateStatusResponse(BaseModel):
     result: Optional[EvaluateResponse] = None
     error: Optional[str] = None
     progress: Optional[EvaluateProgress] = None
+    leaderboard: Optional[List[Dict[str, Any]]] = None
 
 
 def _resolve_dataset_path() -> str:
@@ -208,7 +385,13 @@ def _resolve_dataset_path() -> str:
     return os.getenv("TEST_DATASET_PATH", default_dataset_path)
 
 
-def _build_eval_result(metrics: Dict[str, float], length_metrics: Dict[str, float]) -> Dict[str, float]:
+def _build_eval_result(
+    metrics: Dict[str, float],
+    length_metrics: Dict[str, float],
+    report: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    report = report or {}
+    per_sample_path = report.get("per_sample_path")
     return {
         "rouge1_f1": metrics["rouge1_f1"],
         "rouge2_f1": metrics["rouge2_f1"],
@@ -216,6 +399,8 @@ def _build_eval_result(metrics: Dict[str, float], length_metrics: Dict[str, floa
         "avg_gen_len": length_metrics["avg_gen_len"],
         "avg_ref_len": length_metrics["avg_ref_len"],
         "compression_ratio": length_metrics["compression_ratio"],
+        "confidence_intervals": report.get("confidence_intervals"),
+        "per_sample_file": os.path.basename(per_sample_path) if per_sample_path else None,
     }
 
 
@@ -225,8 +410,11 @@ def _cleanup_eval_jobs() -> None:
     cutoff = time.time() - EVAL_JOB_TTL_SEC
     with _EVAL_JOBS_LOCK:
         for job_id, job in list(_EVAL_JOBS.items()):
-            if job.get("updated_at", 0) < cutoff:
+            if job.get("updated_at", 0) < cutoff and not _EVAL_SUBSCRIBERS.get(job_id):
                 del _EVAL_JOBS[job_id]
+                _EVAL_STORE.delete(job_id)
+    # Copies left behind by a worker that exited.
+    _EVAL_STORE.expire(EVAL_JOB_TTL_SEC)
 
 
 def _set_eval_job(job_id: str, **updates: Any) -> None:
@@ -234,16 +422,56 @@ def _set_eval_job(job_id: str, **updates: Any) -> None:
         current = _EVAL_JOBS.get(job_id, {})
         current.update(updates)
         current["updated_at"] = time.time()
+        current["version"] = current.get("version", 0) + 1
         _EVAL_JOBS[job_id] = current
+        # Written under the lock so an older update never replaces a newer one.
+        _EVAL_STORE.put(job_id, current)
+        subscribers = list(_EVAL_SUBSCRIBERS.get(job_id, ()))
+    if subscribers and _EVENT_LOOP is not None:
+        for event in subscribers:
+            _EVENT_LOOP.call_soon_threadsafe(event.set)
+
+
+def _eval_progress_reporter(job_id: str) -> Callable[[int, int, int, int], None]:
+    last_report = 0.0
+
+    def _progress_cb(processed: int, total: int, samples: int, skipped: int) -> None:
+        nonlocal last_report
+        now = time.monotonic()
+        # Coalesced: the final sample is always reported so the bar reaches 100%.
+        if now - last_report < EVAL_PROGRESS_INTERVAL_SEC and processed != total:
+            return
+        last_report = now
+        percent = round((processed / total) * 100, 2) if total else None
+        _set_eval_job(
+            job_id,
+            progress={
+                "processed": processed,
+                "total": total,
+                "samples": samples,
+                "skipped": skipped,
+                "percent": percent,
+            },
+        )
+
+    return _progress_cb
 
 
 def _run_evaluation(
     request: EvaluateRequest,
     dataset_path: str,
     progress_cb: Optional[Callable[[int, int, int, int], None]] = None,
-) -> Dict[str, float]:
+    export_name: Optional[str] = None,
+) -> Dict[str, Any]:
     extractive_length = request.extractive_length or request.length
     abstractive_length = request.abstractive_length or request.length
+    per_sample_path = None
+    if request.export_per_sample and export_name:
+        per_sample_path = os.path.join(EVAL_EXPORT_DIR, f"{export_name}.{EVAL_EXPORT_FORMAT}")
+    report: Dict[str, Any] = {}
+    # Imported on first use so extractive-only workers never load torch.
+    from evaluation import evaluate_dataset
+
     metrics, length_metrics, _counts = evaluate_dataset(
         dataset_path=dataset_path,
         method=request.method.lower(),
@@ -254,18 +482,236 @@ def _run_evaluation(
         abstractive_length_penalty=request.abstractive_length_penalty,
         abstractive_repetition_penalty=request.abstractive_repetition_penalty,
         abstractive_no_repeat_ngram_size=request.abstractive_no_repeat_ngram_size,
+        abstractive_decoding=request.abstractive_decoding,
+        abstractive_decoding_scope=request.abstractive_decoding_scope,
+        lang=request.lang,
+        segmenter=request.segmenter,
         max_samples=request.max_samples,
         start_index=request.start_index,
         shuffle=request.shuffle,
         seed=request.seed,
         progress_cb=progress_cb,
+        per_sample_path=per_sample_path,
+        report=report,
     )
-    return _build_eval_result(metrics, length_metrics)
+    return _build_eval_result(metrics, length_metrics, report)
+
+
+def _run_abstractive(
+    text: str,
+    ratio: float,
+    gen_settings: Dict[str, Any],
+    adaptive: bool,
+    lang: str = "fa",
+    prefilter_ratio: Optional[float] = None,
+    max_neighbors: Optional[int] = None,
+):
+    from abstractive import summarize_long_text
+
+    controller = get_adaptive_controller()
+    stats: Dict[str, Any] = {}
+    plan = None
+    with controller.track():
+        num_beams = gen_settings["num_beams"]
+        max_new_tokens_scale = 1.0
+        source_text = text
+        if prefilter_ratio:
+            # The guard caps the chunk count of very long inputs.
+            prefiltered = textrank_summarize(
+                text, summary_ratio=prefilter_ratio, lang=lang, max_neighbors=max_neighbors
+            )
+            source_text = prefiltered["summary"] or text
+        if adaptive:
+            plan = controller.plan(num_beams, len(source_text), ratio)
+            num_beams = plan["num_beams"]
+            max_new_tokens_scale = plan["max_new_tokens_scale"]
+            if plan["prefilter_ratio"]:
+                prefiltered = textrank_summarize(
+                    source_text, summary_ratio=plan["prefilter_ratio"], lang=lang, max_neighbors=max_neighbors
+                )
+                source_text = prefiltered["summary"] or text
+                plan["prefilter_input_chars"] = len(source_text)
+
+        # Each generate() call waits for a fair-queue slot (fairqueue.py).
+        final_summary, per_chunk, merged_text = summarize_long_text(
+            source_text,
+            length_ratio=ratio,
+            chunk_num_beams=num_beams,
+            final_num_beams=num_beams,
+            length_penalty=gen_settings["length_penalty"],
+            repetition_penalty=gen_settings["repetition_penalty"],
+            no_repeat_ngram_size=gen_settings["no_repeat_ngram_size"],
+            max_new_tokens_scale=max_new_tokens_scale,
+            stats=stats,
+            chunk_decoding=gen_settings["decoding"] if gen_settings["decoding_scope"] == "all" else "beam",
+            final_decoding=gen_settings["decoding"],
+            **get_pipeline(lang).abstractive_settings(),
+        )
+    controller.record_generation(stats)
+
+    if plan is not None:
+        plan["chunks"] = stats.get("chunks")
+        plan["generated_tokens"] = stats.get("generated_tokens")
+    return final_summary, per_chunk, merged_text, plan
+
+
+def _reduce_input(
+    text: str,
+    sentences: Optional[List[str]],
+    lang: str,
+    segmenter: str,
+    source: Optional[str],
+):
+    from abstractive import get_tokenizer
+
+    pipeline = get_pipeline(lang)
+    tokenizer = get_tokenizer(pipeline.model_name)
+    with stage("dedup"):
+        if sentences is None:
+            sentences = pipeline.sentences(text, segmenter=segmenter)
+        kept, report = reduce_sentences(
+            sentences,
+            source=source,
+            count_tokens=lambda sentence: len(tokenizer.encode(sentence, add_special_tokens=False)),
+        )
+    if not kept:
+        return text, sentences, report
+    return " ".join(kept), kept, report
+
+
+def _run_extractive(
+    text: str,
+    ratio: float,
+    document_id: Optional[str],
+    segmenter: str = "hazm",
+    lang: str = "fa",
+    num_keywords: int = 0,
+    highlights: bool = False,
+    sentences: Optional[List[str]] = None,
+    max_neighbors: Optional[int] = None,
+    graph: Optional[str] = None,
+    ranker: Optional[StreamingTextRank] = None,
+    owner: Optional[str] = None,
+) -> Dict[str, Any]:
+    if ranker is not None:
+        # Streamed uploads were ranked window by window while they were read.
+        return ranker.finish(summary_ratio=ratio)
+    if graph == "stream":
+        return stream_textrank_summarize(text, summary_ratio=ratio, lang=lang, segmenter=segmenter, sentences=sentences)
+    options = {"lang": lang, "segmenter": segmenter, "num_keywords": num_keywords, "highlights": highlights}
+    # The incremental cache keeps a dense similarity matrix, so inputs the
+    # guard routed to the sparse graph bypass it.
+    if document_id and not max_neighbors:
+        return summarize_incremental(document_id, text, summary_ratio=ratio, owner=owner, **options)
+    return textrank_summarize(text, summary_ratio=ratio, sentences=sentences, max_neighbors=max_neighbors, **options)
+
+
+def _add_annotations(extra: Dict[str, Any], result: Dict[str, Any], text: str) -> None:
+    if "keywords" in result:
+        extra["keywords"] = result["keywords"]
+    if "highlights" in result:
+        extra["highlights"] = result["highlights"]
+        # Spans index the normalized text; only ship it when it differs.
+        if result["original_text"] != text:
+            extra["highlight_text"] = result["original_text"]
+
+
+_MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+
+
+def _accept_quality(accept: str, media_types) -> tuple:
+    # (q, specificity) of the most specific Accept range matching any of
+    # media_types; exact types beat type/* which beats */*.
+    best = (0.0, -1)
+    for item in accept.split(","):
+        media, *params = [part.strip() for part in item.split(";")]
+        media = media.lower()
+        if not media:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        for media_type in media_types:
+            if media == media_type:
+                specificity = 2
+            elif media == media_type.split("/")[0] + "/*":
+                specificity = 1
+            elif media == "*/*":
+                specificity = 0
+            else:
+                continue
+            if specificity > best[1]:
+                best = (q, specificity)
+    return best
+
+
+def _wants_msgpack(accept: str) -> bool:
+    # JSON stays the default unless msgpack is preferred over it.
+    packed = _accept_quality(accept, _MSGPACK_MEDIA_TYPES)
+    return packed[0] > 0 and packed > _accept_quality(accept, ("application/json",))
+
+
+def _encode_response(response: SummarizeResponse, http_request: Request):
+    profile = current_profile()
+    if profile is not None:
+        response.extra = response.extra or {}
+        response.extra["profile"] = profile.summary()
+
+    if _wants_msgpack(http_request.headers.get("accept", "")):
+        payload = msgpack.packb(response.model_dump(exclude_none=True), use_bin_type=True)
+        return Response(content=payload, media_type="application/msgpack")
+    return response
+
+
+def _profile_error(methods: List[str]) -> Optional[str]:
+    if SERVING_PROFILE == "extractive" and any(method != "extractive" for method in methods):
+        return "این سرور فقط برای خلاصه‌سازی استخراجی (SERVING_PROFILE=extractive) پیکربندی شده است"
+    return None
+
+
+def _guard_extra(plan: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "graph": plan["graph"],
+        "prefilter_ratio": plan["prefilter_ratio"],
+        "extractive_ratio": plan["extractive_ratio"],
+        "estimate": plan["estimate"],
+        "cost": round(plan["cost"], 1),
+    }
+
+
+def _guard_error(plan: Dict[str, Any]) -> str:
+    estimate = plan["estimate"]
+    if plan["reason"] == "memory":
+        return (
+            f"این متن برای پردازش بیش از حد بزرگ است: حافظه تخمینی {estimate['memory_mb']:.0f} مگابایت "
+            f"از سقف {plan['limit']:.0f} مگابایت بیشتر است"
+        )
+    return (
+        f"این متن برای پردازش بیش از حد بزرگ است: زمان تخمینی {estimate['seconds']:.0f} ثانیه "
+        f"از سقف {plan['limit']:.0f} ثانیه بیشتر است"
+    )
+
+
+def _decoding_error(decoding: str) -> Optional[str]:
+    if decoding != "assisted":
+        return None
+    from abstractive import draft_model_configured
+
+    if not draft_model_configured():
+        return "برای رمزگشایی assisted باید مدل کمکی با ABSTRACTIVE_DRAFT_MODEL تنظیم شود"
+    return None
+
 
 @app.get("/")
 def root():
     return {
         "message": "Persian Summarization API is running.",
+        "profile": SERVING_PROFILE,
         "endpoints": {
             "docs": "/docs",
             "summarize": "/api/summarize"
@@ -280,18 +726,67 @@ def healthz():
 
 @app.get("/readyz")
 def readyz():
-    return {"status": "ready"}
+    return {"status": "ready", "profile": SERVING_PROFILE}
+
+
+@app.get("/api/profiles/{profile_id}")
+def download_profile(profile_id: str, format: Literal["speedscope", "collapsed", "torch", "stages"] = "speedscope"):
+    profile = get_profile(profile_id)
+    if profile is None:
+        return JSONResponse(
+            status_code=404,
+            content={"error": "پروفایل پیدا نشد"},
+        )
+
+    if format == "collapsed":
+        return PlainTextResponse(profile.collapsed())
+    if format == "torch":
+        return profile.torch_trace()
+    if format == "stages":
+        return profile.summary()
+    return JSONResponse(
+        content=profile.speedscope(),
+        headers={"Content-Disposition": f'attachment; filename="{profile_id}.speedscope.json"'},
+    )
+
+
+@app.get("/api/usage")
+def tenant_usage(http_request: Request):
+    registry = get_registry()
+    tenant = getattr(http_request.state, "tenant", None) or registry.resolve(None)
+    # Tenants see their own counters unless they are admins or no keys are configured.
+    names = None if tenant.admin or not registry.configured else [tenant.name]
+    return {"tenant": tenant.name, "scheduler": get_scheduler().stats(), "tenants": registry.usage(names)}
+
+
+@app.delete("/api/documents/{document_id}")
+def delete_document_session(document_id: str, http_request: Request):
+    # Sessions are per tenant; another tenant's document with the same id is untouched.
+    tenant = getattr(http_request.state, "tenant", None) or get_registry().resolve(None)
+    return {"ok": True, "deleted": drop_session(document_id, owner=tenant.name)}
+
+
+@app.get("/api/adaptive")
+def adaptive_status():
+    controller = get_adaptive_controller()
+    return {
+        "target_p95_sec": controller.target_p95_sec,
+        **controller.snapshot(),
+    }
 
 
 @app.post("/api/evaluate", response_model=EvaluateResponse)
 def evaluate(request: EvaluateRequest, http_request: Request):
     start_time = time.time()
     request_id = getattr(http_request.state, "request_id", str(uuid4()))
+    profile_error = _profile_error([request.method])
+    if profile_error:
+        return JSONResponse(status_code=400, content={"error": profile_error})
 
     dataset_path = _resolve_dataset_path()
 
     try:
-        result = _run_evaluation(request, dataset_path)
+        result = _run_evaluation(request, dataset_path, export_name=request_id)
     except FileNotFoundError:
         return JSONResponse(
             status_code=404,
@@ -313,10 +808,13 @@ def evaluate_async(
     http_request: Request,
 ):
     request_id = getattr(http_request.state, "request_id", str(uuid4()))
+    profile_error = _profile_error([request.method])
+    if profile_error:
+        return JSONResponse(status_code=400, content={"error": profile_error})
+
     job_id = str(uuid4())
     payload = request.model_dump()
 
-    _cleanup_eval_jobs()
     _set_eval_job(
         job_id,
         status="queued",
@@ -330,21 +828,10 @@ def evaluate_async(
         _set_eval_job(job_id, status="running", started_at=time.time())
         dataset_path = _resolve_dataset_path()
 
-        def _progress_cb(processed: int, total: int, samples: int, skipped: int) -> None:
-            percent = round((processed / total) * 100, 2) if total else None
-            _set_eval_job(
-                job_id,
-                progress={
-                    "processed": processed,
-                    "total": total,
-                    "samples": samples,
-                    "skipped": skipped,
-                    "percent": percent,
-                },
-            )
-
         try:
-            result = _run_evaluation(request, dataset_path, progress_cb=_progress_cb)
+            result = _run_evaluation(
+                request, dataset_path, progress_cb=_eval_progress_reporter(job_id), export_name=job_id
+            )
         except FileNotFoundError:
             _set_eval_job(job_id, status="failed", error="فایل دیتاست پیدا نشد", finished_at=time.time())
             return
@@ -363,18 +850,88 @@ def evaluate_async(
     return EvaluateAsyncResponse(job_id=job_id, status="queued")
 
 
-@app.get("/api/evaluate/status/{job_id}", response_model=EvaluateStatusResponse)
-def evaluate_status(job_id: str):
-    _cleanup_eval_jobs()
-    with _EVAL_JOBS_LOCK:
-        job = _EVAL_JOBS.get(job_id)
+@app.post("/api/evaluate/sweep/async", response_model=EvaluateAsyncResponse)
+def evaluate_sweep_async(
+    request: EvaluateSweepRequest,
+    background_tasks: BackgroundTasks,
+    http_request: Request,
+):
+    from sweep import SWEEPABLE_PARAMS, run_sweep
 
-    if not job:
+    request_id = getattr(http_request.state, "request_id", str(uuid4()))
+    unknown = sorted(set(request.grid) - set(SWEEPABLE_PARAMS))
+    if unknown:
         return JSONResponse(
-            status_code=404,
-            content={"error": "شناسه ارزیابی پیدا نشد"},
+            status_code=400,
+            content={"error": f"پارامتر نامعتبر برای جستجو: {', '.join(unknown)}"},
+        )
+    profile_error = _profile_error(request.grid.get("method") or [request.method])
+    if profile_error:
+        return JSONResponse(status_code=400, content={"error": profile_error})
+
+    job_id = str(uuid4())
+    _set_eval_job(
+        job_id,
+        status="queued",
+        request_id=request_id,
+        payload=request.model_dump(),
+        progress={"processed": 0, "total": None, "samples": 0, "skipped": 0, "percent": 0.0},
+        created_at=time.time(),
+    )
+
+    def _runner(job_id: str, request: EvaluateSweepRequest) -> None:
+        _set_eval_job(job_id, status="running", started_at=time.time())
+
+        report_progress = _eval_progress_reporter(job_id)
+
+        def _progress_cb(processed: int, total: int, configs_done: int, configs: int) -> None:
+            report_progress(processed, total, configs_done, 0)
+
+        base = request.model_dump(include=set(SWEEPABLE_PARAMS))
+        per_sample_path = None
+        if request.export_per_sample:
+            per_sample_path = os.path.join(EVAL_EXPORT_DIR, f"{job_id}.{EVAL_EXPORT_FORMAT}")
+        try:
+            leaderboard = run_sweep(
+                _resolve_dataset_path(),
+                base=base,
+                grid=request.grid,
+                max_samples=request.max_samples,
+                start_index=request.start_index,
+                shuffle=request.shuffle,
+                seed=request.seed,
+                max_workers=request.max_workers,
+                progress_cb=_progress_cb,
+                segmenter=request.segmenter,
+                per_sample_path=per_sample_path,
+            )
+        except FileNotFoundError:
+            _set_eval_job(job_id, status="failed", error="فایل دیتاست پیدا نشد", finished_at=time.time())
+            return
+        except ValueError as exc:
+            _set_eval_job(job_id, status="failed", error=str(exc), finished_at=time.time())
+            return
+        except Exception:
+            logger.exception("Evaluation sweep failed")
+            _set_eval_job(job_id, status="failed", error="خطای داخلی سرور", finished_at=time.time())
+            return
+
+        best = leaderboard[0]
+        result = {key: best[key] for key in EvaluateResponse.model_fields if key in best}
+        _set_eval_job(
+            job_id,
+            status="completed",
+            result=result,
+            leaderboard=leaderboard,
+            finished_at=time.time(),
         )
 
+    background_tasks.add_task(_runner, job_id, request)
+
+    return EvaluateAsyncResponse(job_id=job_id, status="queued")
+
+
+def _eval_job_status(job: Dict[str, Any]) -> EvaluateStatusResponse:
     status = job.get("status", "queued")
     if status == "completed":
         result = job.get("result") or {}
@@ -383,6 +940,7 @@ def evaluate_status(job_id: str):
             status="completed",
             result=EvaluateResponse(**result),
             progress=EvaluateProgress(**progress) if progress else None,
+            leaderboard=job.get("leaderboard"),
         )
 
     if status == "failed":
@@ -400,15 +958,332 @@ def evaluate_status(job_id: str):
     )
 
 
+def _get_eval_job(job_id: str) -> Optional[Dict[str, Any]]:
+    with _EVAL_JOBS_LOCK:
+        job = _EVAL_JOBS.get(job_id)
+        if job:
+            return dict(job)
+    return _EVAL_STORE.get(job_id)
+
+
+def _is_local_eval_job(job_id: str) -> bool:
+    with _EVAL_JOBS_LOCK:
+        return job_id in _EVAL_JOBS
+
+
+@app.get("/api/evaluate/status/{job_id}", response_model=EvaluateStatusResponse)
+def evaluate_status(job_id: str):
+    job = _get_eval_job(job_id)
+    if not job:
+        return JSONResponse(
+            status_code=404,
+            content={"error": "شناسه ارزیابی پیدا نشد"},
+        )
+    return _eval_job_status(job)
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.get("/api/evaluate/events/{job_id}")
+async def evaluate_events(job_id: str, http_request: Request):
+    if _get_eval_job(job_id) is None:
+        return JSONResponse(
+            status_code=404,
+            content={"error": "شناسه ارزیابی پیدا نشد"},
+        )
+
+    wakeup = asyncio.Event()
+    with _EVAL_JOBS_LOCK:
+        _EVAL_SUBSCRIBERS.setdefault(job_id, []).append(wakeup)
+
+    async def _stream():
+        last_version = None
+        last_sent = time.monotonic()
+        try:
+            while True:
+                # Cleared before reading so an update landing in between
+                # still wakes the next wait.
+                wakeup.clear()
+                job = _get_eval_job(job_id)
+                if job is None:
+                    yield _sse("failed", {"status": "failed", "error": "شناسه ارزیابی پیدا نشد"})
+                    return
+                if job.get("version") != last_version:
+                    last_version = job.get("version")
+                    status = _eval_job_status(job)
+                    event = status.status if status.status in ("completed", "failed") else "progress"
+                    yield _sse(event, status.model_dump(exclude_none=True))
+                    last_sent = time.monotonic()
+                    if event != "progress":
+                        return
+                if await http_request.is_disconnected():
+                    return
+                timeout = EVAL_EVENTS_KEEPALIVE_SEC
+                if not _is_local_eval_job(job_id):
+                    timeout = min(timeout, EVAL_EVENTS_POLL_SEC)
+                try:
+                    await asyncio.wait_for(wakeup.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    if time.monotonic() - last_sent >= EVAL_EVENTS_KEEPALIVE_SEC:
+                        last_sent = time.monotonic()
+                        yield ": keepalive\n\n"
+        finally:
+            with _EVAL_JOBS_LOCK:
+                subscribers = _EVAL_SUBSCRIBERS.get(job_id, [])
+                if wakeup in subscribers:
+                    subscribers.remove(wakeup)
+                if not subscribers:
+                    _EVAL_SUBSCRIBERS.pop(job_id, None)
+
+    return StreamingResponse(
+        _stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/api/evaluate/samples/{file_name}")
+def evaluate_samples(file_name: str):
+    path = os.path.join(EVAL_EXPORT_DIR, os.path.basename(file_name))
+    if not os.path.isfile(path):
+        return JSONResponse(
+            status_code=404,
+            content={"error": "فایل نتایج نمونه‌ها پیدا نشد"},
+        )
+    return FileResponse(path, filename=os.path.basename(path))
+
+
 @app.post("/api/summarize", response_model=SummarizeResponse)
-def summarize(request: SummarizeRequest, http_request: Request):
-    start_time = time.time()
+def summarize(request: SummarizeRequest, http_request: Request, http_response: Response):
     request_id = getattr(http_request.state, "request_id", str(uuid4()))
+    return _summarize_profiled(request, http_request, http_response, request_id)
+
+
+def _summarize_profiled(
+    request: SummarizeRequest,
+    http_request: Request,
+    http_response: Response,
+    request_id: str,
+    ingested: Optional[StreamingIngestor] = None,
+):
+    capture = getattr(http_request.state, "capture", None)
+    if capture is not None:
+        text = ingested.text if ingested is not None else request.text
+        capture.update(request_shape(request.model_dump(), text, ingested.sentences if ingested is not None else None))
+        if ingested is not None and ingested.streamed:
+            # Streamed text is no longer held; only its size is recorded.
+            capture.pop("text_sha256", None)
+            capture.pop("text", None)
+            capture.update(text_chars=ingested.num_chars, text_sentences=ingested.num_sentences)
+    with track_memory() as memory, tenant_context(getattr(http_request.state, "tenant", None)):
+        http_request.state.memory = memory
+        # Stored profiles are fetched by id, so it is generated here rather
+        # than taken from the client-supplied X-Request-Id.
+        profile = start_profile(str(uuid4()), http_request.headers.get("x-profile"))
+        try:
+            result = _summarize(request, http_request, request_id, ingested)
+        finally:
+            if profile is not None:
+                finish_profile(profile)
+    guard_plan = getattr(http_request.state, "guard_plan", None)
+    if guard_plan and memory["peak_delta_mb"] is not None:
+        logger.info(
+            "request %s graph=%s estimated_mb=%s peak_delta_mb=%s",
+            request_id,
+            guard_plan["graph"],
+            guard_plan["estimate"]["memory_mb"],
+            memory["peak_delta_mb"],
+        )
+    if profile is None:
+        return result
+
+    target = result if isinstance(result, Response) else http_response
+    target.headers["X-Profile-Id"] = profile.profile_id
+    return result
+
+
+_MULTIPART_OVERHEAD_BYTES = 64 * 1024
+_UPLOAD_CONTENT_TYPES = ("text/", "application/octet-stream")
+
+
+async def _ingest_multipart(
+    http_request: Request,
+    content_type: str,
+    lang: str,
+    segmenter: str,
+    markup: Optional[str],
+    ranker: Optional[StreamingTextRank] = None,
+    max_bytes: int = 0,
+) -> StreamingIngestor:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+
+    _, options = parse_options_header(content_type)
+    boundary = options.get(b"boundary")
+    if not boundary:
+        raise ValueError("Missing multipart boundary")
+
+    state: Dict[str, Any] = {"ingestor": None, "active": False, "headers": {}, "field": b"", "value": b""}
+    pending: List[bytes] = []
+
+    def on_part_begin() -> None:
+        state["headers"] = {}
+
+    def on_header_field(data: bytes, start: int, end: int) -> None:
+        state["field"] += data[start:end]
+
+    def on_header_value(data: bytes, start: int, end: int) -> None:
+        state["value"] += data[start:end]
+
+    def on_header_end() -> None:
+        state["headers"][state["field"].lower()] = state["value"]
+        state["field"] = state["value"] = b""
+
+    def on_headers_finished() -> None:
+        _, disposition = parse_options_header(state["headers"].get(b"content-disposition", b""))
+        filename = disposition.get(b"filename")
+        # The first file part is the document; other form fields are ignored.
+        state["active"] = state["ingestor"] is None and (filename is not None or disposition.get(b"name") == b"file")
+        if state["active"]:
+            part_type = state["headers"].get(b"content-type", b"").decode("latin-1")
+            state["ingestor"] = StreamingIngestor(
+                lang=lang,
+                segmenter=segmenter,
+                markup=markup or markup_from_name(filename.decode("utf-8", "replace") if filename else None, part_type),
+            )
+            if ranker is not None:
+                state["ingestor"].stream_to(ranker, GUARD_STREAM_SENTENCES, max_bytes)
+
+    def on_part_data(data: bytes, start: int, end: int) -> None:
+        if state["active"]:
+            pending.append(bytes(data[start:end]))
+
+    def on_part_end() -> None:
+        state["active"] = False
+
+    parser = MultipartParser(
+        boundary,
+        {
+            "on_part_begin": on_part_begin,
+            "on_header_field": on_header_field,
+            "on_header_value": on_header_value,
+            "on_header_end": on_header_end,
+            "on_headers_finished": on_headers_finished,
+            "on_part_data": on_part_data,
+            "on_part_end": on_part_end,
+        },
+    )
+    async for chunk in http_request.stream():
+        parser.write(chunk)
+        if pending:
+            data, pending[:] = b"".join(pending), []
+            await run_in_threadpool(state["ingestor"].feed, data)
+    parser.finalize()
+
+    if state["ingestor"] is None:
+        raise ValueError("فایلی در درخواست ارسال نشده است")
+    if pending:
+        await run_in_threadpool(state["ingestor"].feed, b"".join(pending))
+    return state["ingestor"]
+
+
+@app.post("/api/summarize/upload", response_model=SummarizeResponse)
+async def summarize_upload(http_request: Request, http_response: Response):
+    request_id = getattr(http_request.state, "request_id", str(uuid4()))
+    params = dict(http_request.query_params)
+    markup = params.pop("format", "auto")
+    if markup != "auto" and markup not in MARKUP_FORMATS:
+        return JSONResponse(
+            status_code=400,
+            content={"ok": False, "error": f"قالب نامعتبر: {markup}", "request_id": request_id},
+        )
+    try:
+        request = SummarizeRequest(text="", **params)
+    except ValidationError as exc:
+        return JSONResponse(
+            status_code=422,
+            content={"ok": False, "error": "پارامترهای نامعتبر", "detail": json.loads(exc.json()), "request_id": request_id},
+        )
+
+    profile_error = _profile_error([request.method])
+    if profile_error:
+        return JSONResponse(
+            status_code=400,
+            content={"ok": False, "error": profile_error, "request_id": request_id},
+        )
+
+    content_type = http_request.headers.get("content-type", "text/plain")
+    multipart = content_type.startswith("multipart/form-data")
+    if not multipart and not content_type.startswith(_UPLOAD_CONTENT_TYPES):
+        return JSONResponse(
+            status_code=415,
+            content={"ok": False, "error": f"نوع محتوای {content_type} پشتیبانی نمی‌شود", "request_id": request_id},
+        )
+    # Plain extractive uploads switch to window-by-window ranking once they
+    # are too long to keep, so they may be larger.
+    ranker = None
+    max_bytes = INGEST_MAX_BYTES
+    if request.method == "extractive" and not request.document_id:
+        ranker = StreamingTextRank()
+        max_bytes = max(INGEST_MAX_BYTES, STREAM_MAX_BYTES) if INGEST_MAX_BYTES and STREAM_MAX_BYTES else 0
+    declared = http_request.headers.get("content-length", "")
+    limit = max_bytes + (_MULTIPART_OVERHEAD_BYTES if multipart else 0)
+    too_large = JSONResponse(
+        status_code=413,
+        content={"ok": False, "error": f"حجم سند بیش از حد مجاز ({max_bytes} بایت) است", "request_id": request_id},
+    )
+    # Rejected before reading the body when the client declares its size.
+    if max_bytes and declared.isdigit() and int(declared) > limit:
+        return too_large
+
+    try:
+        if multipart:
+            ingestor = await _ingest_multipart(
+                http_request,
+                content_type,
+                request.lang,
+                request.segmenter,
+                None if markup == "auto" else markup,
+                ranker,
+                max_bytes,
+            )
+        else:
+            ingestor = StreamingIngestor(
+                lang=request.lang,
+                segmenter=request.segmenter,
+                markup=markup_from_name(None, content_type) if markup == "auto" else markup,
+            )
+            if ranker is not None:
+                ingestor.stream_to(ranker, GUARD_STREAM_SENTENCES, max_bytes)
+            async for chunk in http_request.stream():
+                await run_in_threadpool(ingestor.feed, chunk)
+        await run_in_threadpool(ingestor.finish)
+    except PayloadTooLarge:
+        return too_large
+    except ValueError as exc:
+        return JSONResponse(
+            status_code=400,
+            content={"ok": False, "error": str(exc), "request_id": request_id},
+        )
+
+    return await run_in_threadpool(_summarize_profiled, request, http_request, http_response, request_id, ingestor)
+
+
+def _summarize(
+    request: SummarizeRequest,
+    http_request: Request,
+    request_id: str,
+    ingested: Optional[StreamingIngestor] = None,
+):
+    start_time = time.time()
     
-    text = request.text or ""
-    text = text.strip()
+    # Streamed uploads arrive already normalized and split into sentences.
+    text = ingested.text if ingested is not None else (request.text or "").strip()
+    num_chars = ingested.num_chars if ingested is not None else len(text)
+    ranker = ingested.sink if ingested is not None and ingested.streamed else None
     
-    if not text:
+    if not num_chars:
         return {
             "summary": "",
             "method": request.method,
@@ -423,44 +1298,143 @@ def summarize(request: SummarizeRequest, http_request: Request):
         }
     
     method = request.method.lower()
+    detail = request.detail
+    segmenter = request.segmenter
+    lang = ingested.lang if ingested is not None else resolve_language(request.lang, text)
+    pipeline = get_pipeline(lang)
+    sentences = ingested.sentences if ingested is not None else None
     extractive_length = request.extractive_length or request.length
     abstractive_length = request.abstractive_length or request.length
+
+    profile_error = _profile_error([method])
+    if profile_error:
+        return JSONResponse(
+            status_code=400,
+            content={"ok": False, "error": profile_error, "request_id": request_id},
+        )
+
+    decoding_error = _decoding_error(request.abstractive_decoding) if method != "extractive" else None
+    if decoding_error:
+        return JSONResponse(
+            status_code=400,
+            content={"ok": False, "error": decoding_error, "request_id": request_id},
+        )
+
+    # Memory and time are predicted from cheap counts before any heavy work.
+    with stage("guard"):
+        guard_plan = plan_request(
+            method,
+            num_chars,
+            ingested.num_sentences if ingested is not None else count_sentences(text),
+            max(0.05, min(0.9, extractive_length / 100)),
+            chunk_size=pipeline.chunk_size,
+            overlap=pipeline.overlap,
+            num_beams=request.abstractive_num_beams,
+            presplit=sentences is not None,
+            streamed=ranker is not None,
+        )
+    http_request.state.guard_plan = guard_plan
+    if guard_plan["action"] == "reject":
+        return JSONResponse(
+            status_code=413,
+            content={
+                "ok": False,
+                "error": _guard_error(guard_plan),
+                "estimate": guard_plan["estimate"],
+                "request_id": request_id,
+            },
+        )
+    max_neighbors = guard_plan["max_neighbors"]
+
+    # Rate limits are priced by estimated work, not by request count.
+    guard_plan["cost"] = request_cost(method, guard_plan["estimate"], request.abstractive_num_beams)
+    tenant = getattr(http_request.state, "tenant", None) or get_registry().resolve(None)
+    wait = tenant.admit(guard_plan["cost"])
+    if wait > 0:
+        return JSONResponse(
+            status_code=429,
+            content={
+                "ok": False,
+                "error": "سهمیه پردازش این کلید API موقتاً تمام شده است؛ بعداً دوباره تلاش کنید",
+                "retry_after_sec": round(wait, 1),
+                "cost": round(guard_plan["cost"], 1),
+                "request_id": request_id,
+            },
+            headers={"Retry-After": retry_after_header(wait)},
+        )
     
-    orig_sentences = sentence_tokenize(text)
-    num_orig = len(orig_sentences)
+    # Repeated sentences and boilerplate are dropped before anything is chunked.
+    source_text, source_sentences, dedup_report = text, sentences, None
+    if request.dedup and method != "extractive":
+        source_text, source_sentences, dedup_report = _reduce_input(text, sentences, lang, segmenter, request.source)
+
+    # Splitting the whole input again is only needed for the reported count.
+    with stage("sentence_count"):
+        if dedup_report is not None:
+            num_orig = dedup_report["sentences_in"]
+        elif ingested is not None:
+            num_orig = ingested.num_sentences
+        else:
+            num_orig = len(pipeline.sentences(text, segmenter=segmenter)) if detail != "summary" else None
 
     if method == "extractive":
         ratio = max(0.05, min(0.9, extractive_length / 100))
-        result = textrank_summarize(text, summary_ratio=ratio)
+        result = _run_extractive(
+            text,
+            ratio,
+            request.document_id,
+            segmenter,
+            lang,
+            request.keywords,
+            request.highlights,
+            sentences,
+            max_neighbors,
+            guard_plan["graph"],
+            ranker,
+            owner=tenant.name,
+        )
         
         summary_text = result["summary"]
         num_sum = result["num_summary_sentences"]
-        extra = {
-            "metrics": {
-                "requested_length_ratio": ratio,
-                "extractive_ratio": result["summary_ratio"],
-                "extractive_sentences": num_sum,
-            },
-            "summary_ratio": result["summary_ratio"],
-            "selected_indices": result["selected_indices"],
-            "scores": result.get("scores", {}),
-            "provider": "local",
-            "model": "TextRank",
-        }
+        extra = None
+        if detail != "summary":
+            extra = {
+                "metrics": {
+                    "requested_length_ratio": ratio,
+                    "extractive_ratio": result["summary_ratio"],
+                    "extractive_sentences": num_sum,
+                },
+                "summary_ratio": result["summary_ratio"],
+                "selected_indices": result["selected_indices"],
+                "provider": "local",
+                "lang": lang,
+                "model": "TextRank",
+            }
+            if detail == "full":
+                extra["scores"] = {str(idx): score for idx, score in result.get("scores", {}).items()}
+            if "incremental" in result:
+                extra["incremental"] = result["incremental"]
+            if "streaming" in result:
+                extra["streaming"] = result["streaming"]
+            _add_annotations(extra, result, text)
+            extra["guard"] = _guard_extra(guard_plan)
 
         end_time = time.time()
 
-        return SummarizeResponse(
-            ok=True,
-            summary=summary_text,
-            method=method,
-            original_length_chars=len(text),
-            original_length_sentences=num_orig,
-            summary_length_chars=len(summary_text),
-            summary_length_sentences=num_sum,
-            processing_time_sec=round(end_time - start_time, 3),
-            request_id=request_id,
-            extra=extra,
+        return _encode_response(
+            SummarizeResponse(
+                ok=True,
+                summary=summary_text,
+                method=method,
+                original_length_chars=num_chars,
+                original_length_sentences=num_orig,
+                summary_length_chars=len(summary_text),
+                summary_length_sentences=num_sum,
+                processing_time_sec=round(end_time - start_time, 3),
+                request_id=request_id,
+                extra=extra,
+            ),
+            http_request,
         )
     
     elif method == "abstractive":
@@ -470,51 +1444,75 @@ def summarize(request: SummarizeRequest, http_request: Request):
             "length_penalty": request.abstractive_length_penalty,
             "repetition_penalty": request.abstractive_repetition_penalty,
             "no_repeat_ngram_size": request.abstractive_no_repeat_ngram_size,
+            "decoding": request.abstractive_decoding,
+            "decoding_scope": request.abstractive_decoding_scope,
         }
-        final_summary, per_chunk, merged_text = summarize_long_text(
-            text,
-            length_ratio=ratio,
-            chunk_num_beams=gen_settings["num_beams"],
-            final_num_beams=gen_settings["num_beams"],
-            length_penalty=gen_settings["length_penalty"],
-            repetition_penalty=gen_settings["repetition_penalty"],
-            no_repeat_ngram_size=gen_settings["no_repeat_ngram_size"],
+        final_summary, per_chunk, merged_text, adaptive_plan = _run_abstractive(
+            source_text,
+            ratio,
+            gen_settings,
+            request.adaptive,
+            lang,
+            prefilter_ratio=guard_plan["prefilter_ratio"],
+            max_neighbors=max_neighbors,
         )
-        summary_sentences = sentence_tokenize(final_summary)
-        num_sum = len(summary_sentences)
+        num_sum = len(pipeline.sentences(final_summary, segmenter=segmenter)) if detail != "summary" else None
         summary_text = final_summary
-        extra = {
-            "metrics": {
-                "requested_length_ratio": ratio,
-                "abstractive_input_chars": len(text),
-                "abstractive_target_ratio": ratio,
-            },
-            "generation_settings": gen_settings,
-            "chunks": per_chunk,
-            "merged_text": merged_text,
-            "provider": "local",
-            "model": "Abstractive",
-        }
+        extra = None
+        if detail != "summary":
+            extra = {
+                "metrics": {
+                    "requested_length_ratio": ratio,
+                    "abstractive_input_chars": len(source_text),
+                    "abstractive_target_ratio": ratio,
+                },
+                "generation_settings": gen_settings,
+                "provider": "local",
+                "lang": lang,
+                "model": "Abstractive",
+            }
+            if detail == "full":
+                extra["chunks"] = per_chunk
+                extra["merged_text"] = merged_text
+            if dedup_report is not None:
+                extra["dedup"] = dedup_report
+            if adaptive_plan is not None:
+                extra["adaptive"] = adaptive_plan
+            extra["guard"] = _guard_extra(guard_plan)
 
         end_time = time.time()
 
-        return SummarizeResponse(
-            ok=True,
-            summary=summary_text,
-            method=method,
-            original_length_chars=len(text),
-            original_length_sentences=num_orig,
-            summary_length_chars=len(summary_text),
-            summary_length_sentences=num_sum,
-            processing_time_sec=round(end_time - start_time, 3),
-            request_id=request_id,
-            extra=extra,
+        return _encode_response(
+            SummarizeResponse(
+                ok=True,
+                summary=summary_text,
+                method=method,
+                original_length_chars=len(text),
+                original_length_sentences=num_orig,
+                summary_length_chars=len(summary_text),
+                summary_length_sentences=num_sum,
+                processing_time_sec=round(end_time - start_time, 3),
+                request_id=request_id,
+                extra=extra,
+            ),
+            http_request,
         )
     elif method == "hybrid":
-        extractive_ratio = max(0.05, min(0.9, extractive_length / 100))
+        extractive_ratio = guard_plan["extractive_ratio"] or max(0.05, min(0.9, extractive_length / 100))
         abstractive_ratio = max(0.1, min(0.9, abstractive_length / 100))
 
-        extractive_result = textrank_summarize(text, summary_ratio=extractive_ratio)
+        extractive_result = _run_extractive(
+            source_text,
+            extractive_ratio,
+            request.document_id,
+            segmenter,
+            lang,
+            request.keywords,
+            request.highlights,
+            source_sentences,
+            max_neighbors,
+            owner=tenant.name,
+        )
         extractive_summary = extractive_result["summary"]
         extractive_sentences = extractive_result["num_summary_sentences"]
 
@@ -523,50 +1521,60 @@ def summarize(request: SummarizeRequest, http_request: Request):
             "length_penalty": request.abstractive_length_penalty,
             "repetition_penalty": request.abstractive_repetition_penalty,
             "no_repeat_ngram_size": request.abstractive_no_repeat_ngram_size,
+            "decoding": request.abstractive_decoding,
+            "decoding_scope": request.abstractive_decoding_scope,
         }
 
-        final_summary, per_chunk, merged_text = summarize_long_text(
-            extractive_summary,
-            length_ratio=abstractive_ratio,
-            chunk_num_beams=gen_settings["num_beams"],
-            final_num_beams=gen_settings["num_beams"],
-            length_penalty=gen_settings["length_penalty"],
-            repetition_penalty=gen_settings["repetition_penalty"],
-            no_repeat_ngram_size=gen_settings["no_repeat_ngram_size"],
+        final_summary, per_chunk, merged_text, adaptive_plan = _run_abstractive(
+            extractive_summary, abstractive_ratio, gen_settings, request.adaptive, lang
         )
 
-        summary_sentences = sentence_tokenize(final_summary)
-        num_sum = len(summary_sentences)
+        num_sum = len(pipeline.sentences(final_summary, segmenter=segmenter)) if detail != "summary" else None
         summary_text = final_summary
 
-        extra = {
-            "metrics": {
-                "requested_extractive_ratio": extractive_ratio,
-                "requested_abstractive_ratio": abstractive_ratio,
-                "extractive_sentences": extractive_sentences,
-                "abstractive_input_chars": len(extractive_summary),
-            },
-            "generation_settings": gen_settings,
-            "extractive_summary": extractive_summary,
-            "chunks": per_chunk,
-            "merged_text": merged_text,
-            "provider": "local",
-            "model": "Hybrid",
-        }
+        extra = None
+        if detail != "summary":
+            extra = {
+                "metrics": {
+                    "requested_extractive_ratio": extractive_ratio,
+                    "requested_abstractive_ratio": abstractive_ratio,
+                    "extractive_sentences": extractive_sentences,
+                    "abstractive_input_chars": len(extractive_summary),
+                },
+                "generation_settings": gen_settings,
+                "provider": "local",
+                "lang": lang,
+                "model": "Hybrid",
+            }
+            if detail == "full":
+                extra["extractive_summary"] = extractive_summary
+                extra["chunks"] = per_chunk
+                extra["merged_text"] = merged_text
+            if "incremental" in extractive_result:
+                extra["incremental"] = extractive_result["incremental"]
+            _add_annotations(extra, extractive_result, source_text)
+            if dedup_report is not None:
+                extra["dedup"] = dedup_report
+            if adaptive_plan is not None:
+                extra["adaptive"] = adaptive_plan
+            extra["guard"] = _guard_extra(guard_plan)
 
         end_time = time.time()
 
-        return SummarizeResponse(
-            ok=True,
-            summary=summary_text,
-            method=method,
-            original_length_chars=len(text),
-            original_length_sentences=num_orig,
-            summary_length_chars=len(summary_text),
-            summary_length_sentences=num_sum,
-            processing_time_sec=round(end_time - start_time, 3),
-            request_id=request_id,
-            extra=extra,
+        return _encode_response(
+            SummarizeResponse(
+                ok=True,
+                summary=summary_text,
+                method=method,
+                original_length_chars=len(text),
+                original_length_sentences=num_orig,
+                summary_length_chars=len(summary_text),
+                summary_length_sentences=num_sum,
+                processing_time_sec=round(end_time - start_time, 3),
+                request_id=request_id,
+                extra=extra,
+            ),
+            http_request,
         )
     
     
@@ -0,0 +1,228 @@
+import csv
+import os
+import re
+from collections import Counter, OrderedDict
+from threading import Lock
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+ROUGE_TYPES = ("rouge1", "rouge2", "rougeL")
+REFERENCE_CACHE_SIZE = int(os.getenv("ROUGE_REFERENCE_CACHE_SIZE", "20000"))
+BOOTSTRAP_RESAMPLES = int(os.getenv("EVAL_BOOTSTRAP_RESAMPLES", "1000"))
+
+_TOKEN_RE = re.compile(r"\w+", flags=re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    # Match unicode word characters so Persian tokens are preserved.
+    return _TOKEN_RE.findall(text)
+
+
+def _ngrams(tokens: List[str], n: int) -> Counter:
+    if n == 1:
+        return Counter(tokens)
+    return Counter(zip(*(tokens[i:] for i in range(n))))
+
+
+def _fmeasure(precision: float, recall: float) -> float:
+    if precision + recall > 0:
+        return 2 * precision * recall / (precision + recall)
+    return 0.0
+
+
+def _score_counts(overlap: int, target_count: int, prediction_count: int) -> Tuple[float, float, float]:
+    precision = overlap / max(prediction_count, 1)
+    recall = overlap / max(target_count, 1)
+    return precision, recall, _fmeasure(precision, recall)
+
+
+class _Reference:
+    __slots__ = ("length", "unigrams", "bigrams", "bigram_count", "match_masks")
+
+    def __init__(self, tokens: List[str]):
+        self.length = len(tokens)
+        self.unigrams = Counter(tokens)
+        self.bigrams = _ngrams(tokens, 2)
+        self.bigram_count = max(0, len(tokens) - 1)
+        # One bit per reference position for each token, used by the
+        # bit-parallel LCS below.
+        masks: Dict[str, int] = {}
+        for position, token in enumerate(tokens):
+            masks[token] = masks.get(token, 0) | (1 << position)
+        self.match_masks = masks
+
+
+class _Prediction:
+    __slots__ = ("tokens", "unigrams", "bigrams")
+
+    def __init__(self, tokens: List[str]):
+        self.tokens = tokens
+        self.unigrams = Counter(tokens)
+        self.bigrams = _ngrams(tokens, 2)
+
+
+def _lcs_length(reference: _Reference, prediction_tokens: List[str]) -> int:
+    # Allison-Dix / Hyyro bit-vector LCS: O(len(prediction) * len(reference) / wordsize).
+    full = (1 << reference.length) - 1
+    row = full
+    masks = reference.match_masks
+    for token in prediction_tokens:
+        match = masks.get(token)
+        if match is None:
+            continue
+        carry = row & match
+        row = ((row + carry) | (row - carry)) & full
+    return reference.length - bin(row).count("1")
+
+
+class RougeEngine:
+    """ROUGE-1/2/L matching rouge_score (no stemming, unicode word tokens)
+    with tokenized references cached across evaluations."""
+
+    def __init__(self, cache_size: int = REFERENCE_CACHE_SIZE):
+        self.cache_size = cache_size
+        self._references: "OrderedDict[str, _Reference]" = OrderedDict()
+        self._lock = Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def _reference(self, text: str) -> _Reference:
+        return self._references_for([text])[text]
+
+    def _references_for(self, texts: Iterable[str]) -> Dict[str, _Reference]:
+        # One lock round for the lookups and one for the inserts; each
+        # distinct text is tokenized at most once.
+        found: Dict[str, _Reference] = {}
+        with self._lock:
+            for text in dict.fromkeys(texts):
+                cached = self._references.get(text)
+                if cached is not None:
+                    self._references.move_to_end(text)
+                    self.cache_hits += 1
+                found[text] = cached
+        missing = {text: _Reference(tokenize(text)) for text, cached in found.items() if cached is None}
+        if missing:
+            with self._lock:
+                self.cache_misses += len(missing)
+                self._references.update(missing)
+                while len(self._references) > self.cache_size:
+                    self._references.popitem(last=False)
+            found.update(missing)
+        return found
+
+    def add_reference(self, text: str, tokens: List[str]) -> None:
+        reference = _Reference(tokens)
+        with self._lock:
+            self._references[text] = reference
+            while len(self._references) > self.cache_size:
+                self._references.popitem(last=False)
+
+    @staticmethod
+    def _score(target: _Reference, prediction: _Prediction) -> Dict[str, Tuple[float, float, float]]:
+        tokens = prediction.tokens
+        unigram_overlap = sum((target.unigrams & prediction.unigrams).values())
+        bigram_overlap = sum((target.bigrams & prediction.bigrams).values())
+
+        if target.length and tokens:
+            lcs = _lcs_length(target, tokens)
+            lcs_precision = lcs / len(tokens)
+            lcs_recall = lcs / target.length
+            rouge_l = (lcs_precision, lcs_recall, _fmeasure(lcs_precision, lcs_recall))
+        else:
+            rouge_l = (0, 0, 0)
+
+        return {
+            "rouge1": _score_counts(unigram_overlap, target.length, len(tokens)),
+            "rouge2": _score_counts(bigram_overlap, target.bigram_count, max(0, len(tokens) - 1)),
+            "rougeL": rouge_l,
+        }
+
+    def score(self, reference: str, prediction: str) -> Dict[str, Tuple[float, float, float]]:
+        return self._score(self._reference(reference), _Prediction(tokenize(prediction)))
+
+    def score_batch(
+        self, references: Sequence[str], predictions: Sequence[str]
+    ) -> List[Dict[str, Tuple[float, float, float]]]:
+        """Scores pairs with every distinct reference looked up (and its LCS
+        bit-masks built) once and every distinct prediction tokenized and
+        counted once, e.g. one reference set against many configs' outputs."""
+        if len(references) != len(predictions):
+            raise ValueError("references and predictions must have the same length")
+        targets = self._references_for(references)
+        parsed = {text: _Prediction(tokenize(text)) for text in dict.fromkeys(predictions)}
+        return [
+            self._score(targets[reference], parsed[prediction])
+            for reference, prediction in zip(references, predictions)
+        ]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "cached_references": len(self._references),
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+        }
+
+
+_ENGINE: Optional[RougeEngine] = None
+
+
+def get_rouge_engine() -> RougeEngine:
+    global _ENGINE
+    if _ENGINE is None:
+        _ENGINE = RougeEngine()
+    return _ENGINE
+
+
+def bootstrap_ci(
+    values: Iterable[float],
+    resamples: int = BOOTSTRAP_RESAMPLES,
+    confidence: float = 0.95,
+    seed: int = 0,
+) -> Dict[str, float]:
+    data = np.asarray(list(values), dtype=np.float64)
+    if data.size == 0:
+        return {"mean": 0.0, "low": 0.0, "high": 0.0}
+    rng = np.random.default_rng(seed)
+    means = data[rng.integers(0, data.size, size=(resamples, data.size))].mean(axis=1)
+    alpha = (1.0 - confidence) / 2
+    low, high = np.quantile(means, [alpha, 1.0 - alpha])
+    return {"mean": round(float(data.mean()), 6), "low": round(float(low), 6), "high": round(float(high), 6)}
+
+
+def confidence_intervals(
+    records: List[Dict[str, Any]],
+    columns: Sequence[str] = ("rouge1_f1", "rouge2_f1", "rougeL_f1"),
+    resamples: int = BOOTSTRAP_RESAMPLES,
+    seed: int = 0,
+) -> Dict[str, Dict[str, float]]:
+    return {
+        column: bootstrap_ci((record[column] for record in records), resamples=resamples, seed=seed)
+        for column in columns
+    }
+
+
+def export_per_sample(records: List[Dict[str, Any]], path: str) -> str:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    if path.endswith(".parquet"):
+        if pa is None:
+            raise ValueError("pyarrow is required for Parquet export")
+        pq.write_table(pa.Table.from_pylist(records), path)
+        return path
+
+    fieldnames = list(records[0].keys()) if records else []
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(records)
+    return path
@@ -0,0 +1,108 @@
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+from preprocessing import normalize_text_language, sentence_tokenize, word_tokenize
+
+DEFAULT_LANGUAGE = os.getenv("DEFAULT_LANGUAGE", "fa")
+DETECT_SAMPLE_CHARS = 2000
+
+_ARABIC_SCRIPT_RE = re.compile(r"[\u0600-\u06FF\u0750-\u077F\uFB50-\uFDFF\uFE70-\uFEFF]")
+_LATIN_RE = re.compile(r"[A-Za-z\u00C0-\u024F]")
+
+
+class LanguagePipeline:
+    def __init__(
+        self,
+        lang: str,
+        model_env: str,
+        default_model: str,
+        chunk_size: int = 850,
+        overlap: int = 120,
+        prefix: str = "summarize: ",
+        max_input_length: int = 1024,
+    ):
+        self.lang = lang
+        self.model_env = model_env
+        self.default_model = default_model
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self.prefix = prefix
+        self.max_input_length = max_input_length
+
+    @property
+    def model_name(self) -> str:
+        return os.getenv(self.model_env) or self.default_model
+
+    def normalize(self, text: str, remove_punct: bool = False, replace_halfspace: bool = False, segmenter: str = "hazm") -> str:
+        return normalize_text_language(
+            text, lang=self.lang, remove_punct=remove_punct, replace_halfspace=replace_halfspace, segmenter=segmenter
+        )
+
+    def sentences(self, text: str, segmenter: str = "hazm") -> List[str]:
+        return sentence_tokenize(text, lang=self.lang, segmenter=segmenter)
+
+    def words(self, text: str) -> List[str]:
+        return word_tokenize(text, lang=self.lang)
+
+    def abstractive_settings(self) -> Dict[str, Any]:
+        return {
+            "model_name": self.model_name,
+            "chunk_size": self.chunk_size,
+            "overlap": self.overlap,
+            "prefix": self.prefix,
+            "max_input_length": self.max_input_length,
+        }
+
+
+_PIPELINES: Dict[str, LanguagePipeline] = {}
+
+
+def register_pipeline(pipeline: LanguagePipeline) -> None:
+    _PIPELINES[pipeline.lang] = pipeline
+
+
+def supported_languages() -> List[str]:
+    return sorted(_PIPELINES)
+
+
+def detect_language(text: str) -> str:
+    sample = text[:DETECT_SAMPLE_CHARS]
+    arabic = len(_ARABIC_SCRIPT_RE.findall(sample))
+    latin = len(_LATIN_RE.findall(sample))
+    if arabic == 0 and latin == 0:
+        return DEFAULT_LANGUAGE
+    return "fa" if arabic >= latin else "en"
+
+
+def resolve_language(lang: Optional[str], text: str) -> str:
+    if not lang or lang == "auto":
+        return detect_language(text)
+    if lang not in _PIPELINES:
+        raise ValueError(f"Unsupported language: {lang}")
+    return lang
+
+
+def get_pipeline(lang: str) -> LanguagePipeline:
+    if lang not in _PIPELINES:
+        raise ValueError(f"Unsupported language: {lang}")
+    return _PIPELINES[lang]
+
+
+register_pipeline(
+    LanguagePipeline(
+        "fa",
+        model_env="ABSTRACTIVE_MODEL",
+        default_model="nafisehNik/mt5-persian-summary",
+    )
+)
+register_pipeline(
+    LanguagePipeline(
+        "en",
+        model_env="ABSTRACTIVE_MODEL_EN",
+        default_model="sshleifer/distilbart-cnn-12-6",
+        chunk_size=900,
+        overlap=100,
+        prefix="",
+    )
+)
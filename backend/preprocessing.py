@@ -1,8 +1,52 @@
-from hazm import Normalizer, sent_tokenize, word_tokenize as hazm_word_tokenize
 import re
 
+_HAZM = None
+_NORMALIZER = None
+
+_FAST_TRANSLATION = str.maketrans(
+    {
+        "ك": "ک",
+        "ي": "ی",
+        "ى": "ی",
+        "ھ": "ه",
+        "\xa0": " ",
+        "\u0640": None,
+        **{chr(code): None for code in range(0x064B, 0x0653)},
+        **dict(zip("0123456789%٠١٢٣٤٥٦٧٨٩", "۰۱۲۳۴۵۶۷۸۹٪۰۱۲۳۴۵۶۷۸۹")),
+    }
+)
+_WHITESPACE_RE = re.compile(r"\s+")
+_FAST_PUNCT_RE = re.compile(r"[،؛:!؟\-]+")
+
+# Terminator run followed by whitespace, or directly by a letter (hazm's
+# normalizer spaces "است.جمله" apart). Like hazm, a closing quote or bracket
+# after the terminator keeps the sentence going.
+_SENTENCE_END_RE = re.compile(r"([!.?⸮؟]+)(?:\s+|(?=[^\W\d_]))")
+_ABBREVIATIONS = frozenset(
+    {
+        "ق.م", "ه.ق", "ه.ش", "ر.ک", "ص", "ج", "ش", "م", "ق", "ع",
+        "dr", "mr", "mrs", "ms", "prof", "etc", "e.g", "i.e", "vs", "inc", "ltd", "jr", "sr", "st",
+    }
+)
+
+def _hazm():
+    global _HAZM
+    # Imported on first Persian use so other languages never load hazm.
+    if _HAZM is None:
+        import hazm
+
+        _HAZM = hazm
+    return _HAZM
+
+def _get_normalizer():
+    global _NORMALIZER
+    # Building a Normalizer loads hazm's word and verb lists, so reuse one.
+    if _NORMALIZER is None:
+        _NORMALIZER = _hazm().Normalizer()
+    return _NORMALIZER
+
 def normalize_text(text, remove_punct=False, replace_halfspace=False):
-    normalizer = Normalizer()
+    normalizer = _get_normalizer()
     text = normalizer.normalize(text)
     
     if replace_halfspace:
@@ -20,16 +64,62 @@ def normalize_text(text, remove_punct=False, replace_halfspace=False):
 
 def sentence_tokenize_persian(text):
     text = normalize_text(text, remove_punct=False, replace_halfspace=False)
-    sentences = sent_tokenize(text)
+    sentences = _hazm().sent_tokenize(text)
+    return sentences
+
+def fast_normalize_text(text, remove_punct=False, replace_halfspace=False):
+    text = text.translate(_FAST_TRANSLATION)
+    if replace_halfspace:
+        text = text.replace("\u200c", " ")
+    if remove_punct:
+        text = _FAST_PUNCT_RE.sub(" ", text)
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+def _is_abbreviation(text, start, end, terminator):
+    if terminator != ".":
+        return False
+    space = text.rfind(" ", start, end)
+    token = text[space + 1 if space >= 0 else start:end]
+    if not token or token.isdigit():
+        return False
+    if len(token) == 1:
+        # An initial or part of a dotted abbreviation (ه.ش.), unless it follows
+        # a number: "۱۴۰۲ م." is a year and its era, which hazm ends the
+        # sentence after.
+        previous = text[start:space].rsplit(" ", 1)[-1] if space > start else ""
+        return not (previous.isdigit() and text[end + 1 : end + 2] == " ")
+    return token.lower() in _ABBREVIATIONS
+
+def split_persian_sentences(text):
+    sentences = []
+    start = 0
+    for match in _SENTENCE_END_RE.finditer(text):
+        terminator = match.group(1)
+        if len(terminator) > 1 and set(terminator) == {"."}:
+            continue
+        if _is_abbreviation(text, start, match.start(1), terminator):
+            continue
+        sentence = text[start:match.end(1)].strip()
+        if sentence:
+            sentences.append(sentence)
+        start = match.end()
+    tail = text[start:].strip()
+    if tail:
+        sentences.append(tail)
     return sentences
 
+def sentence_tokenize_persian_fast(text):
+    return split_persian_sentences(fast_normalize_text(text))
+
 def word_tokenize_persian(text):
     text = normalize_text(text, remove_punct=True, replace_halfspace=True)
-    words = hazm_word_tokenize(text)
+    words = _hazm().word_tokenize(text)
     return words
 
-def normalize_text_language(text, lang="fa", remove_punct=False, replace_halfspace=False):
+def normalize_text_language(text, lang="fa", remove_punct=False, replace_halfspace=False, segmenter="hazm"):
     if lang == "fa":
+        if segmenter == "fast":
+            return fast_normalize_text(text, remove_punct=remove_punct, replace_halfspace=replace_halfspace)
         return normalize_text(text, remove_punct=remove_punct, replace_halfspace=replace_halfspace)
 
     text = text.replace("\xa0", " ")
@@ -38,8 +128,10 @@ def normalize_text_language(text, lang="fa", remove_punct=False, replace_halfspa
     text = re.sub(r"\s+", " ", text)
     return text.strip()
 
-def sentence_tokenize(text, lang="fa"):
+def sentence_tokenize(text, lang="fa", segmenter="hazm"):
     if lang == "fa":
+        if segmenter == "fast":
+            return sentence_tokenize_persian_fast(text)
         return sentence_tokenize_persian(text)
 
     text = normalize_text_language(text, lang=lang, remove_punct=False, replace_halfspace=False)
@@ -0,0 +1,235 @@
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+from typing import Any, Dict, List, Optional
+
+from shared_state import SharedStore
+
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL_SEC = float(os.getenv("PROFILE_INTERVAL_MS", "5")) / 1000
+PROFILE_TORCH = os.getenv("PROFILE_TORCH", "0") == "1"
+PROFILE_MAX_STORED = int(os.getenv("PROFILE_MAX_STORED", "100"))
+PROFILE_TTL_SEC = int(os.getenv("PROFILE_TTL_SEC", "3600"))
+
+_CURRENT: ContextVar[Optional["RequestProfile"]] = ContextVar("request_profile", default=None)
+_PROFILES: "OrderedDict[str, RequestProfile]" = OrderedDict()
+_PROFILES_LOCK = Lock()
+# Finished profiles are also written here so any serve.py worker can return them.
+_PROFILE_STORE = SharedStore("profiles")
+
+
+class _StackSampler(threading.Thread):
+    def __init__(self, target_thread_id: int, interval: float):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.target_thread_id = target_thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.target_thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
+            if stack:
+                self.stacks[tuple(reversed(stack))] += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+class RequestProfile:
+    def __init__(self, profile_id: str, torch_enabled: bool = False):
+        self.profile_id = profile_id
+        self.torch_enabled = torch_enabled
+        self.created_at = time.time()
+        self.duration_sec: Optional[float] = None
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.torch_events: List[Dict[str, Any]] = []
+        self._token = None
+        self._started = time.perf_counter()
+        self._sampler = _StackSampler(threading.get_ident(), PROFILE_INTERVAL_SEC)
+        self._sampler.start()
+
+    def add_stage(self, name: str, elapsed: float) -> None:
+        entry = self.stages.setdefault(name, {"total_sec": 0.0, "calls": 0})
+        entry["total_sec"] += elapsed
+        entry["calls"] += 1
+
+    def stop(self) -> None:
+        self._sampler.stop()
+        self.duration_sec = time.perf_counter() - self._started
+
+    def summary(self) -> Dict[str, Any]:
+        elapsed = self.duration_sec or (time.perf_counter() - self._started)
+        return {
+            "profile_id": self.profile_id,
+            "elapsed_sec": round(elapsed, 4),
+            "stages": {
+                name: {"total_sec": round(entry["total_sec"], 4), "calls": entry["calls"]}
+                for name, entry in self.stages.items()
+            },
+        }
+
+    def collapsed(self) -> str:
+        lines = []
+        for stack, count in self._sampler.stacks.most_common():
+            frames = ";".join(f"{name} ({os.path.basename(path)}:{line})" for name, path, line in stack)
+            lines.append(f"{frames} {count}")
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self) -> Dict[str, Any]:
+        frame_index: Dict[tuple, int] = {}
+        frames: List[Dict[str, Any]] = []
+        samples: List[List[int]] = []
+        weights: List[float] = []
+        for stack, count in self._sampler.stacks.items():
+            indices = []
+            for frame in stack:
+                if frame not in frame_index:
+                    frame_index[frame] = len(frames)
+                    frames.append({"name": frame[0], "file": frame[1], "line": frame[2]})
+                indices.append(frame_index[frame])
+            samples.append(indices)
+            weights.append(count * PROFILE_INTERVAL_SEC)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": f"request {self.profile_id}",
+            "exporter": "summarizer.profiling",
+            "shared": {"frames": frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": self.profile_id,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": sum(weights),
+                    "samples": samples,
+                    "weights": weights,
+                }
+            ],
+        }
+
+    def torch_trace(self) -> Dict[str, Any]:
+        return {"traceEvents": self.torch_events}
+
+
+class StoredProfile:
+    """A finished profile read back from the shared store, with the same
+    export methods as RequestProfile."""
+
+    def __init__(self, data: Dict[str, Any]):
+        self.profile_id = data["summary"]["profile_id"]
+        self._data = data
+
+    def summary(self) -> Dict[str, Any]:
+        return self._data["summary"]
+
+    def collapsed(self) -> str:
+        return self._data["collapsed"]
+
+    def speedscope(self) -> Dict[str, Any]:
+        return self._data["speedscope"]
+
+    def torch_trace(self) -> Dict[str, Any]:
+        return {"traceEvents": self._data["torch_events"]}
+
+
+def _should_profile(header_value: Optional[str]) -> bool:
+    if header_value is not None:
+        return header_value.strip().lower() in ("1", "true", "yes", "on")
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+def start_profile(profile_id: str, header_value: Optional[str] = None) -> Optional[RequestProfile]:
+    if not _should_profile(header_value):
+        return None
+    profile = RequestProfile(profile_id, torch_enabled=PROFILE_TORCH)
+    profile._token = _CURRENT.set(profile)
+    return profile
+
+
+def finish_profile(profile: RequestProfile) -> None:
+    profile.stop()
+    _CURRENT.reset(profile._token)
+    cutoff = time.time() - PROFILE_TTL_SEC
+    with _PROFILES_LOCK:
+        _PROFILES[profile.profile_id] = profile
+        for profile_id, stored in list(_PROFILES.items()):
+            if stored.created_at < cutoff:
+                del _PROFILES[profile_id]
+        while len(_PROFILES) > PROFILE_MAX_STORED:
+            _PROFILES.popitem(last=False)
+    if _PROFILE_STORE.enabled:
+        _PROFILE_STORE.put(
+            profile.profile_id,
+            {
+                "summary": profile.summary(),
+                "collapsed": profile.collapsed(),
+                "speedscope": profile.speedscope(),
+                "torch_events": profile.torch_events,
+            },
+        )
+        _PROFILE_STORE.expire(PROFILE_TTL_SEC, PROFILE_MAX_STORED)
+
+
+def get_profile(profile_id: str) -> Optional[Any]:
+    """The profile from this process, or from the shared store when another
+    worker recorded it."""
+    with _PROFILES_LOCK:
+        profile = _PROFILES.get(profile_id)
+    if profile is None and _PROFILE_STORE.enabled:
+        data = _PROFILE_STORE.get(profile_id)
+        profile = StoredProfile(data) if data is not None else None
+    return profile
+
+
+def current_profile() -> Optional[RequestProfile]:
+    return _CURRENT.get()
+
+
+@contextmanager
+def stage(name: str):
+    profile = _CURRENT.get()
+    if profile is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add_stage(name, time.perf_counter() - started)
+
+
+@contextmanager
+def torch_profile():
+    profile = _CURRENT.get()
+    if profile is None or not profile.torch_enabled:
+        yield
+        return
+
+    from torch.profiler import ProfilerActivity, profile as torch_profiler
+
+    with torch_profiler(activities=[ProfilerActivity.CPU]) as prof:
+        yield
+
+    fd, path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    try:
+        prof.export_chrome_trace(path)
+        with open(path, "r", encoding="utf-8") as f:
+            profile.torch_events.extend(json.load(f).get("traceEvents", []))
+    finally:
+        os.remove(path)
@@ -0,0 +1,305 @@
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from capture import REPLAY_HEADER, read_capture
+
+logger = logging.getLogger("summarizer.replay")
+
+PERCENTILES = (50, 90, 99)
+# Request fields replayed as they were captured; the rest describe the text.
+_SHAPE_FIELDS = ("text_chars", "text_sentences", "text_sha256", "text")
+_FILLER = (
+    "هوش مصنوعی یکی از مهم‌ترین فناوری‌های قرن بیست‌ویکم است. "
+    "این فناوری توانسته است در حوزه‌های مختلفی مانند پزشکی، صنعت و آموزش تحول ایجاد کند. "
+    "کارشناسان معتقدند که هوش مصنوعی اقتصاد جهان را تحت تأثیر قرار خواهد داد. "
+    "با این حال، نگرانی‌هایی درباره اخلاق و امنیت داده‌ها وجود دارد. "
+)
+
+Target = Callable[[Dict[str, Any]], int]
+
+
+class TextSynthesizer:
+    """Stands in for texts that were captured by shape only: whole
+    sentences from a corpus are repeated up to the captured length."""
+
+    def __init__(self, corpus: Optional[List[str]] = None):
+        from preprocessing import sentence_tokenize
+
+        sentences = []
+        for text in corpus or [_FILLER]:
+            sentences.extend(sentence_tokenize(text))
+        self.sentences = [sentence for sentence in sentences if sentence.strip()] or [_FILLER]
+        self._next = 0
+
+    def text(self, chars: int) -> str:
+        parts: List[str] = []
+        size = 0
+        while size < chars:
+            sentence = self.sentences[self._next % len(self.sentences)]
+            self._next += 1
+            parts.append(sentence)
+            size += len(sentence) + 1
+        return " ".join(parts)[:chars]
+
+
+def build_body(record: Dict[str, Any], synthesizer: TextSynthesizer) -> Dict[str, Any]:
+    shape = record.get("request") or {}
+    body = {key: value for key, value in shape.items() if key not in _SHAPE_FIELDS and value is not None}
+    body["text"] = shape.get("text") or synthesizer.text(int(shape.get("text_chars", 0)))
+    return body
+
+
+def http_target(url: str, api_key: Optional[str] = None, timeout: float = 600.0) -> Target:
+    base = url.rstrip("/")
+
+    def send(record: Dict[str, Any]) -> int:
+        body = record["body"]
+        headers = {REPLAY_HEADER: "1"}
+        if api_key:
+            headers["X-API-Key"] = api_key
+        if record.get("path") == "/api/summarize/upload":
+            params = {key: value for key, value in body.items() if key != "text"}
+            request = urllib.request.Request(
+                f"{base}/api/summarize/upload?{urllib.parse.urlencode({**params, 'format': 'text'})}",
+                data=body["text"].encode("utf-8"),
+                headers={**headers, "Content-Type": "text/plain; charset=utf-8"},
+                method="POST",
+            )
+        else:
+            request = urllib.request.Request(
+                f"{base}/api/summarize",
+                data=json.dumps(body, ensure_ascii=False).encode("utf-8"),
+                headers={**headers, "Content-Type": "application/json"},
+                method="POST",
+            )
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            e.read()
+            return e.code
+
+    return send
+
+
+def inprocess_target() -> Target:
+    # Runs the summarization functions directly, without HTTP, guard or queueing.
+    from evaluation import _generate_summary
+    from pipelines import DEFAULT_LANGUAGE
+
+    def send(record: Dict[str, Any]) -> int:
+        body = record["body"]
+        length = body.get("length", 30)
+        _generate_summary(
+            body["text"],
+            body.get("method", "extractive"),
+            length,
+            body.get("extractive_length") or length,
+            body.get("abstractive_length") or length,
+            abstractive_num_beams=body.get("abstractive_num_beams", 2),
+            abstractive_length_penalty=body.get("abstractive_length_penalty", 1.0),
+            abstractive_repetition_penalty=body.get("abstractive_repetition_penalty", 1.1),
+            abstractive_no_repeat_ngram_size=body.get("abstractive_no_repeat_ngram_size", 3),
+            abstractive_decoding=body.get("abstractive_decoding", "beam"),
+            abstractive_decoding_scope=body.get("abstractive_decoding_scope", "final"),
+            lang=body.get("lang", DEFAULT_LANGUAGE),
+        )
+        return 200
+
+    return send
+
+
+def replay(
+    records: List[Dict[str, Any]],
+    target: Target,
+    speed: float = 1.0,
+    concurrency: int = 8,
+    synthesizer: Optional[TextSynthesizer] = None,
+) -> List[Dict[str, Any]]:
+    """Open-loop replay: request i is sent (ts_i - ts_0) / speed after the
+    start whether or not earlier ones finished, so a slower build queues up
+    the way production would. speed <= 0 sends everything at once."""
+    synthesizer = synthesizer or TextSynthesizer()
+    jobs = [dict(record, body=build_body(record, synthesizer)) for record in records if record.get("request")]
+    results: List[Dict[str, Any]] = []
+    lock = threading.Lock()
+
+    def run(job: Dict[str, Any], due: float) -> None:
+        started = time.monotonic()
+        try:
+            status = target(job)
+            error = None
+        except Exception as e:  # noqa: BLE001 - recorded as a failed request
+            status, error = None, str(e)
+        result = {
+            "path": job.get("path"),
+            "method": job["body"].get("method", "extractive"),
+            "text_chars": len(job["body"]["text"]),
+            "status": status,
+            "error": error,
+            "latency_sec": time.monotonic() - started,
+            "start_lag_sec": started - due,
+            "original_latency_sec": job.get("latency_sec"),
+            "original_status": job.get("status"),
+        }
+        with lock:
+            results.append(result)
+
+    if not jobs:
+        return results
+    first = jobs[0].get("ts", 0.0)
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        start = time.monotonic()
+        for job in jobs:
+            due = start + ((job.get("ts", first) - first) / speed if speed > 0 else 0.0)
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(run, job, due)
+    return results
+
+
+def _distribution(latencies: List[float]) -> Dict[str, Any]:
+    if not latencies:
+        return {"count": 0}
+    values = np.asarray(latencies)
+    stats = {"count": len(latencies), "mean": round(float(values.mean()), 4)}
+    for percentile in PERCENTILES:
+        stats[f"p{percentile}"] = round(float(np.percentile(values, percentile)), 4)
+    return stats
+
+
+def summarize_results(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    groups: Dict[str, List[Dict[str, Any]]] = {"all": results}
+    for result in results:
+        groups.setdefault(result["method"], []).append(result)
+    report = {}
+    for name, items in groups.items():
+        ok = [item for item in items if item["status"] is not None and item["status"] < 500]
+        report[name] = {
+            "replayed": _distribution([item["latency_sec"] for item in ok]),
+            "original": _distribution(
+                [item["original_latency_sec"] for item in items if item["original_latency_sec"] is not None]
+            ),
+            "errors": len(items) - len(ok),
+            "max_start_lag_sec": round(max((item["start_lag_sec"] for item in items), default=0.0), 4),
+        }
+    return report
+
+
+def compare_reports(baseline: Dict[str, Any], candidate: Dict[str, Any]) -> Dict[str, Any]:
+    comparison = {}
+    for name, entry in candidate["groups"].items():
+        base = baseline["groups"].get(name)
+        if base is None:
+            continue
+        rows = {}
+        for key in ["mean"] + [f"p{percentile}" for percentile in PERCENTILES]:
+            before, after = base["replayed"].get(key), entry["replayed"].get(key)
+            if before is None or after is None:
+                continue
+            rows[key] = {
+                "baseline": before,
+                "candidate": after,
+                "change_pct": round((after - before) / before * 100, 1) if before else None,
+            }
+        comparison[name] = rows
+    return comparison
+
+
+def _print_comparison(comparison: Dict[str, Any]) -> None:
+    for name, rows in comparison.items():
+        cells = ", ".join(
+            f"{key} {row['baseline']:.3f}s -> {row['candidate']:.3f}s ({row['change_pct']:+.1f}%)"
+            for key, row in rows.items()
+            if row["change_pct"] is not None
+        )
+        print(f"{name}: {cells}")
+
+
+def _run(args) -> None:
+    records = read_capture(args.captures)
+    if args.method:
+        records = [record for record in records if (record.get("request") or {}).get("method") in args.method]
+    if args.limit:
+        records = records[: args.limit]
+    corpus = None
+    if args.corpus:
+        from trim_vocab import iter_corpus_texts
+
+        corpus = list(iter_corpus_texts(args.corpus))
+    target = inprocess_target() if args.in_process else http_target(args.url, args.api_key, args.timeout)
+
+    logger.info("Replaying %d requests at %sx", len(records), args.speed)
+    started = time.monotonic()
+    results = replay(records, target, speed=args.speed, concurrency=args.concurrency, synthesizer=TextSynthesizer(corpus))
+    report = {
+        "label": args.label,
+        "target": "in-process" if args.in_process else args.url,
+        "speed": args.speed,
+        "requests": len(results),
+        "wall_sec": round(time.monotonic() - started, 2),
+        "groups": summarize_results(results),
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    print(json.dumps(report["groups"], indent=2))
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            _print_comparison(compare_reports(json.load(f), report))
+
+
+def _compare(args) -> None:
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.candidate, "r", encoding="utf-8") as f:
+        candidate = json.load(f)
+    _print_comparison(compare_reports(baseline, candidate))
+
+
+def main() -> None:
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
+    parser = argparse.ArgumentParser(description="Replay captured production traffic and compare latency between builds")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="Replay a capture against a server or in-process")
+    run.add_argument("captures", nargs="+", help="Capture files or directories (rotated files are included)")
+    target = run.add_mutually_exclusive_group(required=True)
+    target.add_argument("--url", help="Base URL of the API, e.g. http://localhost:8000")
+    target.add_argument("--in-process", action="store_true", help="Call the summarization functions directly")
+    run.add_argument("--speed", type=float, default=1.0, help="Rate multiplier (2 = twice the captured rate, 0 = all at once)")
+    run.add_argument("--concurrency", type=int, default=8, help="Maximum requests in flight")
+    run.add_argument("--method", nargs="+", choices=["extractive", "abstractive", "hybrid"])
+    run.add_argument("--limit", type=int)
+    run.add_argument("--corpus", nargs="+", help="Texts used for requests captured without their text")
+    run.add_argument("--api-key")
+    run.add_argument("--timeout", type=float, default=600.0)
+    run.add_argument("--label", default="")
+    run.add_argument("--output", help="Write the report to this JSON file")
+    run.add_argument("--compare", help="Baseline report to compare against")
+    run.set_defaults(func=_run)
+
+    compare = sub.add_parser("compare", help="Compare two replay reports")
+    compare.add_argument("baseline")
+    compare.add_argument("candidate")
+    compare.set_defaults(func=_compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
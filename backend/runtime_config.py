@@ -0,0 +1,345 @@
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger("summarizer.runtime")
+
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(__file__), "runtime_config.json")
+
+# "extractive" serves TextRank only and never imports torch/transformers.
+SERVING_PROFILES = ("extractive", "full")
+SERVING_PROFILE = os.getenv("SERVING_PROFILE", "full")
+if SERVING_PROFILE not in SERVING_PROFILES:
+    raise ValueError(f"SERVING_PROFILE must be one of {', '.join(SERVING_PROFILES)}")
+
+_ENV_OVERRIDES = {
+    "inference_slots": "INFERENCE_SLOTS",
+    "torch_intra_op_threads": "TORCH_INTRA_OP_THREADS",
+    "torch_inter_op_threads": "TORCH_INTER_OP_THREADS",
+    "blas_threads": "BLAS_THREADS",
+}
+
+_CONFIG: Optional[Dict[str, Optional[int]]] = None
+_BLAS_LIMITER = None
+_TORCH_APPLIED = False
+
+
+def _cpu_count() -> int:
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def load_runtime_config(path: Optional[str] = None) -> Dict[str, Optional[int]]:
+    config: Dict[str, Optional[int]] = {key: None for key in _ENV_OVERRIDES}
+
+    path = path or os.getenv("RUNTIME_CONFIG_PATH", DEFAULT_CONFIG_PATH)
+    if path and os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            stored = json.load(f)
+        for key in config:
+            if stored.get(key) is not None:
+                config[key] = int(stored[key])
+
+    for key, env_name in _ENV_OVERRIDES.items():
+        raw = os.getenv(env_name)
+        if raw:
+            config[key] = int(raw)
+
+    return config
+
+
+def get_runtime_config() -> Dict[str, Optional[int]]:
+    global _CONFIG
+    if _CONFIG is None:
+        _CONFIG = load_runtime_config()
+    return _CONFIG
+
+
+_BLAS_ENV_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS")
+
+
+def export_blas_env() -> None:
+    # OpenMP thread counts are per thread, so a limit applied on the event
+    # loop thread does not reach the threadpool that runs requests. The
+    # libraries read these variables when they load: call this before numpy,
+    # scipy or torch is imported.
+    blas_threads = get_runtime_config()["blas_threads"]
+    if not blas_threads:
+        return
+    for name in _BLAS_ENV_VARS:
+        os.environ[name] = str(blas_threads)
+
+
+def apply_blas_limits() -> None:
+    global _BLAS_LIMITER
+    blas_threads = get_runtime_config()["blas_threads"]
+    if not blas_threads:
+        return
+    from threadpoolctl import threadpool_limits
+
+    # Not used as a context manager: the limit stays in place for the process.
+    _BLAS_LIMITER = threadpool_limits(limits=blas_threads)
+    logger.info("BLAS/OpenMP threadpools limited to %s threads", blas_threads)
+
+
+def apply_torch_threads(torch, intra: Optional[int] = None, inter: Optional[int] = None) -> None:
+    global _TORCH_APPLIED
+    config = get_runtime_config()
+    intra = intra or config["torch_intra_op_threads"]
+    inter = inter or config["torch_inter_op_threads"]
+
+    if intra:
+        torch.set_num_threads(intra)
+    if inter:
+        try:
+            torch.set_num_interop_threads(inter)
+        except RuntimeError:
+            # Only settable before the first inter-op parallel work.
+            logger.warning("torch inter-op threads already initialised; keeping %s", torch.get_num_interop_threads())
+    _TORCH_APPLIED = True
+
+
+def ensure_torch_threads(torch) -> None:
+    if not _TORCH_APPLIED:
+        apply_torch_threads(torch)
+
+
+def _sample_texts(dataset_path: Optional[str], limit: int) -> List[str]:
+    if dataset_path and os.path.exists(dataset_path):
+        from evaluation import _clean_dataset_text, _read_test_rows
+
+        texts = [_clean_dataset_text(row.get("article", "")) for row in _read_test_rows(dataset_path)[:limit]]
+        texts = [t for t in texts if t]
+        if texts:
+            return texts
+    sample = (
+        "هوش مصنوعی یکی از مهم‌ترین فناوری‌های قرن بیست‌ویکم است. "
+        "این فناوری توانسته است در حوزه‌های مختلفی مانند پزشکی، صنعت و آموزش تحول ایجاد کند. "
+        "کارشناسان معتقدند که هوش مصنوعی اقتصاد جهان را تحت تأثیر قرار خواهد داد. "
+        "با این حال، نگرانی‌هایی درباره اخلاق و امنیت داده‌ها وجود دارد. "
+    )
+    return [sample * 8] * limit
+
+
+def _thread_candidates(cores: int) -> List[int]:
+    candidates = []
+    value = 1
+    while value <= cores:
+        candidates.append(value)
+        value *= 2
+    if cores not in candidates:
+        candidates.append(cores)
+    return candidates
+
+
+def _run_concurrently(fn, items: List[Any], slots: int) -> Dict[str, float]:
+    latencies: List[float] = []
+
+    def _timed(item):
+        started = time.perf_counter()
+        fn(item)
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=slots) as pool:
+        list(pool.map(_timed, items))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "wall_sec": round(elapsed, 4),
+        "throughput_per_sec": round(len(items) / elapsed, 3) if elapsed else 0.0,
+        "p95_sec": round(latencies[int(0.95 * (len(latencies) - 1))], 4) if latencies else 0.0,
+    }
+
+
+def bench_extractive(texts: List[str], slots: int, blas_threads: int) -> Dict[str, Any]:
+    # Runs in a subprocess started by _bench_extractive_subprocess, whose
+    # *_NUM_THREADS environment already limits every thread's pools.
+    from threadpoolctl import threadpool_info
+
+    from extractive import textrank_summarize
+
+    textrank_summarize(texts[0])
+    result = _run_concurrently(lambda t: textrank_summarize(t), texts, slots)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        pools = pool.submit(threadpool_info).result()
+    return {
+        "blas_threads": blas_threads,
+        "slots": slots,
+        "worker_blas_threads": max((p["num_threads"] for p in pools), default=None),
+        **result,
+    }
+
+
+def _bench_extractive_subprocess(args, blas_threads: int) -> Optional[Dict[str, Any]]:
+    # A threadpool_limits on this thread would not reach the benchmark's
+    # worker threads; the environment is read by every pool when it loads.
+    cmd = [
+        sys.executable, os.path.abspath(__file__), "bench-extractive",
+        "--slots", str(args.concurrency), "--blas-threads", str(blas_threads),
+        "--samples", str(args.samples),
+    ]
+    if args.dataset:
+        cmd += ["--dataset", args.dataset]
+    env = dict(os.environ, BLAS_THREADS=str(blas_threads))
+    env.update({name: str(blas_threads) for name in _BLAS_ENV_VARS})
+    proc = subprocess.run(cmd, capture_output=True, text=True, env=env)
+    if proc.returncode != 0:
+        logger.warning("extractive benchmark failed for blas_threads=%s: %s", blas_threads, proc.stderr.strip()[-500:])
+        return None
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def bench_torch(texts: List[str], slots: int, intra: int, inter: int, max_new_tokens: int) -> Dict[str, Any]:
+    import torch
+
+    apply_torch_threads(torch, intra=intra, inter=inter)
+
+    from abstractive import _load_model, _summarize_one
+
+    model, tokenizer, _ = _load_model()
+    generated = []
+
+    def _one(text):
+        stats: Dict[str, Any] = {}
+        _summarize_one(
+            model,
+            tokenizer,
+            text,
+            max_new_tokens=max_new_tokens,
+            min_new_tokens=min(10, max_new_tokens),
+            stats=stats,
+        )
+        generated.append(stats.get("generated_tokens", 0))
+
+    _one(texts[0])
+    generated.clear()
+    result = _run_concurrently(_one, texts, slots)
+    return {
+        "torch_intra_op_threads": intra,
+        "torch_inter_op_threads": inter,
+        "slots": slots,
+        "tokens_per_sec": round(sum(generated) / result["wall_sec"], 2) if result["wall_sec"] else 0.0,
+        **result,
+    }
+
+
+def _bench_torch_subprocess(args, slots: int, intra: int, inter: int) -> Optional[Dict[str, Any]]:
+    # torch inter-op threads can only be set once per process.
+    cmd = [
+        sys.executable, os.path.abspath(__file__), "bench-torch",
+        "--slots", str(slots), "--intra", str(intra), "--inter", str(inter),
+        "--samples", str(args.samples), "--max-new-tokens", str(args.max_new_tokens),
+    ]
+    if args.dataset:
+        cmd += ["--dataset", args.dataset]
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    if proc.returncode != 0:
+        logger.warning("torch benchmark failed for slots=%s intra=%s inter=%s: %s", slots, intra, inter, proc.stderr.strip()[-500:])
+        return None
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def autotune(args) -> Dict[str, Any]:
+    cores = _cpu_count()
+    report: Dict[str, Any] = {"cores": cores, "extractive": [], "torch": []}
+
+    for blas_threads in _thread_candidates(cores):
+        result = _bench_extractive_subprocess(args, blas_threads)
+        if result:
+            report["extractive"].append(result)
+            print(json.dumps(result), file=sys.stderr)
+    best_extractive = max(report["extractive"], key=lambda r: r["throughput_per_sec"], default=None)
+
+    config: Dict[str, Any] = {
+        "blas_threads": best_extractive["blas_threads"] if best_extractive else None,
+        "inference_slots": None,
+        "torch_intra_op_threads": None,
+        "torch_inter_op_threads": None,
+    }
+
+    if not args.skip_torch:
+        for slots in _thread_candidates(cores):
+            for intra in _thread_candidates(cores // slots):
+                for inter in (1, 2):
+                    result = _bench_torch_subprocess(args, slots, intra, inter)
+                    if result:
+                        report["torch"].append(result)
+                        print(json.dumps(result), file=sys.stderr)
+        if report["torch"]:
+            best_torch = max(report["torch"], key=lambda r: r["tokens_per_sec"])
+            config.update(
+                inference_slots=best_torch["slots"],
+                torch_intra_op_threads=best_torch["torch_intra_op_threads"],
+                torch_inter_op_threads=best_torch["torch_inter_op_threads"],
+            )
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return config
+
+
+def main() -> None:
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
+    default_dataset = os.path.join(os.path.dirname(__file__), "dataset", "test.csv")
+    parser = argparse.ArgumentParser(description="Thread/affinity runtime configuration")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    show = sub.add_parser("show", help="Print the effective runtime configuration")
+    show.set_defaults(func=lambda args: print(json.dumps(get_runtime_config(), indent=2)))
+
+    tune = sub.add_parser("autotune", help="Benchmark thread settings on this host and write the best config")
+    tune.add_argument("--output", default=DEFAULT_CONFIG_PATH)
+    tune.add_argument("--report", help="Also write every measurement to this JSON file")
+    tune.add_argument("--dataset", default=default_dataset)
+    tune.add_argument("--samples", type=int, default=16)
+    tune.add_argument("--concurrency", type=int, default=_cpu_count())
+    tune.add_argument("--max-new-tokens", type=int, default=40)
+    tune.add_argument("--skip-torch", action="store_true")
+    tune.set_defaults(func=lambda args: print(json.dumps(autotune(args), indent=2)))
+
+    textrank_bench = sub.add_parser("bench-extractive", help=argparse.SUPPRESS)
+    textrank_bench.add_argument("--slots", type=int, required=True)
+    textrank_bench.add_argument("--blas-threads", type=int, required=True)
+    textrank_bench.add_argument("--dataset", default=default_dataset)
+    textrank_bench.add_argument("--samples", type=int, default=16)
+    textrank_bench.set_defaults(
+        func=lambda args: print(
+            json.dumps(bench_extractive(_sample_texts(args.dataset, args.samples), args.slots, args.blas_threads))
+        )
+    )
+
+    bench = sub.add_parser("bench-torch", help=argparse.SUPPRESS)
+    bench.add_argument("--slots", type=int, required=True)
+    bench.add_argument("--intra", type=int, required=True)
+    bench.add_argument("--inter", type=int, required=True)
+    bench.add_argument("--dataset", default=default_dataset)
+    bench.add_argument("--samples", type=int, default=16)
+    bench.add_argument("--max-new-tokens", type=int, default=40)
+    bench.set_defaults(
+        func=lambda args: print(
+            json.dumps(
+                bench_torch(
+                    _sample_texts(args.dataset, args.samples),
+                    args.slots, args.intra, args.inter, args.max_new_tokens,
+                )
+            )
+        )
+    )
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+import argparse
+import gc
+import logging
+import os
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import time
+
+import uvicorn
+
+from runtime_config import SERVING_PROFILE, apply_torch_threads, export_blas_env, get_runtime_config
+
+logger = logging.getLogger("summarizer.serve")
+
+WEB_WORKERS = int(os.getenv("WEB_WORKERS", "1"))
+PRELOAD_MODEL = os.getenv("PRELOAD_MODEL", "1") == "1"
+WORKER_CPU_AFFINITY = os.getenv("WORKER_CPU_AFFINITY", "0") == "1"
+
+
+def _bind_socket(host: str, port: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _available_cpus():
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def _threads_per_worker(workers: int) -> int:
+    configured = os.getenv("TORCH_THREADS_PER_WORKER") or get_runtime_config()["torch_intra_op_threads"]
+    if configured:
+        return max(1, int(configured))
+    return max(1, len(_available_cpus()) // max(1, workers))
+
+
+def _preload():
+    if SERVING_PROFILE == "full":
+        import torch
+
+        # Keep the parent single-threaded: an OpenMP pool created before fork()
+        # is not usable in the children and can deadlock their first parallel op.
+        apply_torch_threads(torch, intra=1)
+
+    import main
+
+    if SERVING_PROFILE == "extractive":
+        from preprocessing import _get_normalizer
+
+        # hazm's word lists are the largest thing an extractive worker loads.
+        _get_normalizer()
+
+    if SERVING_PROFILE == "full" and PRELOAD_MODEL:
+        from abstractive import _load_model
+
+        try:
+            _load_model()
+        except FileNotFoundError:
+            logger.warning("Abstractive model not found; workers will load it lazily")
+
+    # Move everything allocated so far out of the GC's tracked generations so
+    # collections in the workers do not touch (and copy) the shared pages.
+    gc.collect()
+    gc.freeze()
+    return main.app
+
+
+def _configure_worker(index: int, workers: int) -> None:
+    threads = _threads_per_worker(workers)
+    if WORKER_CPU_AFFINITY and hasattr(os, "sched_setaffinity"):
+        cpus = _available_cpus()
+        start = (index * threads) % len(cpus)
+        os.sched_setaffinity(0, cpus[start : start + threads] or cpus)
+    if SERVING_PROFILE == "full":
+        import torch
+
+        apply_torch_threads(torch, intra=threads)
+    logger.info("worker %s pid=%s profile=%s threads=%s", index, os.getpid(), SERVING_PROFILE, threads)
+
+
+def _run_worker(app, sock: socket.socket, index: int, workers: int, log_level: str) -> None:
+    _configure_worker(index, workers)
+    config = uvicorn.Config(app, log_level=log_level)
+    server = uvicorn.Server(config)
+    server.run(sockets=[sock])
+
+
+def _shared_state_dir() -> str:
+    """Evaluation jobs and profiles live in the worker that created them; with
+    several workers they are also written to a directory all of them read.
+    Returns the directory if this call created it."""
+    if os.getenv("SHARED_STATE_DIR"):
+        return ""
+    directory = tempfile.mkdtemp(prefix="summarizer-state-")
+    os.environ["SHARED_STATE_DIR"] = directory
+    return directory
+
+
+def serve(host: str, port: int, workers: int, log_level: str) -> None:
+    sock = _bind_socket(host, port)
+    if workers <= 1:
+        _run_worker(_preload(), sock, 0, 1, log_level)
+        return
+
+    # Before the preload imports main, which reads SHARED_STATE_DIR.
+    created = _shared_state_dir()
+    try:
+        _serve_workers(_preload(), sock, workers, log_level)
+    finally:
+        if created:
+            shutil.rmtree(created, ignore_errors=True)
+
+
+def _serve_workers(app, sock: socket.socket, workers: int, log_level: str) -> None:
+    children = {}
+    stopping = False
+
+    def _spawn(index: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            try:
+                _run_worker(app, sock, index, workers, log_level)
+            finally:
+                os._exit(0)
+        children[pid] = index
+
+    def _stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, _stop)
+    signal.signal(signal.SIGTERM, _stop)
+
+    for index in range(workers):
+        _spawn(index)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        index = children.pop(pid, None)
+        if index is None or stopping:
+            continue
+        logger.warning("worker %s (pid=%s) exited with status %s; restarting", index, pid, status)
+        time.sleep(1)
+        _spawn(index)
+
+
+def main() -> None:
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
+    parser = argparse.ArgumentParser(
+        description="Serve the API with N forked workers sharing preloaded model weights."
+    )
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=WEB_WORKERS)
+    parser.add_argument("--log-level", default=os.getenv("LOG_LEVEL", "info").lower())
+    args = parser.parse_args()
+
+    if args.workers > 1 and not hasattr(os, "fork"):
+        sys.exit("Multi-worker mode needs fork(); run a single worker on this platform.")
+    # Before the preload imports numpy/torch, so every worker thread inherits it.
+    export_blas_env()
+
+    serve(args.host, args.port, args.workers, args.log_level)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,408 @@
+import argparse
+import json
+import logging
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from evaluation import _eval_samples, evaluate_records, finalize_records
+from pipelines import DEFAULT_LANGUAGE
+from sweep import SWEEPABLE_PARAMS
+
+logger = logging.getLogger("summarizer.shard_eval")
+
+SHARD_SIZE = int(os.getenv("SHARD_EVAL_SIZE", "50"))
+SHARD_RETRIES = int(os.getenv("SHARD_EVAL_RETRIES", "2"))
+SHARD_TIMEOUT_SEC = float(os.getenv("SHARD_EVAL_TIMEOUT_SEC", "3600"))
+WORKER_STARTUP_SEC = 60.0
+
+# Evaluation settings forwarded unchanged to every shard; the row range is
+# the only thing that differs between shards.
+SHARD_PARAMS = SWEEPABLE_PARAMS + ("shuffle", "seed", "segmenter")
+
+
+def plan_shards(total: int, start_index: int, shard_size: int) -> List[Dict[str, int]]:
+    # Shard offsets are positions in the selected (possibly shuffled) order:
+    # _select shuffles the full list with the same seed before slicing, so
+    # start_index + offset selects exactly that slice on every worker.
+    shard_size = max(1, shard_size)
+    return [
+        {"shard": number, "start_index": start_index + offset, "max_samples": min(shard_size, total - offset)}
+        for number, offset in enumerate(range(0, total, shard_size))
+    ]
+
+
+def run_shard(spec: Dict[str, Any]) -> Dict[str, Any]:
+    started = time.perf_counter()
+    records, counts = evaluate_records(
+        spec["dataset_path"],
+        start_index=spec["start_index"],
+        max_samples=spec["max_samples"],
+        **{key: spec[key] for key in SHARD_PARAMS if key in spec},
+    )
+    return {
+        "shard": spec.get("shard"),
+        "records": records,
+        "counts": counts,
+        "elapsed_sec": round(time.perf_counter() - started, 3),
+    }
+
+
+class _WorkerHandler(BaseHTTPRequestHandler):
+    # One shard at a time per worker; the model is the bottleneck anyway.
+    shard_lock = threading.Lock()
+
+    def _reply(self, status: int, payload: Dict[str, Any]) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        if self.path != "/healthz":
+            self._reply(404, {"error": "not found"})
+            return
+        self._reply(200, {"status": "ok", "busy": self.shard_lock.locked(), "pid": os.getpid()})
+
+    def do_POST(self) -> None:
+        if self.path != "/shard":
+            self._reply(404, {"error": "not found"})
+            return
+        try:
+            spec = json.loads(self.rfile.read(int(self.headers.get("Content-Length", "0"))))
+        except (ValueError, json.JSONDecodeError) as e:
+            self._reply(400, {"error": f"invalid shard spec: {e}"})
+            return
+        with self.shard_lock:
+            try:
+                result = run_shard(spec)
+            except Exception as e:
+                logger.exception("Shard %s failed", spec.get("shard"))
+                self._reply(500, {"error": str(e), "shard": spec.get("shard")})
+                return
+        self._reply(200, result)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.info("%s %s", self.address_string(), format % args)
+
+
+def serve_worker(host: str, port: int) -> None:
+    from runtime_config import apply_blas_limits
+
+    apply_blas_limits()
+    server = ThreadingHTTPServer((host, port), _WorkerHandler)
+    logger.info("Shard worker %d listening on %s:%d", os.getpid(), host, port)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+def _post_shard(worker: str, spec: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+    request = urllib.request.Request(
+        f"{worker.rstrip('/')}/shard",
+        data=json.dumps(spec, ensure_ascii=False).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        detail = e.read().decode("utf-8", "replace")
+        raise RuntimeError(f"{worker} returned {e.code}: {detail}") from e
+
+
+def _wait_healthy(worker: str, deadline: float) -> None:
+    while True:
+        try:
+            with urllib.request.urlopen(f"{worker}/healthz", timeout=2) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            pass
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"Worker {worker} did not start")
+        time.sleep(0.2)
+
+
+def spawn_local_workers(count: int, base_port: int, host: str = "127.0.0.1") -> Tuple[List[str], List[subprocess.Popen]]:
+    # Worker processes stand in for nodes; each gets an equal share of the
+    # cores unless thread counts are already configured.
+    threads = str(max(1, (os.cpu_count() or 1) // max(1, count)))
+    env = dict(os.environ)
+    env.setdefault("TORCH_INTRA_OP_THREADS", threads)
+    env.setdefault("BLAS_THREADS", threads)
+    workers, processes = [], []
+    for index in range(count):
+        port = base_port + index
+        processes.append(
+            subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), "worker", "--host", host, "--port", str(port)],
+                cwd=os.path.dirname(os.path.abspath(__file__)),
+                env=env,
+            )
+        )
+        workers.append(f"http://{host}:{port}")
+    try:
+        deadline = time.monotonic() + WORKER_STARTUP_SEC
+        for worker in workers:
+            _wait_healthy(worker, deadline)
+    except Exception:
+        stop_local_workers(processes)
+        raise
+    return workers, processes
+
+
+def stop_local_workers(processes: List[subprocess.Popen]) -> None:
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def _dispatch(
+    workers: List[str],
+    shards: List[Dict[str, Any]],
+    base_spec: Dict[str, Any],
+    retries: int,
+    timeout: float,
+    post: Callable[[str, Dict[str, Any], float], Dict[str, Any]],
+    progress_cb: Optional[Callable[[int, int], None]],
+) -> Tuple[Dict[int, Dict[str, Any]], Dict[int, int]]:
+    if not shards:
+        return {}, {}
+    pending: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+    for shard in shards:
+        pending.put(shard)
+    results: Dict[int, Dict[str, Any]] = {}
+    attempts: Dict[int, int] = {shard["shard"]: 0 for shard in shards}
+    failed_on: Dict[int, set] = {shard["shard"]: set() for shard in shards}
+    live = set(workers)
+    failure: List[str] = []
+    lock = threading.Lock()
+    finished = threading.Event()
+
+    def _worker_loop(worker: str) -> None:
+        consecutive_failures = 0
+        while not finished.is_set():
+            try:
+                shard = pending.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            number = shard["shard"]
+            with lock:
+                # Leave a shard this node already failed to another live node,
+                # so one unreachable node cannot use up its retries.
+                retry_elsewhere = worker in failed_on[number] and bool(live - failed_on[number])
+            if retry_elsewhere:
+                pending.put(shard)
+                time.sleep(0.1)
+                continue
+            try:
+                result = post(worker, {**base_spec, **shard}, timeout)
+            except Exception as e:
+                consecutive_failures += 1
+                with lock:
+                    attempts[number] += 1
+                    failed_on[number].add(worker)
+                    logger.warning("Shard %d failed on %s (attempt %d): %s", number, worker, attempts[number], e)
+                    if attempts[number] > retries:
+                        failure.append(f"shard {number} failed {attempts[number]} times: {e}")
+                        finished.set()
+                        return
+                pending.put(shard)
+                # A node that keeps failing is dropped; its shards go to the others.
+                if consecutive_failures > retries:
+                    logger.warning("Dropping worker %s after %d consecutive failures", worker, consecutive_failures)
+                    with lock:
+                        live.discard(worker)
+                    return
+                time.sleep(min(5.0, 0.5 * consecutive_failures))
+                continue
+            consecutive_failures = 0
+            with lock:
+                results[number] = result
+                attempts[number] += 1
+                done = len(results)
+            if progress_cb:
+                progress_cb(done, len(shards))
+            if done == len(shards):
+                finished.set()
+
+    threads = [threading.Thread(target=_worker_loop, args=(worker,), daemon=True) for worker in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    if failure:
+        raise RuntimeError(failure[0])
+    if len(results) < len(shards):
+        raise RuntimeError(f"All workers failed; {len(shards) - len(results)} shards were not evaluated")
+    return results, attempts
+
+
+def evaluate_sharded(
+    dataset_path: str,
+    workers: List[str],
+    method: str,
+    length: int,
+    extractive_length: int,
+    abstractive_length: int,
+    max_samples: int,
+    start_index: int,
+    shuffle: bool,
+    seed: int,
+    shard_size: int = SHARD_SIZE,
+    retries: int = SHARD_RETRIES,
+    timeout: float = SHARD_TIMEOUT_SEC,
+    per_sample_path: Optional[str] = None,
+    report: Optional[Dict[str, Any]] = None,
+    progress_cb: Optional[Callable[[int, int], None]] = None,
+    post: Callable[[str, Dict[str, Any], float], Dict[str, Any]] = _post_shard,
+    **params: Any,
+) -> Tuple[Dict[str, Dict[str, float]], Dict[str, float], Dict[str, int]]:
+    if not workers:
+        raise ValueError("At least one worker is required")
+    unknown = sorted(set(params) - set(SHARD_PARAMS))
+    if unknown:
+        raise ValueError(f"Unsupported evaluation parameters: {', '.join(unknown)}")
+
+    start_index = max(0, start_index)
+    total, _ = _eval_samples(dataset_path, max_samples, start_index, shuffle, seed)
+    shards = plan_shards(total, start_index, shard_size)
+    base_spec = {
+        "dataset_path": dataset_path,
+        "method": method,
+        "length": length,
+        "extractive_length": extractive_length,
+        "abstractive_length": abstractive_length,
+        "shuffle": shuffle,
+        "seed": seed,
+        **params,
+    }
+
+    started = time.perf_counter()
+    results, attempts = _dispatch(workers, shards, base_spec, retries, timeout, post, progress_cb)
+
+    # Shards are concatenated in row order, so the totals are summed in the
+    # same order as a single-process run and the averages match exactly.
+    records: List[Dict[str, Any]] = []
+    counts = {"samples": 0, "skipped": 0}
+    for shard in shards:
+        result = results[shard["shard"]]
+        records.extend(result["records"])
+        for key in counts:
+            counts[key] += result["counts"][key]
+
+    if report is not None:
+        report["shards"] = [
+            {
+                **shard,
+                "attempts": attempts[shard["shard"]],
+                "elapsed_sec": results[shard["shard"]].get("elapsed_sec"),
+            }
+            for shard in shards
+        ]
+        report["workers"] = list(workers)
+        report["elapsed_sec"] = round(time.perf_counter() - started, 3)
+    return finalize_records(records, counts, seed, per_sample_path, report)
+
+
+def main() -> None:
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
+    parser = argparse.ArgumentParser(description="Run evaluate_dataset across several worker nodes.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    worker = commands.add_parser("worker", help="Serve shards over HTTP")
+    worker.add_argument("--host", default="0.0.0.0")
+    worker.add_argument("--port", type=int, default=8765)
+
+    coordinate = commands.add_parser("coordinate", help="Split the dataset into shards and merge the results")
+    coordinate.add_argument("dataset_path")
+    coordinate.add_argument("--workers", nargs="+", default=[], help="Worker base URLs, e.g. http://node1:8765")
+    coordinate.add_argument("--local", type=int, default=0, help="Spawn this many local worker processes")
+    coordinate.add_argument("--base-port", type=int, default=8765)
+    coordinate.add_argument("--method", choices=["extractive", "abstractive", "hybrid"], default="extractive")
+    coordinate.add_argument("--length", type=int, default=30)
+    coordinate.add_argument("--extractive-length", type=int)
+    coordinate.add_argument("--abstractive-length", type=int)
+    coordinate.add_argument("--num-beams", type=int, default=2)
+    coordinate.add_argument("--lang", choices=["auto", "fa", "en"], default=DEFAULT_LANGUAGE)
+    coordinate.add_argument("--segmenter", choices=["hazm", "fast"], default="hazm")
+    coordinate.add_argument("--max-samples", type=int, default=0, help="0 evaluates every row")
+    coordinate.add_argument("--start-index", type=int, default=0)
+    coordinate.add_argument("--shuffle", action="store_true")
+    coordinate.add_argument("--seed", type=int, default=42)
+    coordinate.add_argument("--shard-size", type=int, default=SHARD_SIZE)
+    coordinate.add_argument("--retries", type=int, default=SHARD_RETRIES)
+    coordinate.add_argument("--timeout", type=float, default=SHARD_TIMEOUT_SEC, help="Seconds per shard request")
+    coordinate.add_argument("--per-sample", help="Export per-sample records (.csv or .parquet)")
+    coordinate.add_argument("--output", help="Write the JSON report to this path")
+    args = parser.parse_args()
+
+    if args.command == "worker":
+        serve_worker(args.host, args.port)
+        return
+
+    workers, processes = list(args.workers), []
+    if args.local:
+        local, processes = spawn_local_workers(args.local, args.base_port)
+        workers += local
+    report: Dict[str, Any] = {}
+    try:
+        metrics, length_metrics, counts = evaluate_sharded(
+            args.dataset_path,
+            workers,
+            method=args.method,
+            length=args.length,
+            extractive_length=args.extractive_length or args.length,
+            abstractive_length=args.abstractive_length or args.length,
+            max_samples=args.max_samples,
+            start_index=args.start_index,
+            shuffle=args.shuffle,
+            seed=args.seed,
+            shard_size=args.shard_size,
+            retries=args.retries,
+            timeout=args.timeout,
+            per_sample_path=args.per_sample,
+            report=report,
+            progress_cb=lambda done, total: print(f"[shard_eval] {done}/{total} shards", file=sys.stderr, flush=True),
+            abstractive_num_beams=args.num_beams,
+            lang=args.lang,
+            segmenter=args.segmenter,
+        )
+    finally:
+        stop_local_workers(processes)
+
+    summary = {
+        "metrics": metrics,
+        "length_metrics": length_metrics,
+        "counts": counts,
+        "confidence_intervals": report["confidence_intervals"],
+        "shards": report["shards"],
+        "workers": report["workers"],
+        "elapsed_sec": report["elapsed_sec"],
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+    else:
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
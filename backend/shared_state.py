@@ -0,0 +1,88 @@
+import json
+import os
+import re
+import tempfile
+import time
+from typing import Any, Dict, Optional
+
+# serve.py points this at a directory all of its forked workers see. Each
+# worker keeps evaluation jobs and profiles in its own memory; without a
+# shared copy a status or profile lookup that lands on another worker 404s.
+SHARED_STATE_DIR = os.getenv("SHARED_STATE_DIR", "")
+
+_KEY_RE = re.compile(r"^[\w-]{1,128}$")
+
+
+class SharedStore:
+    """JSON documents by key in a directory shared between worker processes.
+    Writes replace the file atomically, so readers see the old or the new
+    document, never a partial one. Disabled (every call a no-op) when no
+    directory is configured."""
+
+    def __init__(self, name: str, root: Optional[str] = None):
+        root = SHARED_STATE_DIR if root is None else root
+        self.directory = os.path.join(root, name) if root else None
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+    @property
+    def enabled(self) -> bool:
+        return self.directory is not None
+
+    def _path(self, key: str) -> Optional[str]:
+        # Keys come from URLs; anything that is not a plain id never maps to a file.
+        if not self.directory or not _KEY_RE.match(key):
+            return None
+        return os.path.join(self.directory, f"{key}.json")
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        path = self._path(key)
+        if path is None:
+            return
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(value, f, ensure_ascii=False)
+            os.replace(tmp, path)
+        except BaseException:
+            os.remove(tmp)
+            raise
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        if path is None:
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def delete(self, key: str) -> None:
+        path = self._path(key)
+        if path is None:
+            return
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def expire(self, max_age_sec: float, max_items: Optional[int] = None) -> None:
+        """Removes documents not written for max_age_sec, then the oldest
+        beyond max_items."""
+        if not self.directory:
+            return
+        entries = []
+        for entry in os.scandir(self.directory):
+            try:
+                entries.append((entry.stat().st_mtime, entry.path))
+            except FileNotFoundError:
+                continue
+        entries.sort(reverse=True)
+        cutoff = time.time() - max_age_sec
+        for position, (mtime, path) in enumerate(entries):
+            if mtime < cutoff or (max_items is not None and position >= max_items):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
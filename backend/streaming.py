@@ -0,0 +1,176 @@
+import heapq
+import os
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+
+from extractive import pagerank_sparse, summary_size
+from preprocessing import normalize_text_language, sentence_tokenize
+from profiling import stage
+
+STREAM_WINDOW_SENTENCES = int(os.getenv("STREAM_WINDOW_SENTENCES", "200"))
+STREAM_CANDIDATES = int(os.getenv("STREAM_CANDIDATES", "1024"))
+# The summary of an unbounded stream is capped; the ratio alone would grow it
+# with the input.
+STREAM_MAX_SUMMARY_SENTENCES = int(os.getenv("STREAM_MAX_SUMMARY_SENTENCES", "256"))
+STREAM_MAX_BYTES = int(os.getenv("STREAM_MAX_BYTES", str(512 * 1024 * 1024)))
+# Hashed features need no vocabulary fitted over the whole document.
+HASH_FEATURES = 2**18
+SIMILARITY_THRESHOLD = 0.1
+
+
+def _textrank_scores(counts, personalization=None) -> np.ndarray:
+    # Dense-path TextRank over term counts, with scores scaled to mean 1 so
+    # windows of different sizes are comparable.
+    n = counts.shape[0]
+    if n == 1:
+        return np.ones(1)
+    tfidf = TfidfTransformer().fit_transform(counts)
+    similarity = (tfidf @ tfidf.T).tocsr()
+    similarity.setdiag(0.0)
+    similarity.data[similarity.data <= SIMILARITY_THRESHOLD] = 0.0
+    similarity.eliminate_zeros()
+    scores = pagerank_sparse(similarity, personalization=personalization)
+    return np.fromiter(scores.values(), dtype=float, count=n) * n
+
+
+def _stack_counts(rows: List[Any]) -> sparse.csr_matrix:
+    indptr = np.cumsum([0] + [len(indices) for indices, _ in rows])
+    indices = np.concatenate([indices for indices, _ in rows])
+    data = np.concatenate([data for _, data in rows])
+    return sparse.csr_matrix((data, indices, indptr), shape=(len(rows), HASH_FEATURES))
+
+
+class StreamingTextRank:
+    """TextRank over a sentence stream in fixed windows. Each window is
+    ranked on its own and its best sentences compete for a bounded heap of
+    candidates; the summary re-ranks the candidates against each other, with
+    the window scores as PageRank personalization. Memory depends on the
+    window and candidate counts, not on the length of the input."""
+
+    def __init__(
+        self,
+        window: int = STREAM_WINDOW_SENTENCES,
+        candidates: int = STREAM_CANDIDATES,
+        max_summary: int = STREAM_MAX_SUMMARY_SENTENCES,
+    ):
+        self.window = max(2, window)
+        self.candidates = max(1, candidates, max_summary)
+        self.max_summary = max(1, max_summary)
+        self.num_sentences = 0
+        self.ranked = 0
+        self.windows = 0
+        self._vectorizer = HashingVectorizer(n_features=HASH_FEATURES, alternate_sign=False, norm=None)
+        self._pending: List[str] = []
+        # Min-heap of (window score, index, sentence, (term ids, counts)).
+        self._heap: List[Any] = []
+
+    def add(self, sentences: Iterable[str]) -> int:
+        """Queues sentences and ranks every window they complete; returns the
+        number of windows ranked."""
+        ranked = 0
+        for sentence in sentences:
+            self._pending.append(sentence)
+            self.num_sentences += 1
+            if len(self._pending) >= self.window:
+                self._rank_window()
+                ranked += 1
+        return ranked
+
+    def _rank_window(self) -> None:
+        sentences, self._pending = self._pending, []
+        start = self.ranked
+        with stage("stream_window"):
+            counts = self._vectorizer.transform(sentences)
+            scores = _textrank_scores(counts)
+        indptr = counts.indptr
+        for offset, sentence in enumerate(sentences):
+            score = float(scores[offset])
+            if len(self._heap) >= self.candidates and score <= self._heap[0][0]:
+                continue
+            # Copies, so the window's matrix is not kept alive by its rows.
+            row = slice(indptr[offset], indptr[offset + 1])
+            item = (score, start + offset, sentence, (counts.indices[row].copy(), counts.data[row].copy()))
+            if len(self._heap) < self.candidates:
+                heapq.heappush(self._heap, item)
+            else:
+                heapq.heapreplace(self._heap, item)
+        self.ranked += len(sentences)
+        self.windows += 1
+
+    def result(self, summary_ratio: float = 0.3, num_sentences: Optional[int] = None) -> Dict[str, Any]:
+        """The summary of the windows ranked so far; sentences still waiting
+        for their window to fill are not included."""
+        stats = {"windows": self.windows, "candidates": len(self._heap), "pending": len(self._pending)}
+        if not self.ranked:
+            return {
+                "summary": "",
+                "num_original_sentences": 0,
+                "num_summary_sentences": 0,
+                "summary_ratio": 0,
+                "selected_indices": [],
+                "scores": {},
+                "streaming": stats,
+            }
+
+        items = sorted(self._heap, key=lambda item: item[1])
+        local = np.array([item[0] for item in items])
+        if self.windows == 1 and len(items) == self.ranked:
+            # A single window already saw every sentence.
+            scores = local
+        else:
+            with stage("stream_rerank"):
+                scores = _textrank_scores(_stack_counts([item[3] for item in items]), personalization=local)
+
+        num_summary = min(summary_size(self.ranked, summary_ratio, num_sentences), self.max_summary, len(items))
+        top = np.argsort(-scores, kind="stable")[:num_summary]
+        selected = sorted(int(position) for position in top)
+        return {
+            "summary": " ".join(items[position][2] for position in selected),
+            "num_original_sentences": self.ranked,
+            "num_summary_sentences": num_summary,
+            "summary_ratio": num_summary / self.ranked,
+            "selected_indices": [items[position][1] for position in selected],
+            "scores": {item[1]: float(score) for item, score in zip(items, scores)},
+            "streaming": stats,
+        }
+
+    def finish(self, summary_ratio: float = 0.3, num_sentences: Optional[int] = None) -> Dict[str, Any]:
+        if self._pending:
+            self._rank_window()
+        return self.result(summary_ratio, num_sentences)
+
+
+def stream_summarize(
+    sentences: Iterable[str],
+    summary_ratio: float = 0.3,
+    num_sentences: Optional[int] = None,
+    ranker: Optional[StreamingTextRank] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Yields the summary so far after every window and the final summary
+    last (its streaming["pending"] is 0)."""
+    ranker = ranker or StreamingTextRank()
+    for sentence in sentences:
+        if ranker.add((sentence,)):
+            yield ranker.result(summary_ratio, num_sentences)
+    yield ranker.finish(summary_ratio, num_sentences)
+
+
+def stream_textrank_summarize(
+    text: str,
+    summary_ratio: float = 0.3,
+    num_sentences: Optional[int] = None,
+    lang: str = "fa",
+    segmenter: str = "hazm",
+    sentences: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    if sentences is None:
+        with stage("normalize"):
+            text = normalize_text_language(text, lang=lang, remove_punct=False, replace_halfspace=False, segmenter=segmenter)
+        with stage("sentence_split"):
+            sentences = sentence_tokenize(text, lang=lang, segmenter=segmenter)
+    ranker = StreamingTextRank()
+    ranker.add(sentences)
+    return ranker.finish(summary_ratio, num_sentences)
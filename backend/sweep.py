@@ -0,0 +1,274 @@
+import itertools
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from evaluation import (
+    _aggregate_records,
+    _clean_dataset_text,
+    _eval_samples,
+    _extractive_ratio,
+    _generate_summary,
+    _sample_record,
+)
+from extractive import textrank_summarize
+from metrics import confidence_intervals, export_per_sample
+from pipelines import DEFAULT_LANGUAGE, resolve_language
+from preprocessing import sentence_tokenize
+
+SWEEP_WORKERS = int(os.getenv("SWEEP_WORKERS", "2"))
+SWEEP_MAX_CONFIGS = int(os.getenv("SWEEP_MAX_CONFIGS", "64"))
+
+SWEEPABLE_PARAMS = (
+    "method",
+    "length",
+    "extractive_length",
+    "abstractive_length",
+    "abstractive_num_beams",
+    "abstractive_length_penalty",
+    "abstractive_repetition_penalty",
+    "abstractive_no_repeat_ngram_size",
+    "abstractive_decoding",
+    "abstractive_decoding_scope",
+    "lang",
+)
+
+
+def expand_grid(base: Dict[str, Any], grid: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    unknown = sorted(set(grid) - set(SWEEPABLE_PARAMS))
+    if unknown:
+        raise ValueError(f"Unsupported sweep parameters: {', '.join(unknown)}")
+    keys = [key for key, values in grid.items() if values]
+    configs = []
+    for values in itertools.product(*(grid[key] for key in keys)):
+        config = dict(base)
+        config.update(zip(keys, values))
+        configs.append(config)
+    if len(configs) > SWEEP_MAX_CONFIGS:
+        raise ValueError(f"Sweep grid has {len(configs)} configs; the limit is {SWEEP_MAX_CONFIGS}")
+    return configs
+
+
+def _load_samples(
+    dataset_path: str,
+    max_samples: int,
+    start_index: int,
+    shuffle: bool,
+    seed: int,
+    with_token_ids: bool = False,
+    segmenter: str = "hazm",
+) -> List[Dict[str, Any]]:
+    samples = []
+    _, selected = _eval_samples(
+        dataset_path, max_samples, start_index, shuffle, seed, with_token_ids=with_token_ids, segmenter=segmenter
+    )
+    for sample in selected:
+        if sample["article"] and sample["reference"]:
+            if sample.get("original_sentences") is None:
+                sample["original_sentences"] = len(sentence_tokenize(sample["article"], segmenter=segmenter))
+            samples.append(sample)
+    if not samples:
+        raise ValueError("No valid samples found for evaluation")
+    return samples
+
+
+class _ExtractiveCache:
+    def __init__(self, samples: List[Dict[str, Any]], segmenter: str = "hazm"):
+        self.samples = samples
+        self.segmenter = segmenter
+        self._outputs: Dict[Tuple[float, str], List[str]] = {}
+        self._locks: Dict[Tuple[float, str], Lock] = {}
+        self._lock = Lock()
+
+    def get(self, ratio: float, lang: str = DEFAULT_LANGUAGE) -> List[str]:
+        key = (ratio, lang)
+        with self._lock:
+            lock = self._locks.setdefault(key, Lock())
+        # Per-key lock so parallel configs sharing a ratio wait for one
+        # TextRank pass instead of each running their own.
+        with lock:
+            if key not in self._outputs:
+                self._outputs[key] = [
+                    self._summarize(sample, ratio, lang, self.segmenter) for sample in self.samples
+                ]
+            return self._outputs[key]
+
+    @staticmethod
+    def _summarize(sample: Dict[str, Any], ratio: float, lang: str, segmenter: str = "hazm") -> str:
+        lang = resolve_language(lang, sample["article"])
+        if lang == "fa" and sample.get("sentences") is not None:
+            return textrank_summarize(sample["normalized"], summary_ratio=ratio, sentences=sample["sentences"])["summary"]
+        return textrank_summarize(sample["article"], summary_ratio=ratio, lang=lang, segmenter=segmenter)["summary"]
+
+
+def _config_label(config: Dict[str, Any], grid: Dict[str, List[Any]]) -> str:
+    return ", ".join(f"{key}={config[key]}" for key in grid if grid[key])
+
+
+def _run_config(
+    config: Dict[str, Any],
+    samples: List[Dict[str, Any]],
+    extractive_cache: _ExtractiveCache,
+    chunk_cache: Dict[Any, Any],
+    on_sample: Callable[[], None],
+    per_sample_path: Optional[str] = None,
+) -> Dict[str, Any]:
+    method = config["method"]
+    extractive_length = config.get("extractive_length") or config["length"]
+    abstractive_length = config.get("abstractive_length") or config["length"]
+
+    extractive_outputs = None
+    if method in ("extractive", "hybrid"):
+        extractive_outputs = extractive_cache.get(_extractive_ratio(extractive_length), config.get("lang", DEFAULT_LANGUAGE))
+
+    records = []
+    skipped = 0
+    started = time.perf_counter()
+    for position, sample in enumerate(samples):
+        sample_started = time.perf_counter()
+        generated = _generate_summary(
+            sample["article"],
+            method=method,
+            length=config["length"],
+            extractive_length=extractive_length,
+            abstractive_length=abstractive_length,
+            abstractive_num_beams=config["abstractive_num_beams"],
+            abstractive_length_penalty=config["abstractive_length_penalty"],
+            abstractive_repetition_penalty=config["abstractive_repetition_penalty"],
+            abstractive_no_repeat_ngram_size=config["abstractive_no_repeat_ngram_size"],
+            abstractive_decoding=config["abstractive_decoding"],
+            abstractive_decoding_scope=config["abstractive_decoding_scope"],
+            extractive_summary=extractive_outputs[position] if extractive_outputs else None,
+            chunk_cache=chunk_cache,
+            token_ids=sample.get("token_ids") if method == "abstractive" else None,
+            lang=config.get("lang", DEFAULT_LANGUAGE),
+            segmenter=extractive_cache.segmenter,
+        )
+        generated = _clean_dataset_text(generated)
+        latency = time.perf_counter() - sample_started
+        on_sample()
+        if not generated:
+            skipped += 1
+            continue
+        records.append(
+            _sample_record(
+                sample["row"],
+                sample["id"],
+                sample["article"],
+                sample["reference"],
+                generated,
+                latency,
+                original_sentences=sample["original_sentences"],
+                segmenter=extractive_cache.segmenter,
+            )
+        )
+
+    averaged, length_metrics = _aggregate_records(records)
+    if per_sample_path:
+        export_per_sample(records, per_sample_path)
+    latencies = sorted(record["latency_sec"] for record in records)
+    return {
+        **averaged,
+        **length_metrics,
+        "samples": len(records),
+        "skipped": skipped,
+        "wall_sec": round(time.perf_counter() - started, 3),
+        "avg_latency_sec": round(sum(latencies) / len(latencies), 4),
+        "p95_latency_sec": latencies[int(0.95 * (len(latencies) - 1))],
+        "confidence_intervals": confidence_intervals(records),
+        "per_sample_file": os.path.basename(per_sample_path) if per_sample_path else None,
+    }
+
+
+def _config_export_path(per_sample_path: Optional[str], number: int) -> Optional[str]:
+    if not per_sample_path:
+        return None
+    root, extension = os.path.splitext(per_sample_path)
+    return f"{root}-{number}{extension}"
+
+
+def _leaderboard(entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    ranked = sorted(entries, key=lambda e: (-e["rougeL_f1"], e["avg_latency_sec"]))
+    for rank, entry in enumerate(ranked, start=1):
+        entry["rank"] = rank
+        # Pareto-optimal: no other config is both at least as accurate and faster.
+        entry["pareto"] = not any(
+            other is not entry
+            and other["rougeL_f1"] >= entry["rougeL_f1"]
+            and other["avg_latency_sec"] < entry["avg_latency_sec"]
+            for other in ranked
+        )
+    return ranked
+
+
+def run_sweep(
+    dataset_path: str,
+    base: Dict[str, Any],
+    grid: Dict[str, List[Any]],
+    max_samples: int,
+    start_index: int = 0,
+    shuffle: bool = False,
+    seed: int = 42,
+    max_workers: Optional[int] = None,
+    progress_cb: Optional[Callable[[int, int, int, int], None]] = None,
+    segmenter: str = "hazm",
+    per_sample_path: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """Evaluates every config of the grid. With per_sample_path, each config
+    exports its rows next to it as <name>-<config number><extension>."""
+    configs = expand_grid(base, grid)
+    with_token_ids = any(config["method"] == "abstractive" for config in configs)
+    samples = _load_samples(
+        dataset_path, max_samples, start_index, shuffle, seed, with_token_ids=with_token_ids, segmenter=segmenter
+    )
+    extractive_cache = _ExtractiveCache(samples, segmenter=segmenter)
+    chunk_cache: Dict[Any, Any] = {}
+
+    total = len(configs) * len(samples)
+    progress = {"processed": 0, "configs_done": 0}
+    progress_lock = Lock()
+
+    def _on_sample() -> None:
+        with progress_lock:
+            progress["processed"] += 1
+            processed = progress["processed"]
+            configs_done = progress["configs_done"]
+        if progress_cb:
+            progress_cb(processed, total, configs_done, len(configs))
+
+    entries = []
+    failed = []
+    workers = max(1, min(max_workers or SWEEP_WORKERS, len(configs)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(
+                _run_config,
+                config,
+                samples,
+                extractive_cache,
+                chunk_cache,
+                _on_sample,
+                _config_export_path(per_sample_path, number),
+            ): config
+            for number, config in enumerate(configs, start=1)
+        }
+        for future in as_completed(futures):
+            config = futures[future]
+            entry = {
+                "config": {key: config[key] for key in SWEEPABLE_PARAMS if key in config},
+                "label": _config_label(config, grid),
+            }
+            try:
+                entry.update(future.result())
+                entries.append(entry)
+            except ValueError as exc:
+                entry["error"] = str(exc)
+                failed.append(entry)
+            with progress_lock:
+                progress["configs_done"] += 1
+
+    if not entries:
+        raise ValueError("No sweep configuration produced valid samples")
+    return _leaderboard(entries) + failed
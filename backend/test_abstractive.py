@@ -0,0 +1,66 @@
+import random
+import tempfile
+
+import torch
+from transformers.generation.candidate_generator import PromptLookupCandidateGenerator
+
+from abstractive import _generate_batch, _summarize_one
+from conftest import farsi_words as words, tiny_mt5
+
+
+def test_prompt_lookup_matches_greedy():
+    """حالت prompt_lookup با آرگومان عمومی generate پیش‌نویس می‌سازد و خروجی آن با جستجوی حریصانه یکسان است"""
+    drafted = []
+    original = PromptLookupCandidateGenerator.get_candidates
+
+    def get_candidates(self, input_ids):
+        candidates, logits = original(self, input_ids)
+        drafted.append(candidates.shape[1] - input_ids.shape[1])
+        return candidates, logits
+
+    with tempfile.TemporaryDirectory() as directory:
+        model, tokenizer = tiny_mt5(directory)
+        text = " ".join(random.choices(words, k=60)) + "."
+        greedy = _summarize_one(model, tokenizer, text, num_beams=1, max_new_tokens=40, min_new_tokens=10)
+        PromptLookupCandidateGenerator.get_candidates = get_candidates
+        try:
+            lookup = _summarize_one(
+                model, tokenizer, text, num_beams=1, max_new_tokens=40, min_new_tokens=10, decoding="prompt_lookup"
+            )
+        finally:
+            PromptLookupCandidateGenerator.get_candidates = original
+
+    print(f"drafted tokens per step: {drafted}")
+    assert drafted and any(drafted)
+    assert "_get_candidate_generator" not in vars(model)
+    assert lookup == greedy
+
+
+def test_length_budget_ends_each_beam_row():
+    """در جستجوی پرتوی دسته‌ای، هر سطر پس از رسیدن به بودجه با اولین پایان جمله تمام می‌شود"""
+    with tempfile.TemporaryDirectory() as directory:
+        model, tokenizer = tiny_mt5(directory)
+        dot = tokenizer.convert_tokens_to_ids(".")
+        # Make the random model close sentences now and then.
+        with torch.no_grad():
+            model.lm_head.weight[dot] = model.lm_head.weight[tokenizer.convert_tokens_to_ids("ز")]
+        random.seed(3)
+        texts = [" ".join(random.choices(words, k=40)) + "." for _ in range(3)]
+        budgets = [5, None, 12]
+        plans = [{"budget": budget, "max_new_tokens": 40, "min_new_tokens": 2} for budget in budgets]
+        outputs = _generate_batch(model, tokenizer, texts, plans, num_beams=2)
+
+    for budget, output in zip(budgets, outputs):
+        ids = tokenizer.encode(output, add_special_tokens=False)
+        print(f"budget {budget}: {len(ids)} tokens")
+        if budget is None:
+            assert len(ids) > 30
+            continue
+        assert len(ids) >= budget and ids[-1] == dot
+        assert dot not in ids[budget - 1 : -1]
+
+
+if __name__ == "__main__":
+    test_prompt_lookup_matches_greedy()
+    test_length_budget_ends_each_beam_row()
+    print("✅ تست‌ها با موفقیت اجرا شدند!")
@@ -0,0 +1,61 @@
+from adaptive import AdaptiveController, estimate_decode_tokens
+
+
+def test_no_samples_keeps_requested_settings():
+    """بدون داده تأخیر، تنظیمات درخواستی تغییر نمی‌کند"""
+    controller = AdaptiveController(target_p95_sec=5.0)
+    with controller.track():
+        plan = controller.plan(num_beams=4, num_chars=4000, length_ratio=0.3)
+    assert plan["level"] == 0
+    assert plan["num_beams"] == 4
+    assert plan["max_new_tokens_scale"] == 1.0
+    assert plan["prefilter_ratio"] is None
+
+
+def test_degrades_under_pressure():
+    """با تأخیر بالا، ابتدا beam و سپس طول خروجی کاهش می‌یابد"""
+    controller = AdaptiveController(target_p95_sec=5.0)
+    for _ in range(20):
+        controller.record_generation({"beam_tokens": 100, "generate_sec": 2.0})
+
+    with controller.track():
+        plan = controller.plan(num_beams=4, num_chars=4000, length_ratio=0.3)
+
+    print(f"plan: {plan}")
+    assert plan["level"] >= 1
+    assert plan["num_beams"] == 1
+    assert plan["predicted_sec"] is not None
+
+
+def test_queue_depth_is_not_counted_twice():
+    """تأخیر اندازه‌گیری‌شده رقابت را در خود دارد؛ تعداد درخواست‌های همزمان فقط گزارش می‌شود"""
+    controller = AdaptiveController(target_p95_sec=1000.0)
+    controller.record_generation({"beam_tokens": 100, "generate_sec": 1.0})
+
+    with controller.track():
+        single = controller.plan(num_beams=2, num_chars=2000, length_ratio=0.3)
+        with controller.track(), controller.track():
+            busy = controller.plan(num_beams=2, num_chars=2000, length_ratio=0.3)
+
+    assert single["inflight"] == 1 and busy["inflight"] == 3
+    assert busy["predicted_sec"] == single["predicted_sec"]
+
+    # Contended samples raise the prediction through the measured latency.
+    controller.record_generation({"beam_tokens": 100, "generate_sec": 3.0})
+    with controller.track():
+        slower = controller.plan(num_beams=2, num_chars=2000, length_ratio=0.3)
+    assert slower["predicted_sec"] == 3 * single["predicted_sec"]
+
+
+def test_estimate_decode_tokens_is_clamped():
+    """تخمین تعداد توکن‌های تولیدی در بازه مجاز می‌ماند"""
+    assert estimate_decode_tokens(10, 0.3) == 80
+    assert estimate_decode_tokens(10_000_000, 0.9) == 1200
+
+
+if __name__ == "__main__":
+    test_no_samples_keeps_requested_settings()
+    test_degrades_under_pressure()
+    test_queue_depth_is_not_counted_twice()
+    test_estimate_decode_tokens_is_clamped()
+    print("✅ تست‌ها با موفقیت اجرا شدند!")
@@ -0,0 +1,180 @@
+import json
+import threading
+import time
+from uuid import uuid4
+
+import msgpack
+from fastapi.testclient import TestClient
+
+import fairqueue
+from fairqueue import TenantRegistry
+from main import _EVAL_SUBSCRIBERS, _set_eval_job, app
+
+
+client = TestClient(app)
+
+text = (
+    "هوش مصنوعی یکی از مهم‌ترین فناوری‌های قرن بیست و یکم است. "
+    "این فناوری در پزشکی و آموزش تحول ایجاد کرده است. "
+    "پزشکان با کمک هوش مصنوعی بیماری‌ها را زودتر تشخیص می‌دهند. "
+    "دولت‌ها قوانین جدید برای نظارت بر هوش مصنوعی تدوین می‌کنند. "
+    "محققان بر شفافیت الگوریتم‌ها تأکید دارند."
+)
+
+
+def _summarize(accept=None, **fields):
+    headers = {"Accept": accept} if accept else {}
+    return client.post("/api/summarize", json={"text": text, "method": "extractive", **fields}, headers=headers)
+
+
+def test_msgpack_response():
+    """پاسخ با Accept مناسب به msgpack کدگذاری می‌شود و همان محتوای JSON را دارد"""
+    expected = _summarize().json()
+    response = _summarize("application/msgpack")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/msgpack"
+    payload = msgpack.unpackb(response.content, raw=False)
+    assert payload["summary"] == expected["summary"]
+    assert payload["extra"]["selected_indices"] == expected["extra"]["selected_indices"]
+
+
+def test_accept_quality_values():
+    """msgpack با q=0 یا بدون ترجیح بر JSON انتخاب نمی‌شود"""
+    for accept in ("application/json, application/msgpack;q=0", "application/json, application/msgpack", "*/*"):
+        response = _summarize(accept)
+        assert response.headers["content-type"] == "application/json", accept
+    for accept in ("application/msgpack, */*;q=0.1", "application/x-msgpack;q=0.9, application/json;q=0.5"):
+        response = _summarize(accept)
+        assert response.headers["content-type"] == "application/msgpack", accept
+
+
+def test_detail_levels():
+    """سطح جزئیات پاسخ بخش‌های اضافی را حذف می‌کند"""
+    summary = _summarize(detail="summary").json()
+    metrics = _summarize(detail="metrics").json()
+    full = _summarize(detail="full").json()
+
+    assert summary["summary"] == metrics["summary"] == full["summary"]
+    assert "extra" not in summary or summary["extra"] is None
+    assert summary["original_length_sentences"] is None
+    assert "scores" not in metrics["extra"] and "metrics" in metrics["extra"]
+    assert metrics["original_length_sentences"] == full["original_length_sentences"] == 5
+    assert set(full["extra"]["scores"]) == {str(i) for i in range(5)}
+
+
+def test_language_defaults_to_persian():
+    """متن فارسی پر از واژه لاتین بدون lang فارسی پردازش می‌شود و تشخیص خودکار فقط با lang=auto است"""
+    mixed = (
+        "برای نصب کتابخانه دستور pip install transformers torch sentencepiece را در ترمینال اجرا کنید. "
+        "سپس فایل config.json را از https://huggingface.co/models دانلود کنید. "
+        "مدل با from_pretrained بارگذاری می‌شود."
+    )
+    default = client.post("/api/summarize", json={"text": mixed, "method": "extractive"}).json()
+    detected = client.post("/api/summarize", json={"text": mixed, "method": "extractive", "lang": "auto"}).json()
+    assert default["extra"]["lang"] == "fa"
+    assert detected["extra"]["lang"] == "en"
+
+
+def test_profile_id_is_generated_by_server():
+    """شناسه پروفایل در سرور ساخته می‌شود و به X-Request-Id کلاینت وابسته نیست"""
+    response = client.post(
+        "/api/summarize",
+        json={"text": text, "method": "extractive"},
+        headers={"X-Profile": "1", "X-Request-Id": "client-chosen"},
+    )
+    profile_id = response.headers["X-Profile-Id"]
+    assert response.headers["X-Request-Id"] == "client-chosen"
+    assert profile_id != "client-chosen"
+    assert response.json()["extra"]["profile"]["profile_id"] == profile_id
+
+    stages = client.get(f"/api/profiles/{profile_id}", params={"format": "stages"})
+    assert stages.status_code == 200 and stages.json()["profile_id"] == profile_id
+    assert client.get("/api/profiles/client-chosen").status_code == 404
+
+
+def test_documents_are_scoped_to_tenants():
+    """سند افزایشی هر tenant از دسترس tenant دیگر با همان شناسه جداست و کلید اجباری قابل تنظیم است"""
+    registry = fairqueue._REGISTRY
+    fairqueue._REGISTRY = TenantRegistry({"tenants": {"a": {"keys": ["ka"]}, "b": {"keys": ["kb"]}}})
+    try:
+        for key in ("ka", "kb"):
+            response = client.post(
+                "/api/summarize",
+                json={"text": text, "method": "extractive", "document_id": "shared"},
+                headers={"X-API-Key": key},
+            )
+            assert response.status_code == 200
+        assert client.delete("/api/documents/shared", headers={"X-API-Key": "ka"}).json()["deleted"] is True
+        assert client.delete("/api/documents/shared", headers={"X-API-Key": "ka"}).json()["deleted"] is False
+        assert client.delete("/api/documents/shared", headers={"X-API-Key": "kb"}).json()["deleted"] is True
+        assert client.delete("/api/documents/shared").json()["deleted"] is False
+
+        fairqueue._REGISTRY = TenantRegistry({"tenants": {"a": {"keys": ["ka"]}}}, require_key=True)
+        missing = _summarize()
+        assert missing.status_code == 401 and "X-API-Key" in missing.json()["error"]
+        assert client.get("/healthz").status_code == 200
+    finally:
+        fairqueue._REGISTRY = registry
+
+
+def _sse_events(body):
+    events = []
+    for block in body.split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":"))
+        if lines:
+            events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_evaluate_events_stream():
+    """رویدادهای SSE پیشرفت را پخش می‌کنند، با رویداد پایانی بسته می‌شوند و مشترک‌ها پاک می‌شوند"""
+    job_id = str(uuid4())
+    _set_eval_job(job_id, status="queued", progress={"processed": 0, "total": 4, "samples": 0, "skipped": 0})
+
+    def publish():
+        deadline = time.monotonic() + 10
+        while not _EVAL_SUBSCRIBERS.get(job_id) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        for processed in (1, 3):
+            _set_eval_job(
+                job_id,
+                status="running",
+                progress={"processed": processed, "total": 4, "samples": processed, "skipped": 0},
+            )
+            time.sleep(0.05)
+        _set_eval_job(job_id, status="failed", error="فایل دیتاست پیدا نشد")
+
+    # The lifespan sets the event loop that wakes subscribers.
+    with TestClient(app) as live:
+        publisher = threading.Thread(target=publish)
+        publisher.start()
+        started = time.monotonic()
+        response = live.get(f"/api/evaluate/events/{job_id}")
+        publisher.join()
+        elapsed = time.monotonic() - started
+        missing = live.get(f"/api/evaluate/events/{uuid4()}")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _sse_events(response.text)
+    print(f"events: {[(name, data['status']) for name, data in events]} in {elapsed:.2f}s")
+    names = [name for name, _ in events]
+    assert names[0] == "progress" and names[-1] == "failed"
+    assert names.count("failed") == 1 and set(names[:-1]) == {"progress"}
+    assert events[-1][1]["error"] == "فایل دیتاست پیدا نشد"
+    assert events[-1][1]["progress"]["processed"] == 3
+    # Updates wake the stream; it does not wait for the keepalive timeout.
+    assert ": keepalive" not in response.text and elapsed < 5
+    assert job_id not in _EVAL_SUBSCRIBERS
+    assert missing.status_code == 404
+
+
+if __name__ == "__main__":
+    test_msgpack_response()
+    test_accept_quality_values()
+    test_detail_levels()
+    test_language_defaults_to_persian()
+    test_profile_id_is_generated_by_server()
+    test_documents_are_scoped_to_tenants()
+    test_evaluate_events_stream()
+    print("✅ تست‌ها با موفقیت اجرا شدند!")
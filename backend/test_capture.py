@@ -0,0 +1,41 @@
+import json
+import os
+import tempfile
+
+from capture import read_capture, request_shape
+
+
+text = "هوش مصنوعی یکی از مهم‌ترین فناوری‌های قرن است. این فناوری در پزشکی تحول ایجاد کرده است."
+settings = {"text": text, "method": "hybrid", "length": 30, "abstractive_num_beams": 4}
+
+
+def test_request_shape_modes():
+    """بسته به حالت ضبط، فقط اندازه، هش یا خود متن ثبت می‌شود"""
+    shape = request_shape(settings, text, mode="shape")
+    print(f"shape: {shape}")
+    assert shape["method"] == "hybrid" and shape["abstractive_num_beams"] == 4
+    assert shape["text_chars"] == len(text) and shape["text_sentences"] == 2
+    assert "text" not in shape and "text_sha256" not in shape
+
+    hashed = request_shape(settings, text, mode="hash")
+    assert len(hashed["text_sha256"]) == 64 and "text" not in hashed
+    assert request_shape(settings, text, mode="full")["text"] == text
+
+
+def test_rotated_files_are_read_in_order():
+    """فایل‌های چرخشی از قدیمی به جدید و به ترتیب زمان خوانده می‌شوند"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "traffic.jsonl")
+        for name, stamps in ((f"{path}.2", [1, 2]), (f"{path}.1", [3, 4]), (path, [5, 6])):
+            with open(name, "w", encoding="utf-8") as f:
+                for ts in stamps:
+                    f.write(json.dumps({"ts": ts, "request": {"method": "extractive"}}) + "\n")
+                f.write("{truncated\n")
+        records = read_capture([directory])
+        assert [record["ts"] for record in records] == [1, 2, 3, 4, 5, 6]
+
+
+if __name__ == "__main__":
+    test_request_shape_modes()
+    test_rotated_files_are_read_in_order()
+    print("✅ تست‌ها با موفقیت اجرا شدند!")
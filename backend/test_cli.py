@@ -0,0 +1,99 @@
+import io
+import json
+import os
+import tempfile
+
+import abstractive
+from cli import completed_ids, iter_documents, run
+
+
+text = (
+    "هوش مصنوعی یکی از مهم‌ترین فناوری‌های قرن است. "
+    "این فناوری در پزشکی و آموزش تحول ایجاد کرده است. "
+    "دولت‌ها قوانین جدید برای نظارت بر هوش مصنوعی تدوین می‌کنند. "
+    "محققان بر شفافیت الگوریتم‌های هوش مصنوعی تأکید دارند."
+)
+
+
+def _write_inputs(directory):
+    os.makedirs(os.path.join(directory, "docs"))
+    for name in ("b.txt", "a.txt", "skip.md"):
+        with open(os.path.join(directory, "docs", name), "w", encoding="utf-8") as f:
+            f.write(text)
+    jsonl = os.path.join(directory, "input.jsonl")
+    with open(jsonl, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"id": "n1", "text": text}, ensure_ascii=False) + "\n")
+        f.write("not json\n")
+        f.write(json.dumps({"text": text}, ensure_ascii=False) + "\n")
+    return [os.path.join(directory, "docs"), jsonl]
+
+
+def test_iter_documents():
+    """خواندن پوشه، JSONL و stdin با شناسه پایدار"""
+    with tempfile.TemporaryDirectory() as directory:
+        inputs = _write_inputs(directory)
+        stdin = io.StringIO(json.dumps({"id": "s1", "text": "متن"}, ensure_ascii=False) + "\n")
+        ids = [doc_id for doc_id, _ in iter_documents(inputs + ["-"], stdin=stdin)]
+        print(f"ids: {ids}")
+        assert [os.path.basename(i) for i in ids[:2]] == ["a.txt", "b.txt"]
+        assert ids[2] == "n1"
+        assert ids[3].endswith("input.jsonl:3")
+        assert ids[4] == "s1"
+
+
+def test_resume_skips_completed_and_truncated_line():
+    """ادامه اجرا: سندهای کامل تکرار نمی‌شوند و خط نیمه‌کاره دوباره ساخته می‌شود"""
+    with tempfile.TemporaryDirectory() as directory:
+        inputs = _write_inputs(directory)
+        output = os.path.join(directory, "out.jsonl")
+        first = run(inputs, output=output, workers=1, progress_stream=io.StringIO())
+        assert first["processed"] == 4 and first["errors"] == 0
+
+        with open(output, "rb") as f:
+            data = f.read()
+        with open(output, "wb") as f:
+            f.write(data[:-20])
+        assert len(completed_ids(output)) == 3
+
+        second = run(inputs, output=output, workers=1, resume=True, progress_stream=io.StringIO())
+        print(f"resume: {second}")
+        assert second["processed"] == 1
+        assert second["resumed_skipped"] == 3
+
+        with open(output, "r", encoding="utf-8") as f:
+            records = [json.loads(line) for line in f]
+        assert len(records) == 4
+        assert len({record["id"] for record in records}) == 4
+        assert all(record["summary"] for record in records)
+
+
+def test_records_share_one_schema():
+    """رکوردهای خروجی هر سه روش فیلدهای یکسان (از جمله تعداد جملات خلاصه) دارند"""
+    original = abstractive.summarize_batch
+    abstractive.summarize_batch = lambda texts, **kwargs: [text.split(". ")[0] + "." for text in texts]
+    try:
+        fields = {}
+        for method in ("extractive", "abstractive", "hybrid"):
+            out = io.StringIO()
+            with tempfile.TemporaryDirectory() as directory:
+                inputs = _write_inputs(directory)
+                run(inputs[:1], output=os.path.join(directory, "out.jsonl"), method=method, workers=1, progress_stream=out)
+                with open(os.path.join(directory, "out.jsonl"), "r", encoding="utf-8") as f:
+                    records = [json.loads(line) for line in f]
+            assert len(records) == 2
+            for record in records:
+                assert record["original_length_sentences"] == 4
+                assert record["summary_length_sentences"] == 1
+            fields[method] = set(records[0]) - {"extractive_summary"}
+    finally:
+        abstractive.summarize_batch = original
+
+    print(f"fields: {fields}")
+    assert fields["extractive"] == fields["abstractive"] == fields["hybrid"]
+
+
+if __name__ == "__main__":
+    test_iter_documents()
+    test_resume_skips_completed_and_truncated_line()
+    test_records_share_one_schema()
+    print("✅ تست‌ها با موفقیت اجرا شدند!")
@@ -0,0 +1,112 @@
+import os
+import tempfile
+
+from dedup import BoilerplateTable, reduce_sentences
+
+
+content = [
+    "دولت‌ها قوانین جدید برای نظارت بر هوش مصنوعی تدوین می‌کنند و محققان بر شفافیت الگوریتم‌ها تأکید دارند.",
+    "این فناوری در پزشکی و آموزش تحول ایجاد کرده است.",
+]
+
+
+def test_exact_and_near_duplicates():
+    """جمله تکراری و جمله‌ای که فقط یک کلمه‌اش عوض شده حذف می‌شوند"""
+    near = content[0].replace("جدید", "تازه")
+    sentences = [content[0], content[1], content[0], near]
+    kept, report = reduce_sentences(sentences, table=BoilerplateTable())
+    print(f"report: {report}")
+    assert kept == content
+    assert report["exact_duplicates"] == 1
+    assert report["near_duplicates"] == 1
+    assert report["tokens_removed"] == 2 * len(content[0].split())
+
+
+def test_distinct_sentences_are_kept():
+    """جملات متفاوت با واژه‌های مشترک حذف نمی‌شوند"""
+    sentences = content + [
+        "هوش مصنوعی یکی از مهم‌ترین فناوری‌های قرن است.",
+        "محققان بر شفافیت الگوریتم‌های هوش مصنوعی تأکید دارند.",
+    ]
+    kept, report = reduce_sentences(sentences, table=BoilerplateTable())
+    assert kept == sentences
+    assert report["tokens_removed"] == 0
+
+
+def test_learned_boilerplate_per_source():
+    """خطوط ثابت یک منبع پس از چند سند حذف می‌شوند ولی در منابع دیگر باقی می‌مانند"""
+    table = BoilerplateTable(min_docs=2)
+    byline = "گزارش از تحریریه خبرگزاری نمونه، ۱۴۰۲/۰۵/۱۲"
+    for day, body in enumerate(["خبر اول درباره اقتصاد است.", "خبر دوم درباره ورزش است."]):
+        reduce_sentences([body, byline.replace("۱۲", str(day))], source="news.example", table=table)
+
+    kept, report = reduce_sentences(["خبر سوم درباره فرهنگ است.", byline], source="news.example", table=table)
+    assert kept == ["خبر سوم درباره فرهنگ است."]
+    assert report["boilerplate"] == 1
+
+    kept, _ = reduce_sentences(["خبر دیگر.", byline], source="other.example", table=table)
+    assert byline in kept
+
+    # "بیشتر بخوانید" is known boilerplate without any learning.
+    kept, _ = reduce_sentences(content + ["بیشتر بخوانید: قیمت طلا امروز"], table=table)
+    assert kept == content
+
+
+def test_resubmitted_document_is_not_learned():
+    """ارسال دوباره یک سند، جملات آن را boilerplate نمی‌کند"""
+    table = BoilerplateTable(min_docs=2)
+    for _ in range(3):
+        kept, report = reduce_sentences(content, source="news.example", table=table)
+    assert kept == content
+    assert table.stats()["news.example"]["documents"] == 1
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "boilerplate.json")
+        table.save(path)
+        loaded = BoilerplateTable(min_docs=2)
+        loaded.load(path)
+        assert loaded.stats() == table.stats()
+
+
+def test_number_variants_are_kept():
+    """جملاتی که فقط در عدد تفاوت دارند تکراری به حساب نمی‌آیند"""
+    sentences = [
+        "قیمت دلار امروز به ۳۰ هزار تومان رسید.",
+        "قیمت دلار امروز به ۴۵ هزار تومان رسید.",
+        "Inflation rose to 12 percent in the first quarter of the year.",
+        "Inflation rose to 15 percent in the first quarter of the year.",
+    ]
+    kept, report = reduce_sentences(sentences, table=BoilerplateTable())
+    print(f"report: {report}")
+    assert kept == sentences
+
+    kept, report = reduce_sentences(sentences + sentences[:1], table=BoilerplateTable())
+    assert kept == sentences and report["exact_duplicates"] == 1
+
+
+def test_content_starting_with_markers_is_kept():
+    """جمله‌های خبری که با واژه‌هایی مانند منبع یا تصویر شروع می‌شوند boilerplate نیستند"""
+    sentences = [
+        "منبع آب شرب شهر تهران آلوده شده است.",
+        "تصویر اقتصاد ایران در سال آینده روشن نیست.",
+        "عکس‌های ماهواره‌ای نشان می‌دهد یخچال‌ها کوچک شده‌اند.",
+        "خبرنگاران در محل حادثه حضور داشتند.",
+        "Source code of the kernel was leaked yesterday.",
+        "Photos from the summit show the leaders shaking hands.",
+    ]
+    kept, report = reduce_sentences(sentences, table=BoilerplateTable())
+    assert kept == sentences and report["boilerplate"] == 0
+
+    credits = ["منبع: ایسنا", "عکس: علی رضایی", "کد خبر: ۱۲۳۴۵۶", "Photo: Reuters", "ادامه مطلب...", "Read more"]
+    kept, report = reduce_sentences(sentences + credits, table=BoilerplateTable())
+    assert kept == sentences and report["boilerplate"] == len(credits)
+
+
+if __name__ == "__main__":
+    test_exact_and_near_duplicates()
+    test_distinct_sentences_are_kept()
+    test_learned_boilerplate_per_source()
+    test_resubmitted_document_is_not_learned()
+    test_number_variants_are_kept()
+    test_content_starting_with_markers_is_kept()
+    print("✅ تست‌ها با موفقیت اجرا شدند!")
@@ -0,0 +1,46 @@
+import tempfile
+
+from conftest import write_dataset
+from corpus import compile_corpus, load_corpus
+from evaluation import evaluate_dataset
+
+
+def _evaluate(path, segmenter):
+    report = {}
+    metrics, length_metrics, counts = evaluate_dataset(
+        path,
+        method="extractive",
+        length=30,
+        extractive_length=50,
+        abstractive_length=30,
+        max_samples=0,
+        start_index=0,
+        shuffle=True,
+        seed=3,
+        report=report,
+        segmenter=segmenter,
+    )
+    records = [{key: value for key, value in record.items() if key != "latency_sec"} for record in report["samples"]]
+    return metrics, length_metrics, counts, records
+
+
+def test_compiled_corpus_matches_raw_dataset():
+    """ارزیابی با پیکره کامپایل‌شده و بدون آن برای هر جداساز نتیجه یکسان دارد"""
+    for segmenter in ("hazm", "fast"):
+        with tempfile.TemporaryDirectory() as directory:
+            path = write_dataset(directory, rows=6)
+            raw = {name: _evaluate(path, name) for name in ("hazm", "fast")}
+            compile_corpus(path, segmenter=segmenter, model_tokens=False)
+            print(f"{segmenter}: {raw[segmenter][0]}")
+
+            assert load_corpus(path, segmenter=segmenter) is not None
+            assert _evaluate(path, segmenter) == raw[segmenter]
+            # A corpus compiled with the other segmenter is ignored.
+            other = "fast" if segmenter == "hazm" else "hazm"
+            assert load_corpus(path, segmenter=other) is None
+            assert _evaluate(path, other) == raw[other]
+
+
+if __name__ == "__main__":
+    test_compiled_corpus_matches_raw_dataset()
+    print("✅ تست‌ها با موفقیت اجرا شدند!")
@@ -91,6 +91,78 @@ def test_different_ratios():
         print(f"خلاصه: {result['summary']}")
 
 
+def test_isolated_sentences_are_scored():
+    """جمله‌ای که به هیچ جمله دیگری شبیه نیست هم امتیاز PageRank می‌گیرد"""
+    text = "هوا امروز در تهران آفتابی است. قیمت نفت خام کاهش یافت. تیم ملی فوتبال برنده شد. هوا امروز در تهران آفتابی و گرم است."
+    result = textrank_summarize(text, summary_ratio=0.5)
+    print(f"scores: {result['scores']}")
+    assert sorted(result["scores"]) == [0, 1, 2, 3]
+    assert result["num_summary_sentences"] == 2
+
+
+def test_sparse_path_without_vocabulary():
+    """جملاتی که هیچ واژه‌ای برای TF-IDF ندارند در مسیر همسایه‌های محدود هم شباهت صفر می‌گیرند"""
+    text = "۱ ۲. ۳ ۴. ۵ ۶. ۷ ۸."
+    dense = textrank_summarize(text, summary_ratio=0.5, num_keywords=3)
+    sparse_result = textrank_summarize(text, summary_ratio=0.5, num_keywords=3, max_neighbors=2)
+    print(f"sparse scores: {sparse_result['scores']}")
+    assert sparse_result["num_summary_sentences"] == dense["num_summary_sentences"] == 2
+    assert sparse_result["selected_indices"] == dense["selected_indices"]
+    assert sparse_result["keywords"] == dense["keywords"] == []
+
+
+keyword_sentences = [
+    "هوش مصنوعی یکی از مهم‌ترین فناوری‌های قرن بیست‌ویکم است.",
+    "این فناوری در حوزه‌های مختلفی مانند پزشکی، صنعت و آموزش تحول ایجاد کرده است.",
+    "گوگل مدل زبانی جدیدی معرفی کرد که متن، تصویر و صدا را پردازش می‌کند.",
+    "در ایران نیز استارتاپ‌های زیادی در حوزه پردازش زبان طبیعی فارسی فعالیت می‌کنند.",
+    "کارشناسان معتقدند هوش مصنوعی بخش بزرگی از اقتصاد جهان را تحت تأثیر قرار می‌دهد.",
+    "نگرانی‌هایی درباره اخلاق و امنیت داده‌ها در استفاده از هوش مصنوعی وجود دارد.",
+    "دولت‌ها در حال تدوین قوانین برای نظارت بر توسعه هوش مصنوعی هستند.",
+    "محققان بر شفافیت الگوریتم‌های یادگیری ماشین و هوش مصنوعی تأکید دارند.",
+    "آموزش نیروی انسانی متخصص در حوزه فناوری اهمیت زیادی دارد.",
+    "دانشگاه‌ها دوره‌های جدیدی در زمینه یادگیری ماشین راه‌اندازی کرده‌اند.",
+]
+
+
+def test_keywords_and_highlights():
+    """کلیدواژه‌ها و بازه جملات انتخاب‌شده از همان ماتریس TF-IDF و متن نرمال‌شده"""
+    text = " ".join(keyword_sentences)
+    result = textrank_summarize(text, summary_ratio=0.3, num_keywords=5, highlights=True)
+
+    terms = [item["term"] for item in result["keywords"]]
+    print(f"keywords: {terms}")
+    assert 0 < len(terms) <= 5
+    assert "هوش" in terms
+    assert "و" not in terms and "در" not in terms
+
+    spans = result["highlights"]
+    assert [span["index"] for span in spans] == result["selected_indices"]
+    for span in spans:
+        assert result["original_text"][span["start"]:span["end"]] in result["summary"]
+
+    plain = textrank_summarize(text, summary_ratio=0.3)
+    assert "keywords" not in plain and "highlights" not in plain
+    assert plain["selected_indices"] == result["selected_indices"]
+
+
+def test_highlights_index_normalized_text():
+    """با ي و ك عربی در ورودی، بازه‌ها متن نرمال‌شده (highlight_text) را اندیس می‌کنند"""
+    text = " ".join(keyword_sentences).replace("ی", "ي").replace("ک", "ك")
+    result = textrank_summarize(text, summary_ratio=0.3, highlights=True)
+
+    normalized = result["original_text"]
+    assert normalized != text and "ي" not in normalized and "ك" not in normalized
+    spans = result["highlights"]
+    assert [span["index"] for span in spans] == result["selected_indices"]
+    for span in spans:
+        piece = normalized[span["start"]:span["end"]]
+        print(f"{span['index']}: {piece}")
+        assert piece in result["summary"]
+        # The raw input has Arabic letters at the same offsets.
+        assert text[span["start"]:span["end"]] not in result["summary"]
+
+
 def print_result(result, show_original=True):
     """چاپ نتایج به صورت زیبا"""
     if 'error' in result:
@@ -121,6 +193,10 @@ def run_all_tests():
     test_with_sample_text()
     test_with_file()
     test_different_ratios()
+    test_isolated_sentences_are_scored()
+    test_sparse_path_without_vocabulary()
+    test_keywords_and_highlights()
+    test_highlights_index_normalized_text()
     
     print("\n" + "=" * 80)
     print("✅ تمام تست‌ها با موفقیت اجرا شدند!")
@@ -0,0 +1,115 @@
+import threading
+import time
+
+from fairqueue import FairScheduler, TenantRegistry, TokenBucket, request_cost
+
+
+def _served_order(scheduler, jobs):
+    # Every job is queued while a holder occupies the only slot.
+    order = []
+    release = threading.Event()
+
+    def hold():
+        with scheduler.slot("holder", 1.0, 1.0):
+            release.wait()
+
+    def job(name, weight, cost):
+        with scheduler.slot(name, weight, cost):
+            order.append(name)
+
+    threads = [threading.Thread(target=hold)]
+    threads[0].start()
+    while scheduler.stats()["busy"] == 0:
+        time.sleep(0.001)
+    for queued, (name, weight, cost) in enumerate(jobs, start=1):
+        thread = threading.Thread(target=job, args=(name, weight, cost))
+        thread.start()
+        threads.append(thread)
+        while scheduler.stats()["queued"] < queued:
+            time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+    return order
+
+
+def test_token_bucket_prices_by_cost():
+    """سطل توکن بر اساس هزینه کار محدود می‌کند و زمان انتظار را برمی‌گرداند"""
+    bucket = TokenBucket(rate=100, burst=200)
+    assert bucket.take(150) == 0
+    wait = bucket.take(100)
+    print(f"wait: {wait:.3f}")
+    assert 0.45 < wait <= 0.5
+    # Work larger than the burst is admitted from a full bucket.
+    assert TokenBucket(rate=100, burst=200).take(1000) == 0
+
+
+def test_registry_resolves_api_keys():
+    """کلید API به tenant نگاشت می‌شود و کلید ناشناخته فقط با کلیدهای پیکربندی‌شده رد می‌شود"""
+    registry = TenantRegistry({"tenants": {"bulk": {"keys": ["k1"], "weight": 1, "rate": 10}}})
+    assert registry.resolve("k1").name == "bulk"
+    assert registry.resolve("unknown") is None
+    assert registry.resolve(None).name == "anonymous"
+    assert registry.resolve("k1").admit(5) == 0
+    assert registry.resolve("k1").admit(50) > 0
+    usage = registry.usage(["bulk"])["bulk"]["usage"]
+    assert usage["requests"] == 1 and usage["rejected"] == 1
+    # Without configured keys, a client sending a stray key is not locked out.
+    assert TenantRegistry().resolve("whatever").name == "anonymous"
+
+    strict = TenantRegistry({"tenants": {"bulk": {"keys": ["k1"]}}}, require_key=True)
+    assert strict.resolve(None) is None and strict.resolve("k1").name == "bulk"
+    assert TenantRegistry(require_key=True).resolve(None).name == "anonymous"
+
+
+def test_interactive_call_skips_bulk_backlog():
+    """کار تعاملی پشت صف طولانی یک کلاینت دسته‌ای نمی‌ماند"""
+    jobs = [("bulk", 1.0, 1000.0)] * 5 + [("interactive", 1.0, 100.0)]
+    order = _served_order(FairScheduler(1), jobs)
+    print(f"order: {order}")
+    assert order.index("interactive") <= 1
+
+
+def test_weights_share_slots():
+    """tenantها به نسبت وزنشان سهم می‌گیرند"""
+    jobs = [("a", 3.0, 100.0)] * 8 + [("b", 1.0, 100.0)] * 8
+    order = _served_order(FairScheduler(1), jobs)
+    assert order[:8].count("a") == 6
+
+
+def test_unconfigured_slots_do_not_queue():
+    """بدون INFERENCE_SLOTS فراخوانی‌های generate هم‌زمان اجرا می‌شوند و صف نمی‌کشند"""
+    scheduler = FairScheduler(None)
+    inside = threading.Barrier(4, timeout=5)
+
+    def job(name):
+        with scheduler.slot(name, 1.0, 100.0) as queue_wait:
+            assert queue_wait < 1
+            # Every call waits here until all four run at once.
+            inside.wait()
+
+    threads = [threading.Thread(target=job, args=(f"t{i % 2}",)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not inside.broken
+    assert scheduler.stats() == {"slots": None, "busy": 0, "queued": 0}
+
+
+def test_request_cost_scales_with_beams():
+    """هزینه درخواست با تعداد beam و توکن‌های تولیدی رشد می‌کند"""
+    estimate = {"tokens": 2000, "generate_tokens": 2500}
+    assert request_cost("abstractive", estimate, 8) == 4 * request_cost("abstractive", estimate, 2)
+    assert request_cost("hybrid", estimate, 2) > request_cost("abstractive", estimate, 2)
+    assert request_cost("extractive", {"tokens": 2000, "generate_tokens": 0}, 2) < 100
+
+
+if __name__ == "__main__":
+    test_token_bucket_prices_by_cost()
+    test_registry_resolves_api_keys()
+    test_interactive_call_skips_bulk_backlog()
+    test_weights_share_slots()
+    test_unconfigured_slots_do_not_queue()
+    test_request_cost_scales_with_beams()
+    print("✅ تست‌ها با موفقیت اجرا شدند!")
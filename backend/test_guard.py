@@ -0,0 +1,105 @@
+import time
+
+from extractive import textrank_summarize
+from guard import (
+    GUARD_MAX_CHUNKS,
+    GUARD_SAMPLE_INTERVAL_SEC,
+    GUARD_STREAM_SENTENCES,
+    GUARD_TOPK_NEIGHBORS,
+    plan_request,
+    track_memory,
+)
+
+
+content = [
+    "هوش مصنوعی یکی از مهم‌ترین فناوری‌های قرن بیست و یکم است.",
+    "این فناوری در پزشکی و آموزش تحول ایجاد کرده است.",
+    "پزشکان با کمک هوش مصنوعی بیماری‌ها را زودتر تشخیص می‌دهند.",
+    "در آموزش، سامانه‌های هوشمند مسیر یادگیری هر دانش‌آموز را تنظیم می‌کنند.",
+    "دولت‌ها قوانین جدید برای نظارت بر هوش مصنوعی تدوین می‌کنند.",
+    "محققان بر شفافیت الگوریتم‌ها تأکید دارند.",
+]
+
+
+def test_small_inputs_use_dense_graph():
+    """متن کوتاه با گراف کامل TextRank پردازش می‌شود"""
+    plan = plan_request("extractive", 5000, 50, 0.3)
+    print(f"plan: {plan}")
+    assert plan["action"] == "accept"
+    assert plan["graph"] == "dense"
+    assert plan["max_neighbors"] is None
+
+
+def test_large_inputs_use_sparse_graph():
+    """متن بسیار طولانی به گراف k همسایه نزدیک هدایت می‌شود"""
+    plan = plan_request("extractive", 2_000_000, 50_000, 0.3)
+    assert plan["action"] == "accept"
+    assert plan["graph"] == "sparse"
+    assert plan["max_neighbors"] == GUARD_TOPK_NEIGHBORS
+
+
+def test_huge_extractive_inputs_are_streamed():
+    """متن استخراجی بزرگ‌تر از گراف sparse پنجره به پنجره رتبه‌بندی می‌شود"""
+    num_sentences = GUARD_STREAM_SENTENCES * 4
+    plan = plan_request("extractive", num_sentences * 100, num_sentences, 0.3, presplit=True)
+    assert plan["action"] == "accept"
+    assert plan["graph"] == "stream"
+    hybrid = plan_request("hybrid", num_sentences * 100, num_sentences, 0.3, presplit=True)
+    assert hybrid["graph"] == "sparse"
+    assert plan["estimate"]["memory_mb"] < 100
+
+    plan = plan_request("extractive", 5000, 50, 0.3, streamed=True)
+    assert plan["graph"] == "stream"
+
+
+def test_long_abstractive_inputs_are_prefiltered():
+    """ورودی مولد با چانک‌های زیاد ابتدا با TextRank کوتاه می‌شود"""
+    plan = plan_request("abstractive", 400_000, 4000, 0.3)
+    assert 0 < plan["prefilter_ratio"] < 1
+    assert plan["estimate"]["chunks"] <= GUARD_MAX_CHUNKS + 1
+
+    plan = plan_request("abstractive", 2000, 20, 0.3)
+    assert plan["prefilter_ratio"] is None
+    assert plan["graph"] is None
+
+
+def test_oversized_inputs_are_rejected():
+    """ورودی‌ای که از بودجه حافظه بیشتر است رد می‌شود"""
+    plan = plan_request("extractive", 50_000_000, 500_000, 0.3)
+    assert plan["action"] == "reject"
+    assert plan["reason"] in ("memory", "time")
+    assert plan["estimate"]["memory_mb"] > 0
+
+
+def test_sparse_textrank_matches_dense():
+    """با k برابر همه جملات، مسیر sparse همان امتیازهای مسیر dense را می‌دهد"""
+    text = " ".join(content)
+    dense = textrank_summarize(text, summary_ratio=0.5)
+    sparse = textrank_summarize(text, summary_ratio=0.5, max_neighbors=len(content))
+    assert sparse["selected_indices"] == dense["selected_indices"]
+    for idx, score in dense["scores"].items():
+        assert abs(sparse["scores"][idx] - score) < 1e-6
+
+
+def test_track_memory_reports_peak():
+    """اوج حافظه درخواست ثبت می‌شود"""
+    with track_memory() as memory:
+        block = b"\x01" * (64 * 1024 * 1024)
+        # Released before the context exits, so only the sampler can see it.
+        time.sleep(GUARD_SAMPLE_INTERVAL_SEC * 4)
+        del block
+    print(f"memory: {memory}")
+    if memory["start_rss_mb"] is not None:
+        assert memory["peak_delta_mb"] >= 32
+        assert memory["peak_rss_mb"] >= memory["start_rss_mb"]
+
+
+if __name__ == "__main__":
+    test_small_inputs_use_dense_graph()
+    test_large_inputs_use_sparse_graph()
+    test_huge_extractive_inputs_are_streamed()
+    test_long_abstractive_inputs_are_prefiltered()
+    test_oversized_inputs_are_rejected()
+    test_sparse_textrank_matches_dense()
+    test_track_memory_reports_peak()
+    print("✅ تست‌ها با موفقیت اجرا شدند!")
@@ -0,0 +1,114 @@
+import random
+
+import numpy as np
+
+from extractive import pagerank_sparse, textrank_summarize
+from incremental import TextRankSession
+
+
+sentences = [
+    "هوش مصنوعی یکی از مهم‌ترین فناوری‌های قرن بیست‌ویکم است.",
+    "این فناوری در حوزه‌های مختلفی مانند پزشکی، صنعت و آموزش تحول ایجاد کرده است.",
+    "گوگل مدل زبانی جدیدی معرفی کرد که متن، تصویر و صدا را پردازش می‌کند.",
+    "در ایران نیز استارتاپ‌های زیادی در حوزه پردازش زبان طبیعی فارسی فعالیت می‌کنند.",
+    "کارشناسان معتقدند هوش مصنوعی بخش بزرگی از اقتصاد جهان را تحت تأثیر قرار می‌دهد.",
+    "نگرانی‌هایی درباره اخلاق و امنیت داده‌ها در استفاده از هوش مصنوعی وجود دارد.",
+    "دولت‌ها در حال تدوین قوانین برای نظارت بر توسعه هوش مصنوعی هستند.",
+    "محققان بر شفافیت الگوریتم‌های یادگیری ماشین و هوش مصنوعی تأکید دارند.",
+    "آموزش نیروی انسانی متخصص در حوزه فناوری اهمیت زیادی دارد.",
+    "دانشگاه‌ها دوره‌های جدیدی در زمینه یادگیری ماشین راه‌اندازی کرده‌اند.",
+]
+
+
+def test_first_call_matches_textrank():
+    """اولین درخواست یک سند باید با TextRank کامل یکسان باشد"""
+    text = " ".join(sentences)
+    session = TextRankSession()
+    result = session.summarize(text, summary_ratio=0.3)
+    expected = textrank_summarize(text, summary_ratio=0.3)
+
+    assert result["incremental"]["refit"] is True
+    assert result["selected_indices"] == expected["selected_indices"]
+    assert result["summary"] == expected["summary"]
+
+
+def test_small_edit_is_incremental():
+    """ویرایش یک جمله فقط همان جمله را دوباره محاسبه می‌کند"""
+    session = TextRankSession()
+    session.summarize(" ".join(sentences), summary_ratio=0.3)
+
+    edited = list(sentences)
+    edited[3] = "در ایران شرکت‌های نوپای زیادی روی پردازش زبان فارسی و هوش مصنوعی کار می‌کنند."
+    result = session.summarize(" ".join(edited), summary_ratio=0.3)
+
+    print(f"incremental: {result['incremental']}")
+    assert result["incremental"]["refit"] is False
+    assert result["incremental"]["added"] == 1
+    assert result["incremental"]["removed"] == 1
+    assert result["num_original_sentences"] == len(edited)
+    assert all(0 <= idx < len(edited) for idx in result["scores"])
+    assert len(result["selected_indices"]) == result["num_summary_sentences"]
+
+
+def test_large_edit_triggers_refit():
+    """تغییر بخش بزرگی از متن باعث ساخت دوباره کامل می‌شود"""
+    session = TextRankSession()
+    session.summarize(" ".join(sentences), summary_ratio=0.3)
+    result = session.summarize(" ".join(reversed(sentences)), summary_ratio=0.3)
+    assert result["incremental"]["refit"] is True
+
+
+def test_session_keywords_match_textrank():
+    """کلیدواژه‌های جلسه افزایشی پس از ساخت کامل با TextRank یکسان است"""
+    text = " ".join(sentences)
+    session = TextRankSession()
+    result = session.summarize(text, summary_ratio=0.3, num_keywords=5, highlights=True)
+    expected = textrank_summarize(text, summary_ratio=0.3, num_keywords=5, highlights=True)
+    assert [k["term"] for k in result["keywords"]] == [k["term"] for k in expected["keywords"]]
+    assert result["highlights"] == expected["highlights"]
+
+
+def test_added_isolated_sentence_is_scored():
+    """جمله اضافه‌شده‌ای که شبیه هیچ جمله‌ای نیست هم در گراف جلسه امتیاز می‌گیرد"""
+    session = TextRankSession()
+    session.summarize(" ".join(sentences), summary_ratio=0.3)
+    result = session.summarize(" ".join(sentences + ["کتابخانه شهر تعطیل شد."]), summary_ratio=0.3)
+    assert result["incremental"]["refit"] is False
+    assert sorted(result["scores"]) == list(range(len(sentences) + 1))
+
+
+def test_edit_recomputes_only_changed_rows():
+    """ویرایش فقط سطرهای جملات تغییرکرده ماتریس شباهت را محاسبه می‌کند و نتیجه با محاسبه کامل یکسان است"""
+    random.seed(0)
+    words = " ".join(sentences).replace(".", "").split()
+    document = [" ".join(random.choices(words, k=8)) + "." for _ in range(80)]
+    session = TextRankSession()
+    session.summarize(" ".join(document), summary_ratio=0.3)
+    assert session.rows_computed == 80
+
+    edited = list(document)
+    edited[10] = " ".join(random.choices(words, k=8)) + "."
+    edited.insert(50, " ".join(random.choices(words, k=8)) + ".")
+    del edited[70]
+    result = session.summarize(" ".join(edited), summary_ratio=0.3)
+    print(f"incremental: {result['incremental']}, rows computed: {session.rows_computed}")
+    assert result["incremental"]["refit"] is False
+    assert session.rows_computed == result["incremental"]["added"] == 2
+
+    full = (session.tfidf @ session.tfidf.T).toarray()
+    np.fill_diagonal(full, 0.0)
+    full[full <= 0.1] = 0.0
+    assert np.allclose(session.similarity.toarray(), full)
+    expected = pagerank_sparse(session.similarity, tol=1e-10)
+    for pos, score in expected.items():
+        assert abs(result["scores"][pos] - score) < 1e-4
+
+
+if __name__ == "__main__":
+    test_first_call_matches_textrank()
+    test_small_edit_is_incremental()
+    test_large_edit_triggers_refit()
+    test_session_keywords_match_textrank()
+    test_added_isolated_sentence_is_scored()
+    test_edit_recomputes_only_changed_rows()
+    print("✅ تست‌ها با موفقیت اجرا شدند!")
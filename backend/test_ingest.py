@@ -0,0 +1,97 @@
+from ingest import PayloadTooLarge, StreamingIngestor, markup_from_name, strip_markup
+from pipelines import get_pipeline
+from streaming import StreamingTextRank
+
+
+paragraph = (
+    "هوش مصنوعی یکی از مهم‌ترین فناوری‌های قرن است. "
+    "این فناوری در پزشکی و آموزش تحول ایجاد کرده است! "
+    "آیا قوانین جدید برای نظارت بر آن کافی است؟"
+)
+document = "\n\n".join(paragraph for _ in range(40))
+
+
+def _ingest(data: bytes, chunk_size: int, **kwargs) -> StreamingIngestor:
+    ingestor = StreamingIngestor(**kwargs)
+    for i in range(0, len(data), chunk_size):
+        ingestor.feed(data[i : i + chunk_size])
+    ingestor.finish()
+    return ingestor
+
+
+def test_chunked_feed_matches_whole_document():
+    """تقسیم بایت‌ها در هر نقطه (حتی وسط یک حرف UTF-8) همان جملات پردازش یک‌جا را می‌دهد"""
+    pipeline = get_pipeline("fa")
+    expected = pipeline.sentences(pipeline.normalize(document))
+    data = document.encode("utf-8")
+    for chunk_size in (1, 7, 4096, len(data)):
+        ingestor = _ingest(data, chunk_size)
+        assert ingestor.lang == "fa"
+        assert ingestor.sentences == expected, chunk_size
+    print(f"{len(expected)} جمله، {ingestor.segments} بخش")
+
+
+def test_markup_is_stripped():
+    """برچسب‌های HTML و علائم Markdown پیش از نرمال‌سازی حذف می‌شوند"""
+    html = "<html><head><title>x</title></head><body><script>var a = 1;</script><p>سلام &amp; درود.</p></body></html>"
+    text = strip_markup(html, "html")
+    assert "script" not in text and "var" not in text and "title" not in text
+    assert "سلام & درود." in text
+
+    markdown = "# عنوان\n\n- مورد **مهم** با [پیوند](http://example.com)."
+    assert strip_markup(markdown, "markdown") == "عنوان\n\nمورد مهم با پیوند."
+
+    assert markup_from_name("page.HTM") == "html"
+    assert markup_from_name(None, "text/markdown") == "markdown"
+    assert markup_from_name("notes.txt", "text/plain") == "text"
+
+    data = ("<div>" + "</div><div>".join(paragraph for _ in range(5)) + "</div>").encode("utf-8")
+    ingestor = _ingest(data, 13, markup="html")
+    assert all("<" not in sentence for sentence in ingestor.sentences)
+    assert len(ingestor.sentences) == 15
+
+
+def test_payload_limit():
+    """ارسال بیش از حد مجاز با PayloadTooLarge متوقف می‌شود"""
+    ingestor = StreamingIngestor(max_bytes=1024)
+    try:
+        for i in range(0, 4096, 512):
+            ingestor.feed(b"a" * 512)
+    except PayloadTooLarge:
+        assert ingestor.bytes_received == 1536
+    else:
+        raise AssertionError("PayloadTooLarge was not raised")
+
+
+def test_long_documents_are_streamed():
+    """سند طولانی پس از آستانه به‌جای نگه‌داشتن جملات، آن‌ها را به رتبه‌بند جریانی می‌دهد"""
+    pipeline = get_pipeline("fa")
+    expected = pipeline.sentences(pipeline.normalize(document))
+    ranker = StreamingTextRank(window=10)
+    ingestor = StreamingIngestor(max_bytes=2048)
+    ingestor.stream_to(ranker, 30, 0)
+    data = document.encode("utf-8")
+    for i in range(0, len(data), 500):
+        ingestor.feed(data[i : i + 500])
+    ingestor.finish()
+    assert ingestor.streamed
+    assert ingestor.sentences == [] and ingestor.text == ""
+    assert ingestor.num_sentences == ranker.num_sentences == len(expected)
+    assert ingestor.num_chars == len(_ingest(data, 500).text)
+    assert ranker.finish()["num_original_sentences"] == len(expected)
+
+
+def test_language_is_detected_only_on_request():
+    """بدون lang سند فارسی در نظر گرفته می‌شود، حتی اگر واژه‌های لاتین آن بیشتر باشند"""
+    data = "دستور pip install transformers torch sentencepiece را اجرا کنید. فایل config.json را دانلود کنید.".encode("utf-8")
+    assert _ingest(data, 16).lang == "fa"
+    assert _ingest(data, 16, lang="auto").lang == "en"
+
+
+if __name__ == "__main__":
+    test_chunked_feed_matches_whole_document()
+    test_markup_is_stripped()
+    test_payload_limit()
+    test_long_documents_are_streamed()
+    test_language_is_detected_only_on_request()
+    print("✅ تست‌ها با موفقیت اجرا شدند!")
@@ -0,0 +1,32 @@
+from length_plan import LENGTH_TARGET_MAX, MIN_CHUNK_BUDGET, plan_lengths
+
+
+def test_budget_is_split_by_chunk_size():
+    """بودجه کل به نسبت تعداد توکن هر چانک تقسیم می‌شود"""
+    plan = plan_lengths([800, 400, 200], total_tokens=1200, length_ratio=0.2)
+    budgets = [chunk["budget"] for chunk in plan["chunks"]]
+    print(f"target={plan['target_total']} budgets={budgets}")
+
+    assert plan["target_total"] == 240
+    assert budgets[0] > budgets[1] > budgets[2]
+    assert abs(sum(budgets) - plan["target_total"]) <= len(budgets)
+    for chunk in plan["chunks"]:
+        assert chunk["min_new_tokens"] <= chunk["budget"] <= chunk["max_new_tokens"]
+
+
+def test_budget_limits():
+    """بودجه از طول چانک بیشتر نمی‌شود و سقف کلی رعایت می‌شود"""
+    plan = plan_lengths([30, 5000], total_tokens=5000, length_ratio=0.9)
+    assert plan["target_total"] == LENGTH_TARGET_MAX
+    assert plan["chunks"][0]["budget"] == MIN_CHUNK_BUDGET
+    assert plan["chunks"][1]["budget"] <= LENGTH_TARGET_MAX
+
+    scaled = plan_lengths([300], total_tokens=300, length_ratio=0.5, max_new_tokens_scale=0.6)
+    assert scaled["target_total"] == 90
+    assert scaled["final"]["max_new_tokens"] < 150
+
+
+if __name__ == "__main__":
+    test_budget_is_split_by_chunk_size()
+    test_budget_limits()
+    print("✅ تست‌ها با موفقیت اجرا شدند!")
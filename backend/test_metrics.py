@@ -0,0 +1,97 @@
+import csv
+import os
+import random
+import tempfile
+
+from rouge_score import rouge_scorer
+
+import metrics
+from metrics import RougeEngine, bootstrap_ci, export_per_sample, tokenize
+
+
+class _Tokenizer:
+    def tokenize(self, text):
+        return tokenize(text)
+
+
+def test_rouge_matches_rouge_score():
+    """امتیازهای ROUGE باید دقیقاً با rouge_score برابر باشند"""
+    scorer = rouge_scorer.RougeScorer(
+        ["rouge1", "rouge2", "rougeL"],
+        use_stemmer=False,
+        tokenizer=_Tokenizer(),
+    )
+    engine = RougeEngine()
+    vocab = "هوش مصنوعی فناوری متن خلاصه مدل داده زبان ۱۴۰۲ NLP".split()
+    rng = random.Random(7)
+    references = [" ".join(rng.choices(vocab, k=rng.randint(0, 60))) for _ in range(40)]
+
+    for _ in range(500):
+        reference = rng.choice(references)
+        prediction = " ".join(rng.choices(vocab, k=rng.randint(0, 60)))
+        expected = scorer.score(reference, prediction)
+        actual = engine.score(reference, prediction)
+        for rouge_type, score in expected.items():
+            assert tuple(score) == actual[rouge_type], (rouge_type, reference, prediction)
+
+    stats = engine.stats()
+    print(f"cache: {stats}")
+    assert stats["cache_misses"] <= len(references)
+
+
+def test_score_batch_shares_tokenization():
+    """امتیاز دسته‌ای با امتیاز تک‌به‌تک برابر است و هر متن تکراری فقط یک بار توکن می‌شود"""
+    vocab = "هوش مصنوعی فناوری متن خلاصه مدل داده زبان".split()
+    rng = random.Random(3)
+    references = [" ".join(rng.choices(vocab, k=rng.randint(0, 30))) for _ in range(5)]
+    predictions = [" ".join(rng.choices(vocab, k=rng.randint(0, 30))) for _ in range(4)]
+    pairs = [(reference, prediction) for reference in references for prediction in predictions]
+
+    tokenized = []
+    original = metrics.tokenize
+    metrics.tokenize = lambda text: tokenized.append(text) or original(text)
+    try:
+        engine = RougeEngine()
+        batch = engine.score_batch([r for r, _ in pairs], [p for _, p in pairs])
+    finally:
+        metrics.tokenize = original
+
+    assert batch == [RougeEngine().score(reference, prediction) for reference, prediction in pairs]
+    assert sorted(tokenized) == sorted(set(references) | set(predictions))
+    assert engine.stats()["cache_misses"] == len(set(references))
+
+    engine.score_batch(references, predictions[:1] * len(references))
+    assert engine.stats()["cache_hits"] == len(set(references))
+
+    try:
+        engine.score_batch(references, predictions)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("mismatched lengths were accepted")
+
+
+def test_bootstrap_and_export():
+    """بازه اطمینان bootstrap و خروجی CSV هر نمونه"""
+    ci = bootstrap_ci([0.2, 0.4, 0.6, 0.8], resamples=500)
+    print(f"ci: {ci}")
+    assert ci["low"] <= ci["mean"] <= ci["high"]
+    assert ci["mean"] == 0.5
+
+    records = [
+        {"row": 0, "rougeL_f1": 0.5, "latency_sec": 0.1},
+        {"row": 1, "rougeL_f1": 0.25, "latency_sec": 0.2},
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = export_per_sample(records, os.path.join(tmp, "samples.csv"))
+        with open(path, "r", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+    assert [row["row"] for row in rows] == ["0", "1"]
+    assert float(rows[1]["rougeL_f1"]) == 0.25
+
+
+if __name__ == "__main__":
+    test_rouge_matches_rouge_score()
+    test_score_batch_shares_tokenization()
+    test_bootstrap_and_export()
+    print("✅ تست‌ها با موفقیت اجرا شدند!")
@@ -0,0 +1,35 @@
+from extractive import textrank_summarize
+from pipelines import detect_language, get_pipeline, resolve_language
+
+
+def test_detect_language():
+    """تشخیص خودکار زبان از روی خط"""
+    assert detect_language("Natural language processing is a field of AI.") == "en"
+    assert detect_language("پردازش زبان طبیعی شاخه‌ای از هوش مصنوعی است.") == "fa"
+    assert detect_language("مدل‌های NLP مانند BERT و GPT در فارسی هم کاربرد دارند.") == "fa"
+    assert resolve_language("en", "متن فارسی") == "en"
+    assert resolve_language("auto", "Plain English text.") == "en"
+
+
+def test_english_pipeline():
+    """مسیر انگلیسی بدون hazm جمله‌ها را جدا و خلاصه می‌کند"""
+    pipeline = get_pipeline("en")
+    text = (
+        "Natural language processing helps computers understand human language. "
+        "It powers translation, speech recognition and question answering. "
+        "Summarization is one of its classic problems. "
+        "TextRank is a popular extractive summarization algorithm."
+    )
+    sentences = pipeline.sentences(text)
+    print(sentences)
+    assert len(sentences) == 4
+    assert pipeline.abstractive_settings()["prefix"] == ""
+
+    result = textrank_summarize(text, summary_ratio=0.5, lang="en")
+    assert result["num_summary_sentences"] == 2
+
+
+if __name__ == "__main__":
+    test_detect_language()
+    test_english_pipeline()
+    print("✅ تست‌ها با موفقیت اجرا شدند!")
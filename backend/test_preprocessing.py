@@ -1,4 +1,9 @@
-from preprocessing import normalize_text, sentence_tokenize_persian, word_tokenize_persian
+from preprocessing import (
+    normalize_text,
+    sentence_tokenize_persian,
+    sentence_tokenize_persian_fast,
+    word_tokenize_persian,
+)
 
 
 test_texts = [
@@ -69,10 +74,46 @@ def test_word_tokenize():
     print(f"کلمات: {words}")
 
 
+def test_fast_sentence_tokenize():
+    """تست جداساز سریع جمله و هم‌خوانی با hazm"""
+    print("\n" + "=" * 80)
+    print("تست جداساز سریع جملات")
+    print("=" * 80)
+
+    for text in test_texts:
+        fast = sentence_tokenize_persian_fast(text)
+        print(f"hazm: {len(sentence_tokenize_persian(text))} | fast: {len(fast)}")
+        assert len(fast) == len(sentence_tokenize_persian(text))
+
+    text = "قیمت دلار ۳.۵ درصد بالا رفت. دکتر ج. احمدی گفت: «این روند ادامه دارد؟» بله... شاید!! پایان"
+    sentences = sentence_tokenize_persian_fast(text)
+    print(sentences)
+    assert sentences == [
+        "قیمت دلار ۳.۵ درصد بالا رفت.",
+        "دکتر ج. احمدی گفت: «این روند ادامه دارد؟» بله... شاید!!",
+        "پایان",
+    ]
+
+    # حرف تنها پس از عدد، پایان جمله بدون فاصله و نقل‌قول بسته مانند hazm
+    cases = {
+        "سال ۱۴۰۲ م. تمام شد.": ["سال ۱۴۰۲ م.", "تمام شد."],
+        "این کتاب خوب است.جمله دوم هم هست.": ["این کتاب خوب است.", "جمله دوم هم هست."],
+        "«سلام.» و رفت.": ["«سلام.» و رفت."],
+    }
+    for text, expected in cases.items():
+        assert sentence_tokenize_persian_fast(text) == expected
+        assert sentence_tokenize_persian(text) == expected
+    assert sentence_tokenize_persian_fast("در سال ۱۳۵۷ ه.ش. رخ داد.") == ["در سال ۱۳۵۷ ه.ش. رخ داد."]
+
+    # نیم‌فاصله حفظ و حروف عربی یکسان‌سازی می‌شوند
+    assert sentence_tokenize_persian_fast("كتاب‌ها را خواندم.") == ["کتاب‌ها را خواندم."]
+
+
 def test_all():
     """اجرای همه تست‌ها"""
     test_normalize()
     test_sentence_tokenize()
+    test_fast_sentence_tokenize()
     test_word_tokenize()
     
     print("\n" + "=" * 80)
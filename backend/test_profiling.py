@@ -0,0 +1,44 @@
+from extractive import textrank_summarize
+from profiling import current_profile, finish_profile, get_profile, start_profile
+
+
+text = """
+پردازش زبان طبیعی شاخه‌ای از هوش مصنوعی است که به کامپیوترها کمک می‌کند زبان انسانی را درک کنند.
+این فناوری کاربردهای زیادی دارد از جمله ترجمه ماشینی، تشخیص گفتار، و پاسخ به سوالات.
+خلاصه‌سازی متن یکی از چالش‌های مهم در این حوزه است.
+الگوریتم TextRank یکی از روش‌های محبوب برای خلاصه‌سازی استخراجی است.
+"""
+
+
+def test_profile_is_opt_in():
+    """بدون هدر یا نرخ نمونه‌برداری، پروفایلی ساخته نمی‌شود"""
+    assert start_profile("no-profile") is None
+    assert start_profile("no-profile", "0") is None
+    assert current_profile() is None
+
+
+def test_profile_records_stages_and_exports():
+    """پروفایل مراحل اجرا را ثبت و خروجی speedscope تولید می‌کند"""
+    profile = start_profile("profile-test", "1")
+    try:
+        textrank_summarize(text, summary_ratio=0.5)
+    finally:
+        finish_profile(profile)
+
+    summary = profile.summary()
+    print(f"stages: {summary['stages']}")
+    for name in ("normalize", "sentence_split", "tfidf_similarity", "pagerank"):
+        assert name in summary["stages"]
+
+    assert get_profile("profile-test") is profile
+    assert current_profile() is None
+
+    speedscope = profile.speedscope()
+    assert speedscope["profiles"][0]["type"] == "sampled"
+    assert len(speedscope["profiles"][0]["samples"]) == len(speedscope["profiles"][0]["weights"])
+
+
+if __name__ == "__main__":
+    test_profile_is_opt_in()
+    test_profile_records_stages_and_exports()
+    print("✅ تست‌ها با موفقیت اجرا شدند!")
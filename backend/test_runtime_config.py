@@ -0,0 +1,62 @@
+import json
+import os
+import subprocess
+import sys
+from argparse import Namespace
+
+from runtime_config import _bench_extractive_subprocess
+
+
+PROBE = """
+import json
+import anyio
+from fastapi.concurrency import run_in_threadpool
+from threadpoolctl import threadpool_info
+import main
+import torch
+
+main.apply_blas_limits()
+pools = anyio.run(run_in_threadpool, threadpool_info)
+print(json.dumps([{"api": pool["internal_api"], "threads": pool["num_threads"]} for pool in pools]))
+"""
+
+
+def test_blas_limit_reaches_request_threads():
+    """محدودیت threadهای BLAS/OpenMP در threadهای اجرای درخواست هم اعمال می‌شود"""
+    env = dict(os.environ, BLAS_THREADS="1", OMP_NUM_THREADS="4", RUNTIME_CONFIG_PATH="")
+    proc = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    pools = json.loads(proc.stdout.strip().splitlines()[-1])
+    print(f"pools: {pools}")
+    assert {pool["api"] for pool in pools} >= {"openblas", "openmp"}
+    assert all(pool["threads"] == 1 for pool in pools)
+
+
+def test_extractive_bench_limits_worker_threads():
+    """هر گزینه بنچمارک TextRank در فرایند جدا اجرا می‌شود و محدودیت threadها به threadهای کارگر هم می‌رسد"""
+    args = Namespace(concurrency=2, samples=2, dataset=None)
+    previous = os.environ.get("OMP_NUM_THREADS")
+    os.environ["OMP_NUM_THREADS"] = "4"
+    try:
+        result = _bench_extractive_subprocess(args, 1)
+    finally:
+        if previous is None:
+            del os.environ["OMP_NUM_THREADS"]
+        else:
+            os.environ["OMP_NUM_THREADS"] = previous
+    print(f"result: {result}")
+    assert result["blas_threads"] == 1 and result["slots"] == 2
+    assert result["worker_blas_threads"] == 1
+    assert result["throughput_per_sec"] > 0
+
+
+if __name__ == "__main__":
+    test_blas_limit_reaches_request_threads()
+    test_extractive_bench_limits_worker_threads()
+    print("✅ تست‌ها با موفقیت اجرا شدند!")
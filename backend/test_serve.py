@@ -0,0 +1,138 @@
+import csv
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _memory_kb(pid):
+    # PSS splits shared pages between the processes mapping them; USS is
+    # the memory only this process holds.
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup", "r", encoding="utf-8") as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            if value.strip().endswith("kB"):
+                fields[name] = int(value.split()[0])
+    return {
+        "rss": fields["Rss"],
+        "pss": fields["Pss"],
+        "uss": fields["Private_Clean"] + fields["Private_Dirty"],
+    }
+
+
+def _children(pid):
+    with open(f"/proc/{pid}/task/{pid}/children", "r", encoding="utf-8") as f:
+        return [int(child) for child in f.read().split()]
+
+
+@contextmanager
+def _server(**env):
+    port = _free_port()
+    env = dict(os.environ, SERVING_PROFILE="extractive", LOG_LEVEL="WARNING", **env)
+    server = subprocess.Popen(
+        [sys.executable, "serve.py", "--host", "127.0.0.1", "--port", str(port), "--workers", "2"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.time() + 60
+        while True:
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{port}/readyz", timeout=1)
+                break
+            except OSError:
+                assert server.poll() is None and time.time() < deadline
+                time.sleep(0.2)
+        yield server, f"http://127.0.0.1:{port}"
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=30)
+
+
+def _request(url, payload=None, headers=None):
+    data = json.dumps(payload).encode("utf-8") if payload is not None else None
+    request = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json", **(headers or {})})
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return response.status, response.read().decode("utf-8")
+    except urllib.error.HTTPError as exc:
+        return exc.code, exc.read().decode("utf-8")
+
+
+text = "هوش مصنوعی فناوری مهمی است. پزشکان از آن استفاده می‌کنند. دولت‌ها قانون می‌نویسند."
+
+
+def test_forked_workers_serve_and_share_memory():
+    """serve.py با دو worker درخواست‌ها را پاسخ می‌دهد و workerها حافظه پیش‌بارگذاری را به اشتراک می‌گذارند"""
+    workers = []
+    with _server() as (server, base):
+        for _ in range(4):
+            status, body = _request(f"{base}/api/summarize", {"text": text})
+            assert status == 200 and json.loads(body)["ok"] is True
+
+        workers = _children(server.pid)
+        memory = {pid: _memory_kb(pid) for pid in workers}
+        for pid, usage in memory.items():
+            print(f"worker {pid}: rss {usage['rss'] / 1024:.0f}MB pss {usage['pss'] / 1024:.0f}MB uss {usage['uss'] / 1024:.0f}MB")
+        assert len(workers) == 2
+        # Pages preloaded before fork() are shared, not copied per worker.
+        for usage in memory.values():
+            assert usage["uss"] < usage["rss"] / 2
+    assert all(not os.path.exists(f"/proc/{pid}") for pid in workers)
+
+
+def test_jobs_and_profiles_are_visible_from_every_worker():
+    """وضعیت ارزیابی، رویدادهای SSE و پروفایل‌ها از هر worker در دسترس‌اند، نه فقط worker سازنده"""
+    with tempfile.TemporaryDirectory() as directory:
+        dataset = os.path.join(directory, "test.tsv")
+        with open(dataset, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f, delimiter="\t")
+            writer.writerow(["id", "article", "summary"])
+            for i in range(3):
+                writer.writerow([f"r{i}", text, text.split(".")[0]])
+        state = os.path.join(directory, "state")
+
+        with _server(TEST_DATASET_PATH=dataset, SHARED_STATE_DIR=state) as (server, base):
+            status, body = _request(f"{base}/api/summarize", {"text": text}, {"X-Profile": "1"})
+            profile_id = json.loads(body)["extra"]["profile"]["profile_id"]
+            status, body = _request(f"{base}/api/evaluate/async", {"method": "extractive", "max_samples": 3})
+            job_id = json.loads(body)["job_id"]
+
+            # New connections are accepted by either worker.
+            statuses = []
+            deadline = time.time() + 60
+            while len(statuses) < 12 or statuses[-1] != "completed":
+                assert time.time() < deadline
+                code, body = _request(f"{base}/api/evaluate/status/{job_id}")
+                statuses.append(json.loads(body)["status"] if code == 200 else code)
+                assert _request(f"{base}/api/profiles/{profile_id}?format=stages")[0] == 200
+                time.sleep(0.1)
+            print(f"statuses: {statuses}")
+            assert 404 not in statuses
+
+            events = [_request(f"{base}/api/evaluate/events/{job_id}")[1] for _ in range(4)]
+            assert all("event: completed" in body for body in events)
+            assert os.listdir(os.path.join(state, "eval_jobs")) == [f"{job_id}.json"]
+            assert os.listdir(os.path.join(state, "profiles")) == [f"{profile_id}.json"]
+
+
+if __name__ == "__main__":
+    test_forked_workers_serve_and_share_memory()
+    test_jobs_and_profiles_are_visible_from_every_worker()
+    print("✅ تست‌ها با موفقیت اجرا شدند!")
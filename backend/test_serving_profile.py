@@ -0,0 +1,16 @@
+import json
+
+from bench_imports import HEAVY_MODULES, _run_probe
+
+
+def test_extractive_profile_skips_torch():
+    """پروفایل extractive هنگام بارگذاری API هیچ کتابخانه سنگینی را import نمی‌کند"""
+    result = json.loads(_run_probe("extractive").stdout.strip().splitlines()[-1])
+    print(f"import: {result['import_sec']:.3f}s, rss: {result['max_rss_mb']:.0f}MB")
+    assert not set(result["loaded"]) & {"torch", "transformers"}
+    assert set(result["loaded"]) <= set(HEAVY_MODULES)
+
+
+if __name__ == "__main__":
+    test_extractive_profile_skips_torch()
+    print("✅ تست‌ها با موفقیت اجرا شدند!")
@@ -0,0 +1,43 @@
+import os
+import tempfile
+import time
+
+from shared_state import SharedStore
+
+
+def test_store_round_trip_and_expire():
+    """سندها بین نمونه‌های store روی یک پوشه دیده می‌شوند، کلید مسیردار رد می‌شود و سندهای کهنه حذف می‌شوند"""
+    with tempfile.TemporaryDirectory() as directory:
+        writer = SharedStore("jobs", root=directory)
+        reader = SharedStore("jobs", root=directory)
+        writer.put("job-1", {"status": "running", "text": "سلام"})
+        assert reader.get("job-1") == {"status": "running", "text": "سلام"}
+        assert reader.get("missing") is None
+
+        for key in ("../jobs/job-1", "job-1/..", ""):
+            writer.put(key, {"status": "x"})
+            assert reader.get(key) is None
+        assert sorted(os.listdir(writer.directory)) == ["job-1.json"]
+
+        writer.put("job-2", {})
+        writer.put("job-3", {})
+        old = time.time() - 100
+        os.utime(os.path.join(writer.directory, "job-1.json"), (old, old))
+        writer.expire(50)
+        assert reader.get("job-1") is None and reader.get("job-2") == {}
+        writer.expire(50, max_items=1)
+        assert len(os.listdir(writer.directory)) == 1
+
+        writer.delete("job-2")
+        writer.delete("job-3")
+        assert os.listdir(writer.directory) == []
+
+    disabled = SharedStore("jobs", root="")
+    assert not disabled.enabled
+    disabled.put("job-1", {})
+    assert disabled.get("job-1") is None
+
+
+if __name__ == "__main__":
+    test_store_round_trip_and_expire()
+    print("✅ تست‌ها با موفقیت اجرا شدند!")
@@ -0,0 +1,211 @@
+import csv
+import os
+import tempfile
+import threading
+
+import sweep
+from conftest import articles, write_dataset
+from corpus import compile_corpus
+from evaluation import evaluate_dataset
+from sweep import _ExtractiveCache, _leaderboard, expand_grid, run_sweep
+
+
+base = {
+    "method": "extractive",
+    "length": 30,
+    "extractive_length": None,
+    "abstractive_length": None,
+    "abstractive_num_beams": 2,
+    "abstractive_length_penalty": 1.0,
+    "abstractive_repetition_penalty": 1.1,
+    "abstractive_no_repeat_ngram_size": 3,
+    "abstractive_decoding": "beam",
+    "abstractive_decoding_scope": "final",
+    "lang": "fa",
+}
+
+
+# hazm splits inside "ه.ش."; the fast segmenter keeps it as an abbreviation.
+dated = (
+    "انقلاب در سال ۱۳۵۷ ه.ش. رخ داد و مردم به خیابان‌ها آمدند. "
+    "پس از آن قانون اساسی جدید نوشته شد. همه‌پرسی در همان سال برگزار شد."
+)
+
+
+def _count_summaries():
+    calls = []
+    # The raw staticmethod, so restoring it keeps it unbound.
+    original = _ExtractiveCache.__dict__["_summarize"]
+
+    def summarize(sample, ratio, lang, segmenter="hazm"):
+        calls.append((ratio, lang))
+        return original.__func__(sample, ratio, lang, segmenter)
+
+    _ExtractiveCache._summarize = staticmethod(summarize)
+    return calls, original
+
+
+def test_expand_grid():
+    """شبکه پارامترها ضرب دکارتی می‌شود و پارامتر ناشناخته یا شبکه بزرگ‌تر از حد رد می‌شود"""
+    configs = expand_grid(base, {"length": [20, 40], "extractive_length": [30, 50, 70], "lang": []})
+    assert len(configs) == 6
+    assert [(c["length"], c["extractive_length"]) for c in configs[:3]] == [(20, 30), (20, 50), (20, 70)]
+    assert all(c["method"] == "extractive" and c["lang"] == "fa" for c in configs)
+    assert base["length"] == 30 and base["extractive_length"] is None
+
+    for grid in ({"segmenter": ["fast"]}, {"length": [10], "top_k": [1]}):
+        try:
+            expand_grid(base, grid)
+        except ValueError as exc:
+            assert "Unsupported sweep parameters" in str(exc)
+        else:
+            raise AssertionError(grid)
+
+    limit = sweep.SWEEP_MAX_CONFIGS
+    sweep.SWEEP_MAX_CONFIGS = 4
+    try:
+        assert len(expand_grid(base, {"length": [10, 20], "extractive_length": [30, 50]})) == 4
+        try:
+            expand_grid(base, {"length": [10, 20, 30], "extractive_length": [30, 50]})
+        except ValueError as exc:
+            assert "6 configs" in str(exc)
+        else:
+            raise AssertionError("grid over the limit was accepted")
+    finally:
+        sweep.SWEEP_MAX_CONFIGS = limit
+
+
+def test_extractive_cache_is_shared():
+    """پیکربندی‌های هم‌نسبت که هم‌زمان اجرا می‌شوند یک بار TextRank را اجرا می‌کنند"""
+    samples = [{"article": article} for article in articles]
+    cache = _ExtractiveCache(samples)
+    calls, original = _count_summaries()
+    outputs = []
+    try:
+        threads = [threading.Thread(target=lambda: outputs.append(cache.get(0.5, "fa"))) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        other = cache.get(0.3, "fa")
+    finally:
+        _ExtractiveCache._summarize = original
+
+    assert len(outputs) == 4 and all(output is outputs[0] for output in outputs)
+    assert calls.count((0.5, "fa")) == len(samples) and calls.count((0.3, "fa")) == len(samples)
+    assert len(other) == len(samples) and other != outputs[0]
+
+
+def test_leaderboard_pareto():
+    """رتبه بر اساس ROUGE-L و تأخیر است و فقط پیکربندی‌های غیرمغلوب pareto هستند"""
+    entries = [
+        {"label": "slow-best", "rougeL_f1": 0.5, "avg_latency_sec": 0.9},
+        {"label": "fast-worst", "rougeL_f1": 0.2, "avg_latency_sec": 0.1},
+        {"label": "dominated", "rougeL_f1": 0.3, "avg_latency_sec": 0.5},
+        {"label": "middle", "rougeL_f1": 0.4, "avg_latency_sec": 0.3},
+        {"label": "tie-faster", "rougeL_f1": 0.5, "avg_latency_sec": 0.6},
+    ]
+    ranked = _leaderboard(entries)
+    assert [e["label"] for e in ranked] == ["tie-faster", "slow-best", "middle", "dominated", "fast-worst"]
+    assert [e["rank"] for e in ranked] == [1, 2, 3, 4, 5]
+    assert {e["label"] for e in ranked if e["pareto"]} == {"tie-faster", "middle", "fast-worst"}
+
+
+def test_extractive_sweep():
+    """جاروب استخراجی روی یک TSV کوچک: خروجی TextRank بین پیکربندی‌ها مشترک است و خطاها جدا گزارش می‌شوند"""
+    grid = {"length": [20, 40], "extractive_length": [30, 60], "lang": ["fa", "xx"]}
+    progress = []
+    calls, original = _count_summaries()
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            entries = run_sweep(
+                write_dataset(directory),
+                base,
+                grid,
+                max_samples=0,
+                max_workers=2,
+                progress_cb=lambda *args: progress.append(args),
+            )
+    finally:
+        _ExtractiveCache._summarize = original
+
+    for entry in entries:
+        print(f"{entry['label']}: {entry.get('rougeL_f1', entry.get('error'))}")
+    ranked = [entry for entry in entries if "error" not in entry]
+    failed = [entry for entry in entries if "error" in entry]
+    assert len(ranked) == 4 and len(failed) == 4
+    assert entries[: len(ranked)] == ranked
+    assert all(entry["config"]["lang"] == "xx" and "Unsupported language" in entry["error"] for entry in failed)
+    assert all("rank" not in entry for entry in failed)
+
+    assert [entry["rank"] for entry in ranked] == [1, 2, 3, 4]
+    assert any(entry["pareto"] for entry in ranked)
+    assert all(entry["samples"] == len(articles) and entry["skipped"] == 0 for entry in ranked)
+    # Configs differing only in length share the TextRank pass for their ratio.
+    by_ratio = {}
+    for entry in ranked:
+        by_ratio.setdefault(entry["config"]["extractive_length"], set()).add(entry["rougeL_f1"])
+    assert all(len(scores) == 1 for scores in by_ratio.values())
+    successful_calls = [call for call in calls if call[1] == "fa"]
+    assert sorted(set(successful_calls)) == [(0.3, "fa"), (0.6, "fa")]
+    assert len(successful_calls) == 2 * len(articles)
+
+    # Failed configs stop before their first sample.
+    assert progress[-1][0] == 4 * len(articles) and progress[-1][1] == 8 * len(articles)
+
+
+def test_sweep_segmenter_and_export_match_evaluation():
+    """جاروب جداساز درخواست را به کار می‌برد و ردیف‌های هر نمونه را مانند ارزیابی عادی ذخیره می‌کند"""
+    config = dict(base, extractive_length=50)
+    sentence_counts = {}
+    for segmenter in ("fast", "hazm"):
+        for compiled in (False, True):
+            with tempfile.TemporaryDirectory() as directory:
+                path = write_dataset(directory, texts=articles + [dated])
+                if compiled:
+                    compile_corpus(path, segmenter=segmenter, model_tokens=False)
+                report = {}
+                metrics, _, _ = evaluate_dataset(
+                    path,
+                    method="extractive",
+                    length=30,
+                    extractive_length=50,
+                    abstractive_length=30,
+                    max_samples=0,
+                    start_index=0,
+                    shuffle=False,
+                    seed=42,
+                    lang="fa",
+                    report=report,
+                    segmenter=segmenter,
+                )
+                entries = run_sweep(
+                    path,
+                    config,
+                    {"length": [20, 40]},
+                    max_samples=0,
+                    segmenter=segmenter,
+                    per_sample_path=os.path.join(directory, "exports", "job.csv"),
+                )
+                print(f"{segmenter} compiled={compiled}: {[entry['rougeL_f1'] for entry in entries]}")
+                assert all(entry["rougeL_f1"] == metrics["rougeL_f1"] for entry in entries)
+                assert sorted(entry["per_sample_file"] for entry in entries) == ["job-1.csv", "job-2.csv"]
+                with open(os.path.join(directory, "exports", "job-1.csv"), encoding="utf-8") as f:
+                    rows = list(csv.DictReader(f))
+                expected = report["samples"]
+                assert [row["id"] for row in rows] == [record["id"] for record in expected]
+                for row, record in zip(rows, expected):
+                    for key in ("rougeL_f1", "generated_chars", "original_sentences", "generated_sentences"):
+                        assert float(row[key]) == record[key], key
+                sentence_counts[segmenter] = [row["original_sentences"] for row in rows]
+
+    assert sentence_counts["fast"] != sentence_counts["hazm"]
+
+
+if __name__ == "__main__":
+    test_expand_grid()
+    test_extractive_cache_is_shared()
+    test_leaderboard_pareto()
+    test_extractive_sweep()
+    test_sweep_segmenter_and_export_match_evaluation()
+    print("✅ تست‌ها با موفقیت اجرا شدند!")
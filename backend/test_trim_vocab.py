@@ -0,0 +1,73 @@
+import json
+import os
+import random
+import tempfile
+from collections import Counter
+
+import sentencepiece as spm
+from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+
+from conftest import farsi_words as farsi, tiny_mt5, train_sentencepiece
+from trim_vocab import TRIM_MANIFEST, export_trimmed, trim_sentencepiece
+
+
+other = ["model", "language", "network", "training", "Привет", "данные", "модель", "数据", "模型", "语言"]
+vocabularies = (farsi, other)
+
+
+def test_trimmed_sentencepiece_keeps_segmentation():
+    """متن فارسی با واژگان کوچک‌شده به همان قطعه‌ها و شناسه‌های جابه‌جاشده تقسیم می‌شود"""
+    with tempfile.TemporaryDirectory() as directory:
+        model_file = train_sentencepiece(directory, 90, vocabularies, 2000)
+        original = spm.SentencePieceProcessor(model_file=model_file)
+        texts = [" ".join(random.choices(farsi, k=20)) + "." for _ in range(20)]
+        counts = Counter(token_id for text in texts for token_id in original.encode(text))
+        kept_ids = sorted(set(counts) | {0, 1, 2})
+
+        trimmed_file = os.path.join(directory, "trimmed.model")
+        trim_sentencepiece(model_file, kept_ids, trimmed_file)
+        trimmed = spm.SentencePieceProcessor(model_file=trimmed_file)
+        print(f"vocab: {original.get_piece_size()} -> {trimmed.get_piece_size()}")
+
+        new_ids = {old: new for new, old in enumerate(kept_ids)}
+        assert trimmed.get_piece_size() == len(kept_ids) < original.get_piece_size()
+        assert (trimmed.pad_id(), trimmed.eos_id(), trimmed.unk_id()) == (0, 1, 2)
+        for text in texts:
+            assert trimmed.encode(text) == [new_ids[i] for i in original.encode(text)]
+            assert trimmed.decode(trimmed.encode(text)) == text
+
+
+def test_exported_tokenizer_maps_ids():
+    """توکنایزر سریع خروجی با AutoTokenizer بارگذاری می‌شود و همان شناسه‌های جابه‌جاشده را می‌دهد"""
+    with tempfile.TemporaryDirectory() as directory:
+        model, tokenizer = tiny_mt5(directory, 90, vocabularies, 2000, d_model=16, d_ff=32, d_kv=4, num_layers=1)
+        source = os.path.join(directory, "source")
+        tokenizer.save_pretrained(source)
+        model.save_pretrained(source)
+        original = AutoTokenizer.from_pretrained(source)
+
+        texts = [" ".join(random.choices(farsi, k=20)) + "." for _ in range(20)]
+        corpus = os.path.join(directory, "corpus.txt")
+        with open(corpus, "w", encoding="utf-8") as f:
+            f.write("\n".join(texts))
+        output = os.path.join(directory, "trimmed")
+        report = export_trimmed(source, [corpus], output_dir=output)
+        print(f"vocab: {report['original_vocab_size']} -> {report['trimmed_vocab_size']}")
+
+        with open(os.path.join(output, TRIM_MANIFEST), "r", encoding="utf-8") as f:
+            kept_ids = json.load(f)["kept_ids"]
+        new_ids = {old: new for new, old in enumerate(kept_ids)}
+        trimmed = AutoTokenizer.from_pretrained(output)
+        model = AutoModelForSeq2SeqLM.from_pretrained(output)
+
+        assert trimmed.is_fast
+        assert report["trimmed_vocab_size"] < report["original_vocab_size"]
+        assert model.config.vocab_size == len(trimmed) == len(kept_ids)
+        for text in texts:
+            assert trimmed.encode(text) == [new_ids[i] for i in original.encode(text)]
+
+
+if __name__ == "__main__":
+    test_trimmed_sentencepiece_keeps_segmentation()
+    test_exported_tokenizer_maps_ids()
+    print("✅ تست‌ها با موفقیت اجرا شدند!")
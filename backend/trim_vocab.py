@@ -0,0 +1,267 @@
+import argparse
+import json
+import logging
+import os
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+logger = logging.getLogger("summarizer.trim_vocab")
+
+TRIM_MANIFEST = "vocab_trim.json"
+TRIMMED_SUFFIX = "-trimmed"
+# Prompt fragments the serving path adds around every input.
+PROMPT_TEXTS = ("summarize: ", "\n- ")
+PROGRESS_INTERVAL_SEC = 5.0
+
+
+def iter_corpus_texts(inputs: Iterable[str], pattern: str = ".txt", text_field: str = "text") -> Iterator[str]:
+    from cli import iter_documents
+
+    for source in inputs:
+        if source.endswith((".tsv", ".csv")):
+            # Evaluation datasets: both articles and reference summaries, so
+            # the tokens the decoder is trained to emit are kept too.
+            from evaluation import _clean_dataset_text, _read_test_rows
+
+            for row in _read_test_rows(source):
+                for column in ("article", "summary"):
+                    text = _clean_dataset_text(row.get(column, ""))
+                    if text:
+                        yield text
+        else:
+            for _, text in iter_documents([source], pattern=pattern, text_field=text_field):
+                yield text
+
+
+def count_token_ids(tokenizer, texts: Iterable[str], lang: str = "fa", max_docs: Optional[int] = None) -> Counter:
+    from pipelines import get_pipeline
+
+    pipeline = get_pipeline(lang)
+    counts: Counter = Counter()
+    last_report = time.monotonic()
+    for docs, text in enumerate(texts, start=1):
+        # The API feeds raw text to the model and the evaluation feeds
+        # normalized text; both forms are scanned.
+        for variant in {text, pipeline.normalize(text)}:
+            counts.update(tokenizer.encode(variant, add_special_tokens=False))
+        if time.monotonic() - last_report >= PROGRESS_INTERVAL_SEC:
+            logger.info("scanned %d documents, %d distinct ids", docs, len(counts))
+            last_report = time.monotonic()
+        if max_docs and docs >= max_docs:
+            break
+    return counts
+
+
+def select_token_ids(tokenizer, counts: Counter, config=None, min_count: int = 1, corpus_chars: Iterable[str] = ()) -> List[int]:
+    keep = {token_id for token_id, count in counts.items() if count >= min_count}
+    keep.update(tokenizer.all_special_ids)
+    for text in PROMPT_TEXTS:
+        keep.update(tokenizer.encode(text, add_special_tokens=False))
+    # Single characters keep unseen words made of known letters encodable
+    # instead of collapsing to <unk>.
+    vocab = tokenizer.get_vocab()
+    for char in corpus_chars:
+        for piece in (char, f"▁{char}"):
+            if piece in vocab:
+                keep.add(vocab[piece])
+    if config is not None:
+        for name in ("pad_token_id", "eos_token_id", "decoder_start_token_id", "bos_token_id", "unk_token_id"):
+            value = getattr(config, name, None)
+            if isinstance(value, int) and value >= 0:
+                keep.add(value)
+    return sorted(keep)
+
+
+def trim_sentencepiece(model_file: str, kept_ids: List[int], output_file: str) -> None:
+    from sentencepiece import sentencepiece_model_pb2
+
+    proto = sentencepiece_model_pb2.ModelProto()
+    with open(model_file, "rb") as f:
+        proto.ParseFromString(f.read())
+    pieces = list(proto.pieces)
+    new_ids = {old: new for new, old in enumerate(kept_ids)}
+    del proto.pieces[:]
+    proto.pieces.extend(pieces[old] for old in kept_ids if old < len(pieces))
+
+    spec = proto.trainer_spec
+    for field in ("unk_id", "bos_id", "eos_id", "pad_id"):
+        old = getattr(spec, field)
+        if old >= 0:
+            if old not in new_ids:
+                raise ValueError(f"{field}={old} is not among the kept ids")
+            setattr(spec, field, new_ids[old])
+    with open(output_file, "wb") as f:
+        f.write(proto.SerializeToString())
+
+
+def trim_model(model, kept_ids: List[int]) -> None:
+    import torch
+
+    index = torch.tensor(kept_ids, dtype=torch.long)
+    new_ids = {old: new for new, old in enumerate(kept_ids)}
+    old_input = model.get_input_embeddings()
+    old_output = model.get_output_embeddings()
+
+    embeddings = torch.nn.Embedding(len(kept_ids), old_input.embedding_dim)
+    embeddings.weight.data = old_input.weight.data[index].clone()
+    model.set_input_embeddings(embeddings)
+    if getattr(model.config, "tie_word_embeddings", False):
+        model.tie_weights()
+    elif old_output is not None:
+        head = torch.nn.Linear(old_output.in_features, len(kept_ids), bias=old_output.bias is not None)
+        head.weight.data = old_output.weight.data[index].clone()
+        if old_output.bias is not None:
+            head.bias.data = old_output.bias.data[index].clone()
+        model.set_output_embeddings(head)
+    if hasattr(model, "final_logits_bias"):
+        model.register_buffer("final_logits_bias", model.final_logits_bias[:, index].clone())
+
+    model.config.vocab_size = len(kept_ids)
+    configs = [model.config]
+    if getattr(model, "generation_config", None) is not None:
+        configs.append(model.generation_config)
+    for config in configs:
+        for name in ("pad_token_id", "eos_token_id", "decoder_start_token_id", "bos_token_id"):
+            value = getattr(config, name, None)
+            if isinstance(value, int) and value >= 0:
+                setattr(config, name, new_ids[value])
+            elif isinstance(value, list):
+                setattr(config, name, [new_ids[item] for item in value])
+
+
+def _trimmed_tokenizer(tokenizer, model_file: str):
+    # A fast tokenizer is converted from the slow one over the trimmed file.
+    # The fast class keeps neither legacy nor add_prefix_space as attributes,
+    # and without add_prefix_space the converter stops prepending "▁" to the
+    # first word, so both come from the original's init kwargs.
+    settings = tokenizer.init_kwargs
+    add_prefix_space = settings.get("add_prefix_space")
+    return type(tokenizer)(
+        vocab_file=model_file,
+        eos_token=tokenizer.eos_token,
+        unk_token=tokenizer.unk_token,
+        pad_token=tokenizer.pad_token,
+        extra_ids=0,
+        model_max_length=tokenizer.model_max_length,
+        legacy=settings.get("legacy", getattr(tokenizer, "legacy", True)),
+        add_prefix_space=True if add_prefix_space is None else add_prefix_space,
+    )
+
+
+def export_trimmed(
+    model_name: str,
+    inputs: List[str],
+    output_dir: Optional[str] = None,
+    lang: str = "fa",
+    min_count: int = 1,
+    max_docs: Optional[int] = None,
+    ids_from: Optional[str] = None,
+    pattern: str = ".txt",
+    text_field: str = "text",
+) -> Dict[str, Any]:
+    import torch
+    from transformers import AutoConfig, AutoModelForSeq2SeqLM, AutoTokenizer
+
+    from abstractive import _resolve_model_path
+
+    resolved = _resolve_model_path(model_name)
+    if output_dir is None:
+        root = os.getenv("HF_MODEL_DIR") or os.path.join(os.path.dirname(__file__), "hf-models")
+        output_dir = os.path.join(root, os.path.basename(resolved.rstrip("/")) + TRIMMED_SUFFIX)
+    local_only = os.path.isdir(resolved) or os.getenv("HF_LOCAL_ONLY", "0") == "1"
+    tokenizer = AutoTokenizer.from_pretrained(resolved, local_files_only=local_only)
+    model_file = getattr(tokenizer, "vocab_file", None)
+    if not model_file or not os.path.exists(model_file):
+        raise ValueError(f"{model_name} has no SentencePiece vocabulary file; only SentencePiece models can be trimmed")
+
+    started = time.perf_counter()
+    documents = 0
+    if ids_from:
+        # A draft model for assisted decoding must share the main model's ids.
+        with open(os.path.join(ids_from, TRIM_MANIFEST), "r", encoding="utf-8") as f:
+            kept_ids = json.load(f)["kept_ids"]
+    else:
+        chars = set()
+
+        def texts() -> Iterator[str]:
+            nonlocal documents
+            for text in iter_corpus_texts(inputs, pattern=pattern, text_field=text_field):
+                documents += 1
+                chars.update(text)
+                yield text
+
+        counts = count_token_ids(tokenizer, texts(), lang=lang, max_docs=max_docs)
+        if not counts:
+            raise ValueError("The corpus is empty")
+        config = AutoConfig.from_pretrained(resolved, local_files_only=local_only)
+        kept_ids = select_token_ids(tokenizer, counts, config=config, min_count=min_count, corpus_chars=sorted(chars))
+        # Added tokens past the SentencePiece table (T5 sentinels) are dropped.
+        from sentencepiece import SentencePieceProcessor
+
+        piece_count = SentencePieceProcessor(model_file=model_file).get_piece_size()
+        kept_ids = [token_id for token_id in kept_ids if token_id < piece_count]
+    scan_sec = time.perf_counter() - started
+
+    model = AutoModelForSeq2SeqLM.from_pretrained(resolved, torch_dtype=torch.float32, local_files_only=local_only)
+    original_vocab = model.config.vocab_size
+    original_params = sum(p.numel() for p in model.parameters())
+    trim_model(model, kept_ids)
+
+    os.makedirs(output_dir, exist_ok=True)
+    trimmed_model_file = os.path.join(output_dir, os.path.basename(model_file))
+    trim_sentencepiece(model_file, kept_ids, trimmed_model_file)
+    trimmed_tokenizer = _trimmed_tokenizer(tokenizer, trimmed_model_file)
+    trimmed_tokenizer.save_pretrained(output_dir)
+    model.save_pretrained(output_dir)
+
+    report = {
+        "source_model": model_name,
+        "original_vocab_size": original_vocab,
+        "trimmed_vocab_size": len(kept_ids),
+        "original_parameters": original_params,
+        "trimmed_parameters": sum(p.numel() for p in model.parameters()),
+        "documents": documents,
+        "min_count": min_count,
+        "scan_sec": round(scan_sec, 2),
+        "output_dir": output_dir,
+    }
+    with open(os.path.join(output_dir, TRIM_MANIFEST), "w", encoding="utf-8") as f:
+        json.dump({**report, "kept_ids": kept_ids}, f)
+    return report
+
+
+def main() -> None:
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
+    parser = argparse.ArgumentParser(
+        description="Export a copy of a SentencePiece seq2seq model restricted to the tokens a corpus uses"
+    )
+    parser.add_argument("inputs", nargs="*", help="Dataset .tsv/.csv files, text files, directories or .jsonl files")
+    parser.add_argument("--model", default=os.getenv("ABSTRACTIVE_MODEL", "nafisehNik/mt5-persian-summary"))
+    parser.add_argument("-o", "--output", help=f"Output directory (default: hf-models/<model>{TRIMMED_SUFFIX})")
+    parser.add_argument("--lang", choices=["fa", "en"], default="fa")
+    parser.add_argument("--min-count", type=int, default=1, help="Drop tokens seen fewer times than this")
+    parser.add_argument("--max-docs", type=int, help="Stop scanning after this many documents")
+    parser.add_argument("--ids-from", help="Reuse the kept ids of an earlier trimmed model directory")
+    parser.add_argument("--pattern", default=".txt", help="File suffix matched inside directories")
+    parser.add_argument("--text-field", default="text")
+    args = parser.parse_args()
+    if not args.inputs and not args.ids_from:
+        parser.error("pass corpus inputs or --ids-from")
+
+    report = export_trimmed(
+        args.model,
+        args.inputs,
+        output_dir=args.output,
+        lang=args.lang,
+        min_count=args.min_count,
+        max_docs=args.max_docs,
+        ids_from=args.ids_from,
+        pattern=args.pattern,
+        text_field=args.text_field,
+    )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
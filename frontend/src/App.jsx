@@ -42,6 +42,7 @@ const DEFAULT_ABSTRACTIVE_SETTINGS = {
   repetitionPenalty: 1.1,
   noRepeatNgramSize: 3,
 }
+const EVAL_STATUS_MAX_MISSES = 5
 
 function App() {
   const [text, setText] = useState('')
@@ -76,6 +77,7 @@ function App() {
   const [evalProgress, setEvalProgress] = useState(null)
   const evalJobRef = useRef(null)
   const evalPollTimeoutRef = useRef(null)
+  const evalEventSourceRef = useRef(null)
   const evalStatusLabels = {
     queued: 'در صف پردازش',
     running: 'در حال پردازش',
@@ -98,11 +100,25 @@ function App() {
     return API_BASE ? `${API_BASE}/api/evaluate/status` : '/api/evaluate/status'
   }, [])
 
+  const evalEventsEndpoint = useMemo(() => {
+    return API_BASE ? `${API_BASE}/api/evaluate/events` : '/api/evaluate/events'
+  }, [])
+
+  const closeEvalEvents = () => {
+    if (evalEventSourceRef.current) {
+      evalEventSourceRef.current.close()
+      evalEventSourceRef.current = null
+    }
+  }
+
   useEffect(() => {
     return () => {
       if (evalPollTimeoutRef.current) {
         clearTimeout(evalPollTimeoutRef.current)
       }
+      if (evalEventSourceRef.current) {
+        evalEventSourceRef.current.close()
+      }
     }
   }, [])
 
@@ -177,6 +193,7 @@ function App() {
     if (evalPollTimeoutRef.current) {
       clearTimeout(evalPollTimeoutRef.current)
     }
+    closeEvalEvents()
 
     const payload = {
       method,
@@ -212,7 +229,7 @@ function App() {
       if (response.ok && data?.job_id) {
         evalJobRef.current = data.job_id
         setEvalStatus(data.status || 'queued')
-        pollEvalStatus(data.job_id)
+        watchEvalStatus(data.job_id)
       } else {
         setEvalError(data?.error || 'خطا در اجرای تست')
         setEvalLoading(false)
@@ -229,7 +246,68 @@ function App() {
     }
   }
 
-  const pollEvalStatus = async (jobId) => {
+  // Returns true once the job has finished.
+  const applyEvalStatus = (data) => {
+    if (data?.progress) {
+      setEvalProgress(data.progress)
+    }
+
+    if (data.status === 'completed') {
+      setEvalResult(data.result)
+      setEvalLoading(false)
+      setEvalStatus('completed')
+      setEvalProgress(data?.progress || null)
+      return true
+    }
+
+    if (data.status === 'failed') {
+      setEvalError(data?.error || 'خطا در اجرای تست')
+      setEvalLoading(false)
+      setEvalStatus('failed')
+      setEvalProgress(data?.progress || null)
+      return true
+    }
+
+    setEvalStatus(data.status)
+    return false
+  }
+
+  // Progress is pushed over SSE; polling is only the fallback when the
+  // browser or a proxy does not support event streams.
+  const watchEvalStatus = (jobId) => {
+    if (typeof window === 'undefined' || !window.EventSource) {
+      pollEvalStatus(jobId)
+      return
+    }
+
+    const source = new EventSource(`${evalEventsEndpoint}/${jobId}`)
+    evalEventSourceRef.current = source
+
+    const handleEvent = (event) => {
+      if (evalJobRef.current !== jobId) {
+        source.close()
+        return
+      }
+      if (applyEvalStatus(JSON.parse(event.data))) {
+        closeEvalEvents()
+      }
+    }
+
+    source.addEventListener('progress', handleEvent)
+    source.addEventListener('completed', handleEvent)
+    source.addEventListener('failed', handleEvent)
+    source.onerror = () => {
+      if (evalEventSourceRef.current !== source) {
+        return
+      }
+      closeEvalEvents()
+      pollEvalStatus(jobId)
+    }
+  }
+
+  // A 404 is retried a few times: behind several server workers or a load
+  // balancer, a status request can reach a process that has not seen the job.
+  const pollEvalStatus = async (jobId, misses = 0) => {
     if (!jobId || evalJobRef.current !== jobId) {
       return
     }
@@ -240,6 +318,11 @@ function App() {
       })
       const data = await response.json()
 
+      if (response.status === 404 && misses < EVAL_STATUS_MAX_MISSES) {
+        evalPollTimeoutRef.current = setTimeout(() => pollEvalStatus(jobId, misses + 1), 1000)
+        return
+      }
+
       if (!response.ok) {
         setEvalError(data?.error || 'خطا در دریافت وضعیت تست')
         setEvalLoading(false)
@@ -248,27 +331,9 @@ function App() {
         return
       }
 
-      if (data?.progress) {
-        setEvalProgress(data.progress)
-      }
-
-      if (data.status === 'completed') {
-        setEvalResult(data.result)
-        setEvalLoading(false)
-        setEvalStatus('completed')
-        setEvalProgress(data?.progress || null)
-        return
-      }
-
-      if (data.status === 'failed') {
-        setEvalError(data?.error || 'خطا در اجرای تست')
-        setEvalLoading(false)
-        setEvalStatus('failed')
-        setEvalProgress(data?.progress || null)
+      if (applyEvalStatus(data)) {
         return
       }
-
-      setEvalStatus(data.status)
       evalPollTimeoutRef.current = setTimeout(() => pollEvalStatus(jobId), 3000)
     } catch {
       setEvalError('خطا در ارتباط با سرور. مطمئن شوید سرویس‌ها در حال اجرا هستند.')